@@ -8,6 +8,7 @@ from helpers import (
     format_confidence,
     format_cost,
     identify_expensive_nodes,
+    parse_sse,
     severity_badge,
 )
 
@@ -45,6 +46,24 @@ def _post(endpoint: str, payload: dict) -> dict | None:
         return None
 
 
+def _stream(endpoint: str, payload: dict):
+    """Yield (event, data) pairs from a Server-Sent Events endpoint."""
+    try:
+        # No read timeout: tokens may pause while a node is working
+        timeout = httpx.Timeout(10.0, read=None)
+        with httpx.Client(timeout=timeout) as client:
+            with client.stream("POST", f"{API_URL}{endpoint}", json=payload) as resp:
+                if resp.status_code != 200:
+                    resp.read()
+                    st.warning(f"API returned {resp.status_code}: {resp.text[:300]}")
+                    return
+                yield from parse_sse(resp.iter_lines())
+    except httpx.ConnectError:
+        st.error("Cannot reach the API. Make sure the server is running at " + API_URL)
+    except Exception:
+        st.error("An unexpected error occurred while calling the API.")
+
+
 def _get(endpoint: str) -> dict | None:
     try:
         with httpx.Client(timeout=30.0) as client:
@@ -61,6 +80,64 @@ def _get(endpoint: str) -> dict | None:
         return None
 
 
+# ── Section renderers (shared by the live stream and the final report) ─────
+
+def _render_papers(papers: list[dict]) -> None:
+    if not papers:
+        st.info("No papers in response.")
+        return
+    rows = []
+    for p in papers:
+        authors = p.get("authors", [])
+        rows.append({
+            "Title": p.get("title", ""),
+            "Authors": ", ".join(authors[:2]) + (" et al." if len(authors) > 2 else ""),
+            "Year": p.get("year", ""),
+            "Source": p.get("source", ""),
+            "Citations": p.get("citation_count", 0),
+            "URL": p.get("url", ""),
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+
+def _render_contradictions(contradictions: list[dict]) -> None:
+    if not contradictions:
+        st.info("No contradictions detected across the fetched papers.")
+        return
+    for c in contradictions:
+        sev = c.get("severity", "low")
+        badge = severity_badge(sev) if sev in {"high", "medium", "low"} else "❓"
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"**{badge} {c.get('paper_a_title', 'Paper A')}**")
+            st.write(c.get("claim_a", ""))
+        with col2:
+            st.markdown(f"**{c.get('paper_b_title', 'Paper B')}**")
+            st.write(c.get("claim_b", ""))
+        st.caption(f"Topic: {c.get('topic', '—')}  |  Severity: {sev.upper()}")
+        st.divider()
+
+
+def _render_hypotheses(hypotheses: list[dict]) -> None:
+    if not hypotheses:
+        st.info("No hypotheses were generated.")
+        return
+    for i, h in enumerate(hypotheses, 1):
+        st.markdown(f"**Hypothesis {i}:** {h.get('hypothesis', '')}")
+        confidence = float(h.get("confidence", 0.0))
+        st.progress(confidence, text=f"Confidence: {format_confidence(confidence)}")
+        novelty = h.get("novelty", "")
+        col_a, col_b = st.columns([1, 3])
+        col_a.metric("Novelty", novelty.capitalize() if novelty else "—")
+        col_b.markdown(f"**Suggested method:** {h.get('suggested_method', '—')}")
+        st.markdown(f"*Rationale:* {h.get('rationale', '')}")
+        supporting = h.get("supporting_papers", [])
+        if supporting:
+            st.caption("Supporting papers: " + ", ".join(supporting))
+        if i < len(hypotheses):
+            st.divider()
+
+
 # ══════════════════════════════════════════════════════════════════════════
 # PAGE 1 — Research Query
 # ══════════════════════════════════════════════════════════════════════════
@@ -78,8 +155,48 @@ if page == "🔍 Research Query":
     analyze_clicked = st.button("🔍 Analyze", type="primary")
 
     if analyze_clicked:
-        with st.spinner("Fetching papers, synthesizing, generating hypotheses…"):
-            result = _post("/analyze", {"query": query.strip(), "max_papers": max_papers})
+        # Live view: each section fills in as its node finishes, then gives way
+        # to the full report below once the "done" event arrives.
+        live = st.empty()
+        with live.container():
+            status = st.status("Routing query and fetching papers…", expanded=False)
+            papers_slot = st.empty()
+            synthesis_slot = st.empty()
+            contradictions_slot = st.empty()
+            hypotheses_slot = st.empty()
+
+        result = None
+        synthesis_text = ""
+        events = _stream("/analyze/stream", {"query": query.strip(), "max_papers": max_papers})
+        for event, data in events:
+            if event == "stage":
+                status.update(label=f"✔ {data['node']} ({data['elapsed_ms'] / 1000:.1f}s)")
+            elif event == "papers":
+                papers = data["papers"] or []
+                with papers_slot.container():
+                    st.subheader(f"📄 Papers ({len(papers)} most relevant)")
+                    _render_papers(papers)
+            elif event == "synthesis_token":
+                synthesis_text += data["text"]
+                synthesis_slot.markdown(synthesis_text + "▌")
+            elif event == "synthesis":
+                synthesis_slot.markdown(data["synthesis"] or "")
+            elif event == "contradictions":
+                contradictions = data["contradictions"] or []
+                with contradictions_slot.container():
+                    st.subheader(f"⚔️ Contradictions ({len(contradictions)} found)")
+                    _render_contradictions(contradictions)
+            elif event == "hypotheses":
+                hypotheses = data["hypotheses"] or []
+                with hypotheses_slot.container():
+                    st.subheader(f"💡 Hypotheses ({len(hypotheses)} generated)")
+                    _render_hypotheses(hypotheses)
+            elif event == "done":
+                result = data
+            elif event == "error":
+                st.warning(f"API error: {data.get('detail', '')[:300]}")
+        live.empty()
+
         if result:
             for err in result.get("errors", []):
                 st.warning(f"⚠️ Pipeline warning: {err}")
@@ -89,25 +206,16 @@ if page == "🔍 Research Query":
     if not result:
         st.stop()
 
+    if result.get("cache_hit"):
+        similarity = result.get("cache_similarity") or 1.0
+        st.caption(
+            f"⚡ Served from cache (similarity {similarity:.0%}, "
+            f"original run `{result.get('query_id', '')}`)"
+        )
+
     # ── Papers ──────────────────────────────────────────────────────────
     with st.expander(f"📄 Papers ({len(result.get('papers', []))} fetched)", expanded=False):
-        papers = result.get("papers", [])
-        if papers:
-            rows = []
-            for p in papers:
-                authors = p.get("authors", [])
-                rows.append({
-                    "Title": p.get("title", ""),
-                    "Authors": ", ".join(authors[:2]) + (" et al." if len(authors) > 2 else ""),
-                    "Year": p.get("year", ""),
-                    "Source": p.get("source", ""),
-                    "Citations": p.get("citation_count", 0),
-                    "URL": p.get("url", ""),
-                })
-            df = pd.DataFrame(rows)
-            st.dataframe(df, use_container_width=True, hide_index=True)
-        else:
-            st.info("No papers in response.")
+        _render_papers(result.get("papers", []))
 
     # ── Synthesis ────────────────────────────────────────────────────────
     with st.expander("📝 Synthesis", expanded=True):
@@ -123,42 +231,12 @@ if page == "🔍 Research Query":
     # ── Contradictions ────────────────────────────────────────────────────
     contradictions = result.get("contradictions", [])
     with st.expander(f"⚔️ Contradictions ({len(contradictions)} found)", expanded=False):
-        if not contradictions:
-            st.info("No contradictions detected across the fetched papers.")
-        else:
-            for c in contradictions:
-                sev = c.get("severity", "low")
-                badge = severity_badge(sev) if sev in {"high", "medium", "low"} else "❓"
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown(f"**{badge} {c.get('paper_a_title', 'Paper A')}**")
-                    st.write(c.get("claim_a", ""))
-                with col2:
-                    st.markdown(f"**{c.get('paper_b_title', 'Paper B')}**")
-                    st.write(c.get("claim_b", ""))
-                st.caption(f"Topic: {c.get('topic', '—')}  |  Severity: {sev.upper()}")
-                st.divider()
+        _render_contradictions(contradictions)
 
     # ── Hypotheses ────────────────────────────────────────────────────────
     hypotheses = result.get("hypotheses", [])
     with st.expander(f"💡 Hypotheses ({len(hypotheses)} generated)", expanded=True):
-        if not hypotheses:
-            st.info("No hypotheses were generated.")
-        else:
-            for i, h in enumerate(hypotheses, 1):
-                st.markdown(f"**Hypothesis {i}:** {h.get('hypothesis', '')}")
-                confidence = float(h.get("confidence", 0.0))
-                st.progress(confidence, text=f"Confidence: {format_confidence(confidence)}")
-                novelty = h.get("novelty", "")
-                col_a, col_b = st.columns([1, 3])
-                col_a.metric("Novelty", novelty.capitalize() if novelty else "—")
-                col_b.markdown(f"**Suggested method:** {h.get('suggested_method', '—')}")
-                st.markdown(f"*Rationale:* {h.get('rationale', '')}")
-                supporting = h.get("supporting_papers", [])
-                if supporting:
-                    st.caption("Supporting papers: " + ", ".join(supporting))
-                if i < len(hypotheses):
-                    st.divider()
+        _render_hypotheses(hypotheses)
 
     # ── Cost Report ────────────────────────────────────────────────────────
     with st.expander("💰 Cost Report", expanded=False):
@@ -180,6 +258,19 @@ if page == "🔍 Research Query":
                 expensive = identify_expensive_nodes(breakdown)
                 if expensive:
                     st.warning(f"High-cost nodes (>40% of total): {', '.join(expensive)}")
+
+            for name, cache in cost_report.get("caches", {}).items():
+                st.caption(
+                    f"Cache `{name}`: {cache['hits']}/{cache['hits'] + cache['misses']} hits "
+                    f"({cache['hit_rate']:.0%}) — saved {cache['tokens_saved']:,} tokens "
+                    f"({format_cost(cache['cost_saved_usd'])})"
+                )
+            for node, cache in cost_report.get("prompt_cache", {}).items():
+                st.caption(
+                    f"Prompt cache `{node}`: {cache['hit_ratio']:.0%} of "
+                    f"{cache['input_tokens']:,} input tokens read from cache, "
+                    f"{cache['cache_write_tokens']:,} written"
+                )
         else:
             st.info("No cost data available.")
 
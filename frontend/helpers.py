@@ -1,3 +1,7 @@
+import json
+from typing import Iterable, Iterator
+
+
 def format_cost(usd: float) -> str:
     """Format a USD cost as '0.40¢ ($0.0040)'."""
     cents = usd * 100
@@ -31,3 +35,22 @@ def identify_expensive_nodes(
 def format_confidence(confidence: float) -> str:
     """Format a 0.0–1.0 confidence as a percentage string, e.g. '86%'."""
     return f"{round(confidence * 100)}%"
+
+
+def parse_sse(lines: Iterable[str]) -> Iterator[tuple[str, dict]]:
+    """Parse Server-Sent Event lines into (event, data) pairs.
+
+    Multi-line data fields are joined with newlines; frames without data are skipped.
+    """
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:") :].strip())
+    if data:
+        yield event, json.loads("\n".join(data))
@@ -0,0 +1,149 @@
+"""
+arXiv Atom parse-throughput benchmark — streaming pull parser vs. feedparser.
+
+Parses large Atom feeds two ways and reports entries/s, MB/s, time to the first
+paper and peak traced memory:
+
+  stream     : src.utils.atom.iter_atom_papers fed 64 KiB chunks, as the fetcher
+               does with the httpx response stream
+  feedparser : feedparser.parse over the whole buffered body, as arxiv.Client does
+
+Pass recorded feeds (saved arXiv API responses) with --feed; without them a
+synthetic feed in the arXiv API format is generated with --entries entries.
+
+Run with: python scripts/bench_atom_parse.py --entries 20000
+          python scripts/bench_atom_parse.py --feed recorded1.xml recorded2.xml
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# allow imports from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.atom import iter_atom_papers
+
+CHUNK = 64 * 1024
+
+_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<feed xmlns="http://www.w3.org/2005/Atom" '
+    'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" '
+    'xmlns:arxiv="http://arxiv.org/schemas/atom">\n'
+    "  <title>arXiv Query: search_query=all:attention</title>\n"
+    "  <opensearch:totalResults>{n}</opensearch:totalResults>\n"
+)
+
+_ENTRY = """  <entry>
+    <id>http://arxiv.org/abs/{id}v1</id>
+    <updated>2024-01-0{d}T00:00:00Z</updated>
+    <published>2024-01-0{d}T00:00:00Z</published>
+    <title>{title}</title>
+    <summary>{summary}</summary>
+{authors}    <arxiv:primary_category term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>
+    <link href="http://arxiv.org/abs/{id}v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/{id}v1" rel="related"/>
+  </entry>
+"""
+
+
+def synthetic_feed(n: int, seed: int = 3) -> bytes:
+    rng = random.Random(seed)
+    words = [f"term{i}" for i in range(5000)]
+    parts = [_HEADER.format(n=n)]
+    for i in range(n):
+        summary = "\n  ".join(
+            " ".join(rng.choices(words, k=12)) for _ in range(rng.randint(10, 20))
+        )
+        authors = "".join(
+            f"    <author><name>Author {rng.randint(1, 9999)}</name></author>\n"
+            for _ in range(rng.randint(1, 8))
+        )
+        parts.append(
+            _ENTRY.format(
+                id=f"2401.{i:05d}",
+                d=1 + i % 9,
+                title=" ".join(rng.choices(words, k=10)),
+                summary=summary,
+                authors=authors,
+            )
+        )
+    parts.append("</feed>\n")
+    return "".join(parts).encode()
+
+
+def _stream(body: bytes):
+    chunks = (body[i : i + CHUNK] for i in range(0, len(body), CHUNK))
+    return iter_atom_papers(chunks)
+
+
+def _feedparser(body: bytes):
+    import feedparser
+
+    return iter(feedparser.parse(body).entries)
+
+
+def measure(parse, body: bytes) -> dict:
+    t0 = time.perf_counter()
+    first_s = None
+    count = 0
+    for _ in parse(body):
+        if first_s is None:
+            first_s = time.perf_counter() - t0
+        count += 1
+    elapsed = time.perf_counter() - t0
+
+    # Separate pass: tracemalloc slows allocation-heavy code several-fold
+    tracemalloc.start()
+    for _ in parse(body):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "entries": count,
+        "elapsed_s": elapsed,
+        "first_s": first_s or 0.0,
+        "entries_per_s": count / elapsed if elapsed else 0.0,
+        "mb_per_s": len(body) / 1e6 / elapsed if elapsed else 0.0,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--feed", nargs="*", default=[], help="recorded Atom feeds")
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--skip-feedparser", action="store_true")
+    args = parser.parse_args()
+
+    if args.feed:
+        feeds = []
+        for path in args.feed:
+            with open(path, "rb") as f:
+                feeds.append((os.path.basename(path), f.read()))
+    else:
+        feeds = [(f"synthetic x{args.entries}", synthetic_feed(args.entries))]
+
+    parsers = [("stream", _stream)]
+    if not args.skip_feedparser:
+        parsers.append(("feedparser", _feedparser))
+
+    print(
+        f"{'feed':<22} {'parser':<11} {'entries':>8} {'MB':>7} {'total s':>8} "
+        f"{'first ms':>9} {'entries/s':>10} {'MB/s':>7} {'peak MB':>8}"
+    )
+    for name, body in feeds:
+        for label, parse in parsers:
+            r = measure(parse, body)
+            print(
+                f"{name:<22} {label:<11} {r['entries']:>8} {len(body) / 1e6:>7.1f} "
+                f"{r['elapsed_s']:>8.2f} {r['first_s'] * 1000:>9.1f} "
+                f"{r['entries_per_s']:>10.0f} {r['mb_per_s']:>7.1f} {r['peak_mb']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
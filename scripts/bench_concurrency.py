@@ -0,0 +1,257 @@
+"""
+Concurrent-request throughput benchmark for /analyze (one worker, one event loop).
+
+Every external call (OpenAI, Anthropic, arXiv, Pinecone, Supabase) is replaced by a
+stub that waits for a fixed latency, so no API keys are needed and no money is spent.
+
+  --mode blocking : stubs wait with time.sleep on the event loop — the behaviour of
+                    the old synchronous graph.invoke() inside an async endpoint
+  --mode async    : stubs await asyncio.sleep — the behaviour of graph.ainvoke()
+
+While the /analyze burst is in flight, /health is polled to show whether other
+requests on the same worker are stalled.
+
+Run with: python scripts/bench_concurrency.py --mode both --requests 20
+
+Exits non-zero if any request failed or a query's cost report picked up another
+query's calls, so the benchmark can gate CI.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# allow imports from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from src.api.main import app
+from src.api.result_cache import ResultCache
+from src.utils.politeness import PolitenessScheduler
+
+# Simulated per-call latency in seconds
+LATENCY = {
+    "router": 0.4,
+    "arxiv": 1.0,
+    "embed": 0.3,
+    "synthesizer": 2.0,
+    "contradiction": 0.8,
+    "hypothesis": 2.0,
+    "supabase": 0.1,
+}
+
+# Nodes that make exactly one LLM call per query at these paper counts
+_SINGLE_CALL_NODES = ("router", "synthesizer", "hypothesis_generator")
+
+_ROUTER_JSON = '{"keywords": ["attention", "transformer", "nlp"]}'
+_PAPERS = [
+    {
+        "id": f"bench-{i}",
+        "title": f"Benchmark Paper {i}",
+        # Distinct abstracts, so near-duplicate detection keeps every paper; each
+        # contests a result, so every topic cluster gets a contradiction call
+        "abstract": " ".join(f"finding{i}x{j}" for j in range(30))
+        + " It outperforms the baseline.",
+        "authors": ["Author One", "Author Two"],
+        "year": 2024,
+        "url": f"https://arxiv.org/abs/bench-{i}",
+        "source": "arxiv",
+        "citation_count": 0,
+    }
+    for i in range(30)
+]
+
+
+async def _wait(seconds: float, blocking: bool) -> None:
+    if blocking:
+        time.sleep(seconds)
+    else:
+        await asyncio.sleep(seconds)
+
+
+class _NoCache:
+    def get(self, query, max_results):
+        return None
+
+    def put(self, query, max_results, papers):
+        pass
+
+
+def _fake_chat(stage: str, content: str, blocking: bool):
+    class _FakeChat:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def ainvoke(self, messages, config=None):
+            await _wait(LATENCY[stage], blocking)
+            response = MagicMock()
+            response.content = content
+            response.usage_metadata = {"input_tokens": 100, "output_tokens": 50}
+            return response
+
+    return _FakeChat
+
+
+def _patches(blocking: bool) -> list:
+    async def search(query, limit):
+        # In blocking mode this is the old fetcher calling arXiv on the event loop
+        await _wait(LATENCY["arxiv"], blocking)
+        return _PAPERS[:limit]
+
+    async def embed(papers, query_id):
+        await _wait(LATENCY["embed"], blocking)
+        return len(papers)
+
+    async def embed_texts(texts, node_name=""):
+        await _wait(LATENCY["embed"], blocking)
+        return [[1.0, float(i)] for i in range(len(texts))]
+
+    async def log(**kwargs):
+        await _wait(LATENCY["supabase"], blocking)
+
+    patches = [
+        patch("src.agents.router._llm", _fake_chat("router", _ROUTER_JSON, blocking)),
+        patch(
+            "src.agents.contradiction._llm",
+            _fake_chat("contradiction", '{"contradictions": []}', blocking),
+        ),
+        patch(
+            "src.agents.synthesizer._llm",
+            _fake_chat("synthesizer", "Synthesis [Author et al., 2024].", blocking),
+        ),
+        patch(
+            "src.agents.hypothesis._llm",
+            _fake_chat("hypothesis", '{"hypotheses": []}', blocking),
+        ),
+        patch("src.agents.fetchers._search_arxiv", search),
+        # Semantic Scholar has no stub here; keep the bench off the network
+        patch("src.agents.fetchers._S2_ENABLED", False),
+        # Measure the uncached pipeline: every request pays the simulated arXiv call
+        patch("src.agents.fetchers.default_arxiv_cache", return_value=_NoCache()),
+        # The stubbed arXiv has no rate rules; don't space its calls 3s apart
+        patch(
+            "src.agents.fetchers.arxiv_scheduler",
+            return_value=PolitenessScheduler(min_interval_s=0, max_concurrent=100),
+        ),
+        patch("src.api.main._query_embedding", AsyncMock(return_value=None)),
+        # Let a stalled loop finish every request rather than cut it at the
+        # deadline, so both modes do the same work and their costs compare
+        patch("src.api.main._ANALYZE_DEADLINE_S", 600.0),
+        # A fresh result cache per mode, so the second mode doesn't replay the first
+        patch("src.api.main.result_cache", ResultCache()),
+        # ...and every node runs, rather than replaying from the node memo
+        patch.dict(os.environ, {"NODE_MEMO": "off"}),
+        patch("src.agents.reranker.embed_texts_cached", embed_texts),
+        patch("src.agents.reranker.embed_query", AsyncMock(return_value=[1.0, 0.0])),
+        patch("src.agents.contradiction.embed_texts_cached", embed_texts),
+        patch("src.agents.indexer.embed_and_upsert", embed),
+        patch("src.agents.cost_auditor.log_query", log),
+    ]
+    return patches
+
+
+async def _run(n_requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    # Distinct queries, so the result cache and request coalescing don't short-circuit
+    payloads = [
+        {"query": f"transformer attention mechanisms in NLP #{i}", "max_papers": 10}
+        for i in range(n_requests)
+    ]
+    health_ms: list[float] = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=600.0
+    ) as client:
+
+        async def probe_health():
+            # Latency is measured from when the probe was due to fire, so time
+            # spent waiting for a blocked event loop is included.
+            while not done.is_set():
+                due = time.perf_counter() + 0.05
+                await asyncio.sleep(0.05)
+                await client.get("/health")
+                health_ms.append((time.perf_counter() - due) * 1000)
+
+        probe = asyncio.create_task(probe_health())
+        t0 = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.post("/analyze", json=payload) for payload in payloads)
+        )
+        elapsed = time.perf_counter() - t0
+        done.set()
+        await probe
+
+    ok = sum(1 for r in responses if r.status_code == 200)
+    # Every query runs the same stubbed pipeline, so each cost report must list
+    # the same calls: one per single-call node plus one per contradiction
+    # cluster. A report that differs picked up a neighbouring query's calls.
+    calls = [
+        sorted(e["node_name"] for e in r.json()["cost_report"].get("breakdown", []))
+        for r in responses
+        if r.status_code == 200
+    ]
+    isolated = bool(calls) and all(
+        c == calls[0]
+        and all(c.count(node) == 1 for node in _SINGLE_CALL_NODES)
+        and "contradiction_detector" in c
+        for c in calls
+    )
+    return {
+        "ok": ok,
+        "costs_isolated": isolated,
+        "elapsed_s": elapsed,
+        "throughput_rps": ok / elapsed if elapsed else 0.0,
+        "health_max_ms": max(health_ms) if health_ms else 0.0,
+    }
+
+
+def bench(mode: str, n_requests: int) -> dict:
+    patches = _patches(blocking=(mode == "blocking"))
+    for p in patches:
+        p.start()
+    try:
+        return asyncio.run(_run(n_requests))
+    finally:
+        for p in reversed(patches):
+            p.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["blocking", "async", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    modes = ["blocking", "async"] if args.mode == "both" else [args.mode]
+    serial_s = sum(LATENCY.values())
+
+    print(f"\n{'='*68}")
+    print(
+        f"/analyze concurrency benchmark — {args.requests} concurrent requests, "
+        f"~{serial_s:.1f}s simulated pipeline"
+    )
+    print(f"{'='*68}")
+    print(
+        f"{'mode':<10} {'ok':>4} {'wall (s)':>10} {'req/s':>8} "
+        f"{'/health max (ms)':>18} {'costs isolated':>15}"
+    )
+    failed = []
+    for mode in modes:
+        r = bench(mode, args.requests)
+        print(
+            f"{mode:<10} {r['ok']:>4} {r['elapsed_s']:>10.2f} "
+            f"{r['throughput_rps']:>8.2f} {r['health_max_ms']:>18.0f} "
+            f"{str(r['costs_isolated']):>15}"
+        )
+        if r["ok"] < args.requests or not r["costs_isolated"]:
+            failed.append(mode)
+    print(f"{'='*68}\n")
+    if failed:
+        sys.exit(
+            f"FAILED ({', '.join(failed)}): every request must succeed "
+            "with its own costs only"
+        )
@@ -0,0 +1,103 @@
+"""
+Near-duplicate detection micro-benchmark — MinHash signatures + LSH banding.
+
+Generates N synthetic papers with random abstracts drawn from a fixed vocabulary,
+then injects near-duplicates (a few words edited, optionally retitled) for a share
+of them. Times signature computation, LSH candidate search and clustering at each
+size, and reports recall of the injected pairs and how many pairs were verified
+compared with the N*(N-1)/2 an all-pairs comparison would need.
+
+Run with: python scripts/bench_dedup.py --sizes 1000 10000 100000 --threshold 0.7
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# allow imports from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.minhash import MinHasher, cluster, lsh_params, near_duplicate_pairs
+
+VOCAB = [f"w{i}" for i in range(20000)]
+
+
+def make_corpus(n, dup_rate, abstract_words, seed):
+    """Papers plus the (original, duplicate) index pairs that were injected."""
+    rng = random.Random(seed)
+    originals = int(n / (1 + dup_rate))
+    texts = []
+    for _ in range(originals):
+        title = " ".join(rng.choices(VOCAB, k=8))
+        texts.append(f"{title} {' '.join(rng.choices(VOCAB, k=abstract_words))}")
+
+    injected = []
+    while len(texts) < n:
+        source = rng.randrange(originals)
+        words = texts[source].split()
+        # A v2 / venue version: a handful of words edited, sometimes a new title
+        for _ in range(max(1, len(words) // 50)):
+            words[rng.randrange(len(words))] = rng.choice(VOCAB)
+        if rng.random() < 0.3:
+            words[:8] = rng.choices(VOCAB, k=8)
+        injected.append((source, len(texts)))
+        texts.append(" ".join(words))
+    return texts, injected
+
+
+def run(n, args):
+    texts, injected = make_corpus(n, args.dup_rate, args.abstract_words, args.seed)
+    hasher = MinHasher(num_perm=args.num_perm)
+
+    t0 = time.perf_counter()
+    signatures = hasher.signatures(texts)
+    t1 = time.perf_counter()
+    pairs = near_duplicate_pairs(signatures, args.threshold)
+    t2 = time.perf_counter()
+    roots = cluster(n, pairs)
+    t3 = time.perf_counter()
+
+    found = sum(roots[a] == roots[b] for a, b in injected)
+    return {
+        "n": n,
+        "signatures_s": t1 - t0,
+        "lsh_s": t2 - t1,
+        "cluster_s": t3 - t2,
+        "total_s": t3 - t0,
+        "pairs": len(pairs),
+        "recall": found / len(injected) if injected else 1.0,
+        "clusters": len(set(roots)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--dup-rate", type=float, default=0.05)
+    parser.add_argument("--abstract-words", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    bands, rows = lsh_params(args.threshold, args.num_perm)
+    print(
+        f"threshold={args.threshold}  num_perm={args.num_perm}  "
+        f"bands={bands} rows={rows}  dup_rate={args.dup_rate}"
+    )
+    print(
+        f"{'papers':>8} {'sign s':>8} {'lsh s':>8} {'union s':>8} {'total s':>8} "
+        f"{'us/paper':>9} {'pairs':>7} {'recall':>7}"
+    )
+    for n in args.sizes:
+        r = run(n, args)
+        print(
+            f"{r['n']:>8} {r['signatures_s']:>8.2f} {r['lsh_s']:>8.2f} "
+            f"{r['cluster_s']:>8.2f} {r['total_s']:>8.2f} "
+            f"{r['total_s'] / n * 1e6:>9.1f} {r['pairs']:>7} {r['recall']:>7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cold-start import report — what a fresh interpreter pays to import a module.
+
+Runs `python -X importtime -c "import <module>"` in a clean subprocess, then prints
+the total, the slowest modules by cumulative time, and which heavy provider SDKs
+were pulled in (these should only load on first use, not at import).
+
+Run with: python scripts/import_time_report.py --module src.api.main --top 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Provider SDKs that must stay out of the import path of the API module
+HEAVY_MODULES = (
+    "langchain_openai",
+    "langchain_anthropic",
+    "langgraph",
+    "openai",
+    "anthropic",
+    "pinecone",
+    "supabase",
+    "arxiv",
+    "mangum",
+)
+
+_PROBE = (
+    "import json, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - t0\n"
+    "loaded = [m for m in {heavy!r} if m in sys.modules]\n"
+    "print(json.dumps({{'elapsed_s': elapsed, 'loaded': loaded}}))\n"
+)
+
+
+def _run(module: str) -> tuple[dict, list[tuple[int, int, str]]]:
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            _PROBE.format(module=module, heavy=HEAVY_MODULES),
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return json.loads(proc.stdout.strip().splitlines()[-1]), rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--module", default="src.api.main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    probe, rows = _run(args.module)
+
+    print(f"import {args.module}: {probe['elapsed_s'] * 1000:.0f}ms wall\n")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: -r[1])[: args.top]:
+        print(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {name}")
+
+    print()
+    if probe["loaded"]:
+        print(f"Heavy SDKs loaded at import: {', '.join(probe['loaded'])}")
+    else:
+        print("Heavy SDKs loaded at import: none")
+
+
+if __name__ == "__main__":
+    main()
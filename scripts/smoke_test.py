@@ -3,7 +3,9 @@ Standalone smoke test for Phase 2.
 Run with: .venv/Scripts/python scripts/smoke_test.py
 Requires OPENAI_API_KEY in environment / .env file.
 """
+import asyncio
 import os
+import secrets
 import sys
 
 # allow imports from project root
@@ -12,12 +14,13 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv()
 
+from src.graph.checkpoint import thread_config
 from src.graph.pipeline import graph
 from src.utils.cost_tracker import cost_tracker
 
 QUERY = "transformer attention mechanisms in NLP"
 MAX_PAPERS = 6
-QUERY_ID = "smoke-001"
+QUERY_ID = f"smoke-{secrets.token_hex(4)}"
 
 if __name__ == "__main__":
     print(f"\n{'='*60}")
@@ -33,7 +36,7 @@ if __name__ == "__main__":
         "errors": [],
     }
 
-    result = graph.invoke(initial_state)
+    result = asyncio.run(graph.ainvoke(initial_state, thread_config(QUERY_ID)))
 
     arxiv_count = len(result.get("arxiv_papers", []))
     errors = result.get("errors", [])
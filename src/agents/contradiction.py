@@ -1,15 +1,54 @@
+import asyncio
 import json
+import os
+import re
 import time
+from typing import Optional
 
+import numpy as np
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 
+from src.graph.deadline import Tier, call_deadline, degraded, pick_tier, skipped
 from src.graph.state import ResearchState
+from src.storage.pinecone_store import embed_texts_cached, paper_text
+from src.utils.clients import clients
+from src.utils.clustering import topic_chunks
 from src.utils.cost_tracker import cost_tracker
 from src.utils.logger import logger
+from src.utils.prompt_packer import pack_papers
+from src.utils.rate_governor import estimate_tokens, governor
+from src.utils.resilience import resilience
 
 _MODEL = "gpt-4o-mini"
 _VALID_SEVERITIES = {"high", "medium", "low"}
+# Already the cheapest model, so a short budget only trims the papers compared
+_TIERS = (
+    Tier(min_s=8.0, model=_MODEL),
+    Tier(min_s=4.0, model=_MODEL, max_papers=4),
+)
+# Typical size of the contradictions JSON, for rate-governor budgeting
+_OUTPUT_TOKENS = 600
+# Abstract budget per prompt, filled in reranked order
+_PROMPT_TOKENS = int(os.getenv("CONTRADICTION_PROMPT_TOKENS", "2000"))
+_ABSTRACT_TOKENS = 150
+# Papers are split into topic clusters of at most this many, one call each, all
+# in flight at once: coverage grows with the corpus, latency stays one call
+_CLUSTER_PAPERS = int(os.getenv("CONTRADICTION_CLUSTER_PAPERS", "8"))
+# A cluster is only sent if two of its papers both state findings and are at
+# least this similar; unrelated or purely descriptive papers can't conflict
+_MIN_PAIR_SIMILARITY = float(os.getenv("CONTRADICTION_MIN_SIMILARITY", "0.35"))
+_SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# Wording that marks an abstract as comparing or contesting a result. Plain
+# positive findings ("we show", "improves", "achieves") are left out: nearly
+# every abstract has them, so they would keep every cluster
+_CLAIM_CUES = re.compile(
+    r"\b(outperform\w*|underperform\w*|(?:better|worse|superior|inferior) (?:than|to)|"
+    r"contrary to|contradict\w*|in contrast|whereas|unlike|fail(?:s|ed)? to|"
+    r"no (?:statistically )?significant|not (?:statistically )?significant\w*|"
+    r"no (?:effect|benefit|improvement|difference|gain)s?|ineffective)\b",
+    re.IGNORECASE,
+)
 
 _SYSTEM = """You are a scientific contradiction detector. Given research paper abstracts, identify claims that directly contradict each other.
 Return ONLY valid JSON — no markdown, no explanation:
@@ -17,61 +56,195 @@ Return ONLY valid JSON — no markdown, no explanation:
 If no contradictions found, return {"contradictions": []}."""
 
 
-def _build_prompt(papers: list[dict]) -> str:
+def _header(p: dict) -> str:
+    return f"**{p.get('title', 'Untitled')}** ({p.get('year', 'n.d.')})"
+
+
+def _build_prompt(papers: list[dict], max_papers: Optional[int] = None) -> str:
     lines = ["Identify contradictions between claims in these papers:\n"]
-    for i, p in enumerate(papers[:8], 1):
-        lines.append(f"{i}. **{p.get('title', 'Untitled')}** ({p.get('year', 'n.d.')})")
-        lines.append(f"   {p.get('abstract', '')[:300]}\n")
+    packed = pack_papers(
+        papers,
+        _header,
+        _MODEL,
+        budget=_PROMPT_TOKENS,
+        max_abstract_tokens=_ABSTRACT_TOKENS,
+        max_papers=max_papers,
+    )
+    for i, entry in enumerate(packed, 1):
+        lines.append(f"{i}. {_header(entry.paper)}")
+        lines.append(f"   {entry.abstract}\n")
     return "\n".join(lines)
 
 
-def contradiction_node(state: ResearchState) -> dict:
-    papers = state.get("all_papers") or []
+def _llm():
+    return clients.chat_openai(model=_MODEL, temperature=0)
 
-    if len(papers) < 2:
-        logger.info("[contradiction_detector] Fewer than 2 papers — skipping")
-        return {"contradictions": []}
 
-    llm = ChatOpenAI(model=_MODEL, temperature=0)
-    prompt = _build_prompt(papers)
+def _claim_key(c: dict) -> tuple[str, str]:
+    """Order-insensitive, normalised (claim, claim) pair for deduplication."""
+    a, b = (
+        " ".join(re.findall(r"\w+", (c.get(k) or "").lower()))
+        for k in ("claim_a", "claim_b")
+    )
+    return (a, b) if a <= b else (b, a)
 
-    t0 = time.time()
+
+def merge_contradictions(groups: list[list[dict]]) -> list[dict]:
+    """Concatenate per-cluster results, keeping one entry per claim pair
+    (the most severe) in first-seen order."""
+    merged: dict[tuple[str, str], dict] = {}
+    for group in groups:
+        for c in group:
+            if c.get("severity") not in _VALID_SEVERITIES:
+                c["severity"] = "low"
+            key = _claim_key(c)
+            kept = merged.get(key)
+            if kept is None:
+                merged[key] = c
+            elif _SEVERITY_RANK[c["severity"]] > _SEVERITY_RANK[kept["severity"]]:
+                kept.update(c)
+    return list(merged.values())
+
+
+def plausible_clusters(
+    vectors: np.ndarray,
+    labels: np.ndarray,
+    has_claims: np.ndarray,
+    min_similarity: float = _MIN_PAIR_SIMILARITY,
+) -> np.ndarray:
+    """Boolean per cluster: does it hold a pair of papers that both state
+    findings and are at least min_similarity alike? One n x n cosine matrix,
+    masked to same-cluster claim-bearing pairs."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    x = vectors / np.where(norms == 0, 1.0, norms)
+    pairs = (
+        (x @ x.T >= min_similarity)
+        & (labels[:, None] == labels[None, :])
+        & has_claims[:, None]
+        & has_claims[None, :]
+    )
+    np.fill_diagonal(pairs, False)
+    plausible = np.zeros(labels.max() + 1, dtype=bool)
+    plausible[labels[pairs.any(axis=1)]] = True
+    return plausible
+
+
+async def _clusters(papers: list[dict]) -> list[list[dict]]:
+    """Topic clusters worth a contradiction call. Vectors come from the
+    embedding cache the reranker filled; without them papers are clustered
+    by rank and filtered on claim wording alone."""
+    if len(papers) <= _CLUSTER_PAPERS:
+        return [papers]
     try:
-        response = llm.invoke(
-            [
-                SystemMessage(content=_SYSTEM),
-                HumanMessage(content=prompt),
-            ]
+        vectors = np.asarray(
+            await embed_texts_cached(
+                [paper_text(p) for p in papers], node_name="contradiction_embed"
+            ),
+            dtype=np.float32,
         )
-        latency_ms = (time.time() - t0) * 1000
-
-        usage = response.usage_metadata or {}
-        cost_tracker.track_call(
-            node_name="contradiction_detector",
-            model=_MODEL,
-            input_tokens=usage.get("input_tokens", 0),
-            output_tokens=usage.get("output_tokens", 0),
-            latency_ms=latency_ms,
+        groups = topic_chunks(vectors, _CLUSTER_PAPERS)
+    except Exception as e:
+        logger.warning(
+            f"[contradiction_detector] Embeddings unavailable, clustering by rank: {e}"
         )
+        vectors = np.ones((len(papers), 1), dtype=np.float32)
+        groups = [
+            list(range(i, min(i + _CLUSTER_PAPERS, len(papers))))
+            for i in range(0, len(papers), _CLUSTER_PAPERS)
+        ]
+
+    labels = np.empty(len(papers), dtype=np.int64)
+    for j, group in enumerate(groups):
+        labels[group] = j
+    has_claims = np.array(
+        [bool(_CLAIM_CUES.search(p.get("abstract") or "")) for p in papers]
+    )
+    keep = plausible_clusters(vectors, labels, has_claims)
+    logger.info(
+        f"[contradiction_detector] {int(keep.sum())} of {len(groups)} clusters "
+        "have plausibly conflicting claims"
+    )
+    return [[papers[i] for i in g] for j, g in enumerate(groups) if keep[j]]
+
+
+async def _detect(
+    state: ResearchState, papers: list[dict], max_papers: Optional[int]
+) -> list[dict]:
+    """One contradiction call over one cluster."""
+    llm = _llm()
+    prompt = _build_prompt(papers, max_papers)
+    messages = [SystemMessage(content=_SYSTEM), HumanMessage(content=prompt)]
+    prompt_tokens = estimate_tokens(_MODEL, _SYSTEM, prompt)
 
-        data = json.loads(response.content)
-        contradictions = data.get("contradictions", [])
-
-        for c in contradictions:
-            if c.get("severity") not in _VALID_SEVERITIES:
-                c["severity"] = "low"
+    t0 = time.time()
+    response = await governor.call(
+        _MODEL,
+        lambda: resilience.call(
+            "openai",
+            lambda: llm.ainvoke(messages),
+            deadline_s=call_deadline(state, "openai"),
+            on_hedge_cancelled=lambda: cost_tracker.track_cancelled_hedge(
+                "contradiction_detector", _MODEL, prompt_tokens
+            ),
+        ),
+        prompt_tokens + _OUTPUT_TOKENS,
+    )
+    latency_ms = (time.time() - t0) * 1000
+
+    usage = response.usage_metadata or {}
+    cost_tracker.track_call(
+        node_name="contradiction_detector",
+        model=_MODEL,
+        input_tokens=usage.get("input_tokens", 0),
+        output_tokens=usage.get("output_tokens", 0),
+        latency_ms=latency_ms,
+    )
+    return json.loads(response.content).get("contradictions", [])
+
+
+async def contradiction_node(state: ResearchState) -> dict:
+    papers = state.get("all_papers") or []
 
-        logger.info(
-            f"[contradiction_detector] Found {len(contradictions)} contradictions"
-        )
-        return {"contradictions": contradictions}
+    if len(papers) < 2:
+        logger.info("[contradiction_detector] Fewer than 2 papers — skipping")
+        return {"contradictions": []}
 
-    except json.JSONDecodeError as e:
-        logger.warning(f"[contradiction_detector] JSON parse failed: {e}")
+    tier = pick_tier(state, _TIERS)
+    if tier is None:
+        logger.warning("[contradiction_detector] Out of time — skipping")
         return {
             "contradictions": [],
-            "errors": [f"contradiction_detector: JSON parse failed: {e}"],
+            "errors": [skipped("contradiction_detector", state)],
         }
-    except Exception as e:
-        logger.error(f"[contradiction_detector] Failed: {e}")
-        return {"contradictions": [], "errors": [f"contradiction_detector: {e}"]}
+    notes = (
+        [] if tier is _TIERS[0] else [degraded("contradiction_detector", state, tier)]
+    )
+
+    # A short budget compares only the leading papers, in one call
+    clusters = await _clusters(papers) if tier is _TIERS[0] else [papers]
+    results = await asyncio.gather(
+        *(_detect(state, cluster, tier.max_papers) for cluster in clusters),
+        return_exceptions=True,
+    )
+
+    found, errors = [], []
+    for i, result in enumerate(results, 1):
+        where = f"cluster {i} of {len(clusters)}: " if len(clusters) > 1 else ""
+        if isinstance(result, json.JSONDecodeError):
+            logger.warning(f"[contradiction_detector] JSON parse failed: {result}")
+            errors.append(f"contradiction_detector: {where}JSON parse failed: {result}")
+        elif isinstance(result, Exception):
+            logger.error(f"[contradiction_detector] Failed: {result}")
+            errors.append(f"contradiction_detector: {where}{result}")
+        else:
+            found.append(result)
+
+    contradictions = merge_contradictions(found)
+    logger.info(
+        f"[contradiction_detector] Found {len(contradictions)} contradictions "
+        f"across {len(clusters)} clusters"
+    )
+    update = {"contradictions": contradictions}
+    if notes or errors:
+        update["errors"] = notes + errors
+    return update
@@ -1,10 +1,11 @@
+from src.graph.deadline import call_deadline
 from src.graph.state import ResearchState
 from src.storage.supabase_store import log_query
 from src.utils.cost_tracker import cost_tracker
 from src.utils.logger import logger
 
 
-def cost_auditor_node(state: ResearchState) -> dict:
+async def cost_auditor_node(state: ResearchState) -> dict:
     # Finalise cost tracking
     try:
         report = cost_tracker.finish_query()
@@ -19,13 +20,14 @@ def cost_auditor_node(state: ResearchState) -> dict:
 
     # Log to Supabase — failure is non-fatal
     try:
-        log_query(
+        await log_query(
             query_id=state.get("query_id", "unknown"),
             query=state.get("original_query") or state.get("query", ""),
             cost_report=report,
             num_papers=len(state.get("all_papers") or []),
             num_contradictions=len(state.get("contradictions") or []),
             num_hypotheses=len(state.get("hypotheses") or []),
+            deadline_s=call_deadline(state, "supabase"),
         )
     except Exception as e:
         logger.warning(f"[cost_auditor] Supabase log failed (non-fatal): {e}")
@@ -1,7 +1,15 @@
+import os
 import re
+from functools import lru_cache
 
 from src.graph.state import ResearchState
 from src.utils.logger import logger
+from src.utils.minhash import MinHasher, cluster, near_duplicate_pairs
+
+# Estimated Jaccard similarity of title+abstract shingles above which two
+# papers count as the same work (v1/v2, preprint vs. venue version, retitles)
+_JACCARD_THRESHOLD = float(os.getenv("DEDUP_JACCARD_THRESHOLD", "0.7"))
+_NUM_PERM = int(os.getenv("DEDUP_MINHASH_PERMS", "128"))
 
 
 def _normalize_title(title: str) -> str:
@@ -14,8 +22,36 @@ def _normalize_title(title: str) -> str:
     return title
 
 
+def _better(a: dict, b: dict) -> dict:
+    """Of two copies of a paper, the one with the higher citation count."""
+    return b if (b.get("citation_count") or 0) > (a.get("citation_count") or 0) else a
+
+
+@lru_cache(maxsize=1)
+def _minhasher() -> MinHasher:
+    return MinHasher(num_perm=_NUM_PERM)
+
+
+def _merge_near_duplicates(papers: list[dict], threshold: float) -> list[dict]:
+    """Collapse clusters of near-duplicate papers (MinHash/LSH over
+    title+abstract shingles) to their most cited member."""
+    if len(papers) < 2:
+        return papers
+    signatures = _minhasher().signatures(
+        f"{p.get('title', '')} {p.get('abstract', '')}" for p in papers
+    )
+    roots = cluster(len(papers), near_duplicate_pairs(signatures, threshold))
+
+    kept: dict[int, dict] = {}
+    for root, paper in zip(roots, papers):
+        kept[root] = _better(kept[root], paper) if root in kept else paper
+    return list(kept.values())
+
+
 def deduplicator_node(state: ResearchState) -> dict:
-    combined = state.get("arxiv_papers") or []
+    combined = (state.get("arxiv_papers") or []) + (
+        state.get("semantic_scholar_papers") or []
+    )
 
     # Filter short abstracts
     papers = [p for p in combined if len(p.get("abstract", "")) >= 50]
@@ -24,14 +60,9 @@ def deduplicator_node(state: ResearchState) -> dict:
     seen: dict[str, dict] = {}
     for paper in papers:
         key = _normalize_title(paper.get("title", ""))
-        if key not in seen:
-            seen[key] = paper
-        elif (paper.get("citation_count") or 0) > (
-            seen[key].get("citation_count") or 0
-        ):
-            seen[key] = paper
-
-    deduped = list(seen.values())
+        seen[key] = _better(seen[key], paper) if key in seen else paper
+
+    deduped = _merge_near_duplicates(list(seen.values()), _JACCARD_THRESHOLD)
 
     # Sort: citation_count desc, year desc
     deduped.sort(key=lambda p: (-(p.get("citation_count") or 0), -(p.get("year") or 0)))
@@ -1,36 +1,311 @@
-import arxiv
+import asyncio
+import os
+import re
+import time
+from itertools import combinations
+from typing import AsyncIterator, Optional
 
+import httpx
+
+from src.graph.deadline import call_deadline, remaining_s, skipped
 from src.graph.state import ResearchState
+from src.storage.arxiv_cache import default_arxiv_cache, normalize_query
+from src.utils.atom import AtomPaperParser
+from src.utils.clients import clients
+from src.utils.cost_tracker import cost_tracker
 from src.utils.logger import logger
+from src.utils.politeness import arxiv_scheduler, semantic_scholar_scheduler
+from src.utils.rate_governor import governor
+from src.utils.resilience import resilience
+
+_ARXIV_API = "https://export.arxiv.org/api/query"
+_ARXIV_TIMEOUT = httpx.Timeout(float(os.getenv("ARXIV_TIMEOUT", "30")), connect=10.0)
+
+_S2_ENABLED = os.getenv("SEMANTIC_SCHOLAR_ENABLED", "1") != "0"
+_S2_API = os.getenv(
+    "SEMANTIC_SCHOLAR_API_URL", "https://api.semanticscholar.org/graph/v1"
+)
+# Whole-call budget for each Semantic Scholar request (search or batch lookup)
+_S2_TIMEOUT_S = float(os.getenv("SEMANTIC_SCHOLAR_TIMEOUT", "10"))
+_S2_SEARCH_FIELDS = "title,abstract,authors,year,citationCount,externalIds,url"
+_S2_BATCH_MAX = 500
+_ARXIV_VERSION = re.compile(r"v\d+$")
+
+# Entries younger than the TTL are served as-is; for STALE seconds after that they
+# are still served, but refreshed in the background for the next caller
+_CACHE_TTL_S = float(os.getenv("ARXIV_CACHE_TTL", "86400"))
+_CACHE_STALE_S = float(os.getenv("ARXIV_CACHE_STALE", "604800"))
+
+# Candidates fetched per requested paper; the reranker keeps the best max_papers
+_OVERFETCH = max(1, int(os.getenv("RERANK_OVERFETCH", "3")))
+
+# Sub-queries per fetch: the enriched query, then the user's own wording and
+# keyword pairs. 1 keeps the single enriched query.
+_FANOUT = max(1, int(os.getenv("ARXIV_FANOUT", "1")))
+
+# Seconds of run budget below which the fetchers cut back: extra sub-queries
+# queue behind the politeness scheduler, and Semantic Scholar is optional
+_FANOUT_MIN_BUDGET_S = 15.0
+_S2_MIN_BUDGET_S = 3.0
+
+# Keys with a refresh in flight, and strong refs so refresh tasks aren't GC'd
+_refreshing: set[tuple[str, int]] = set()
+_background: set[asyncio.Task] = set()
+
+
+async def stream_arxiv(query: str, limit: int) -> AsyncIterator[dict]:
+    """Papers for one arXiv search, yielded as each Atom <entry> is parsed
+    off the wire. Asks the API for exactly `limit` results."""
+    parser = AtomPaperParser()
+    params = {"search_query": query, "start": 0, "max_results": limit}
+    async with clients.http("arxiv").stream(
+        "GET", _ARXIV_API, params=params, timeout=_ARXIV_TIMEOUT
+    ) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            for paper in parser.feed(chunk):
+                yield paper
+    for paper in parser.close():
+        yield paper
+
+
+async def _search_arxiv(query: str, limit: int) -> list[dict]:
+    return [p async for p in stream_arxiv(query, limit) if len(p["abstract"]) >= 50]
+
 
+async def _fetch_and_store(
+    query: str, limit: int, deadline_s: Optional[float] = None
+) -> list[dict]:
+    """Search arXiv and cache the papers with their citation counts, so cache
+    hits make no network calls; background refreshes renew the counts too."""
+    t0 = time.monotonic()
+    async with arxiv_scheduler().slot():
+        # Spacing is the scheduler's job; the governor honours arXiv's Retry-After
+        papers = await governor.call(
+            "arxiv",
+            lambda: resilience.call(
+                "arxiv", lambda: _search_arxiv(query, limit), deadline_s=deadline_s
+            ),
+        )
+    if deadline_s is not None:
+        deadline_s -= time.monotonic() - t0
+    papers = await with_citation_counts(papers, deadline_s)
+    if papers:
+        await asyncio.to_thread(default_arxiv_cache().put, query, limit, papers)
+    return papers
 
-def arxiv_fetcher(state: ResearchState) -> dict:
-    limit = max(1, state.get("max_papers", 10))
-    query = state.get("query", "")
 
+def _refresh_in_background(query: str, limit: int) -> None:
+    key = (normalize_query(query), limit)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+
+    async def refresh():
+        try:
+            papers = await _fetch_and_store(query, limit)
+            logger.info(f"[arxiv_fetcher] refreshed {len(papers)} papers for {query!r}")
+        except Exception as e:
+            logger.warning(f"[arxiv_fetcher] background refresh failed: {e}")
+        finally:
+            _refreshing.discard(key)
+
+    task = asyncio.create_task(refresh())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def sub_queries(state: ResearchState, fanout: int) -> list[str]:
+    """Up to fanout distinct arXiv queries for one request."""
+    keywords = [k for k in state.get("keywords") or [] if k.strip()]
+    candidates = [state.get("query", ""), state.get("original_query", "")]
+    candidates += [
+        " AND ".join(f'all:"{k}"' for k in pair) for pair in combinations(keywords, 2)
+    ]
+
+    queries: dict[str, str] = {}
+    for query in candidates:
+        if query and normalize_query(query) not in queries:
+            queries[normalize_query(query)] = query
+    return list(queries.values())[:fanout] or [""]
+
+
+async def _cached_search(
+    query: str, limit: int, deadline_s: Optional[float] = None
+) -> tuple[list[dict], Optional[str]]:
+    """(papers, error) for one query, from the cache when possible."""
+    cached = None
     try:
-        client = arxiv.Client()
-        search = arxiv.Search(query=query, max_results=limit)
-        papers = []
-        for result in client.results(search):
-            abstract = result.summary or ""
-            if len(abstract) < 50:
-                continue
-            papers.append(
-                {
-                    "id": result.entry_id,
-                    "title": result.title,
-                    "abstract": abstract,
-                    "authors": [str(a) for a in result.authors[:5]],
-                    "year": result.published.year if result.published else None,
-                    "url": result.entry_id,
-                    "source": "arxiv",
-                    "citation_count": 0,
-                }
-            )
-        logger.info(f"[arxiv_fetcher] fetched {len(papers)} papers")
-        return {"arxiv_papers": papers}
+        cached = await asyncio.to_thread(default_arxiv_cache().get, query, limit)
+        if cached is not None:
+            papers, age_s = cached
+            if age_s < _CACHE_TTL_S + _CACHE_STALE_S:
+                if age_s >= _CACHE_TTL_S:
+                    _refresh_in_background(query, limit)
+                logger.info(
+                    f"[arxiv_fetcher] cache hit ({age_s:.0f}s old): {len(papers)} papers"
+                )
+                cost_tracker.track_cache("arxiv", hits=1, misses=0)
+                return papers, None
+
+        papers = await _fetch_and_store(query, limit, deadline_s)
+        cost_tracker.track_cache("arxiv", hits=0, misses=1)
+        logger.info(f"[arxiv_fetcher] fetched {len(papers)} papers for {query!r}")
+        return papers, None
 
     except Exception as e:
         logger.warning(f"[arxiv_fetcher] Error: {e}")
-        return {"arxiv_papers": [], "errors": [f"arxiv_fetcher: {str(e)}"]}
+        if cached is not None:
+            # An expired copy beats no papers at all
+            return cached[0], f"arxiv_fetcher: served expired cache ({e})"
+        return [], f"arxiv_fetcher: {str(e)}"
+
+
+async def arxiv_fetcher(state: ResearchState) -> dict:
+    limit = max(1, state.get("max_papers", 10)) * _OVERFETCH
+    left = remaining_s(state)
+    fanout = _FANOUT if left is None or left >= _FANOUT_MIN_BUDGET_S else 1
+    queries = sub_queries(state, fanout)
+
+    # Cache hits return at once; network fetches queue on the arXiv scheduler
+    deadline_s = call_deadline(state, "arxiv")
+    results = await asyncio.gather(
+        *(_cached_search(q, limit, deadline_s) for q in queries)
+    )
+
+    merged: dict[str, dict] = {}
+    for papers, _ in results:
+        for paper in papers:
+            merged.setdefault(paper.get("id") or paper.get("title", ""), paper)
+    if len(queries) > 1:
+        logger.info(
+            f"[arxiv_fetcher] {len(queries)} sub-queries → {len(merged)} unique papers"
+        )
+
+    update = {"arxiv_papers": list(merged.values())}
+    errors = [error for _, error in results if error]
+    if errors:
+        update["errors"] = errors
+    return update
+
+
+# ── Semantic Scholar ─────────────────────────────────────────────────────────
+
+
+async def _s2_request(
+    method: str, path: str, deadline_s: Optional[float] = None, **kwargs
+) -> httpx.Response:
+    """One Semantic Scholar call, spaced by its scheduler and bounded end to
+    end by SEMANTIC_SCHOLAR_TIMEOUT (or deadline_s, if sooner) per attempt."""
+    headers = {}
+    if os.getenv("SEMANTIC_SCHOLAR_API_KEY"):
+        headers["x-api-key"] = os.environ["SEMANTIC_SCHOLAR_API_KEY"]
+
+    async def call() -> httpx.Response:
+        async with semantic_scholar_scheduler().slot():
+            response = await clients.http("semantic_scholar").request(
+                method, f"{_S2_API}{path}", headers=headers, **kwargs
+            )
+        response.raise_for_status()
+        return response
+
+    timeout = _S2_TIMEOUT_S if deadline_s is None else min(_S2_TIMEOUT_S, deadline_s)
+    return await governor.call(
+        "semantic_scholar",
+        lambda: resilience.call("semantic_scholar", call, deadline_s=timeout),
+    )
+
+
+def _normalize_s2(paper: dict) -> dict:
+    return {
+        "id": f"s2:{paper.get('paperId')}",
+        "title": paper.get("title") or "",
+        "abstract": paper.get("abstract") or "",
+        "authors": [a.get("name", "") for a in (paper.get("authors") or [])[:5]],
+        "year": paper.get("year"),
+        "url": paper.get("url") or "",
+        "source": "semantic_scholar",
+        "citation_count": paper.get("citationCount") or 0,
+    }
+
+
+def arxiv_id(paper: dict) -> Optional[str]:
+    """Bare arXiv identifier (no version) of an arXiv paper, e.g. 2301.00001."""
+    url = paper.get("id") or ""
+    if "arxiv.org/abs/" not in url:
+        return None
+    return _ARXIV_VERSION.sub("", url.split("arxiv.org/abs/", 1)[1])
+
+
+async def with_citation_counts(
+    papers: list[dict], deadline_s: Optional[float] = None
+) -> list[dict]:
+    """arXiv papers with citation_count filled in from one Semantic Scholar
+    batch lookup (per 500 ids) rather than a call per paper. Best-effort:
+    papers are returned unchanged if the lookup fails or the run's remaining
+    deadline_s is too short to try."""
+    ids = [arxiv_id(p) for p in papers]
+    lookup = sorted({f"ARXIV:{i}" for i in ids if i})
+    if not lookup or not _S2_ENABLED:
+        return papers
+    if deadline_s is not None and deadline_s < _S2_MIN_BUDGET_S:
+        logger.warning("[arxiv_fetcher] Out of time — skipping citation lookup")
+        return papers
+
+    counts: dict[str, int] = {}
+    try:
+        for start in range(0, len(lookup), _S2_BATCH_MAX):
+            response = await _s2_request(
+                "POST",
+                "/paper/batch",
+                params={"fields": "citationCount,externalIds"},
+                json={"ids": lookup[start : start + _S2_BATCH_MAX]},
+                deadline_s=deadline_s,
+            )
+            for found in response.json():
+                arxiv = ((found or {}).get("externalIds") or {}).get("ArXiv")
+                if arxiv:
+                    counts[arxiv] = found.get("citationCount") or 0
+    except Exception as e:
+        logger.warning(f"[arxiv_fetcher] Citation lookup failed (continuing): {e}")
+        return papers
+
+    logger.info(f"[arxiv_fetcher] citation counts for {len(counts)}/{len(lookup)}")
+    return [
+        {**p, "citation_count": counts[i]} if i in counts else p
+        for p, i in zip(papers, ids)
+    ]
+
+
+async def semantic_scholar_fetcher(state: ResearchState) -> dict:
+    if not _S2_ENABLED:
+        return {"semantic_scholar_papers": []}
+    limit = min(100, max(1, state.get("max_papers", 10)) * _OVERFETCH)
+    # The user's own wording: S2's relevance search does poorly on keyword lists
+    query = state.get("original_query") or state.get("query", "")
+    left = remaining_s(state)
+    if left is not None and left < _S2_MIN_BUDGET_S:
+        logger.warning("[semantic_scholar_fetcher] Out of time — skipping")
+        return {
+            "semantic_scholar_papers": [],
+            "errors": [skipped("semantic_scholar_fetcher", state)],
+        }
+
+    try:
+        response = await _s2_request(
+            "GET",
+            "/paper/search",
+            params={"query": query, "limit": limit, "fields": _S2_SEARCH_FIELDS},
+            deadline_s=left,
+        )
+        papers = [_normalize_s2(p) for p in response.json().get("data") or []]
+        logger.info(f"[semantic_scholar_fetcher] fetched {len(papers)} papers")
+        return {"semantic_scholar_papers": papers}
+
+    except Exception as e:
+        reason = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+        logger.warning(f"[semantic_scholar_fetcher] Error: {reason}")
+        return {
+            "semantic_scholar_papers": [],
+            "errors": [f"semantic_scholar_fetcher: {reason}"],
+        }
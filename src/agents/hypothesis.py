@@ -1,15 +1,26 @@
 import json
 import time
 
-from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from src.graph.deadline import Tier, call_deadline, degraded, pick_tier, skipped
+from src.agents.synthesizer import paper_context, system_blocks
 from src.graph.state import ResearchState
-from src.utils.cost_tracker import cost_tracker
+from src.utils.clients import clients
+from src.utils.cost_tracker import cache_usage, cost_tracker
 from src.utils.logger import logger
+from src.utils.rate_governor import estimate_tokens, governor
+from src.utils.resilience import resilience
 
 _MODEL = "claude-sonnet-4-6"
 _VALID_NOVELTY = {"high", "medium", "low"}
+# Runs last, so it is the node most often left with a short budget
+_TIERS = (
+    Tier(min_s=12.0, model=_MODEL),
+    Tier(min_s=5.0, model="claude-haiku-4-5"),
+)
+# Three hypotheses run to about this many output tokens
+_OUTPUT_TOKENS = 800
 
 _SYSTEM = """You are a scientific hypothesis generator. Generate exactly 3 novel, testable research hypotheses.
 Return ONLY valid JSON — no markdown, no explanation:
@@ -37,36 +48,62 @@ def _build_prompt(synthesis: str, contradictions: list[dict]) -> str:
             )
         lines.append("")
     lines.append(
-        "Based on the synthesis and contradictions above, generate exactly 3 "
+        "Based on the papers, synthesis and contradictions above, generate exactly 3 "
         "novel research hypotheses that could meaningfully advance this field."
     )
     return "\n".join(lines)
 
 
-def hypothesis_node(state: ResearchState) -> dict:
+def _llm(model: str = _MODEL):
+    return clients.chat_anthropic(model=model, temperature=0.7)
+
+
+async def hypothesis_node(state: ResearchState) -> dict:
     synthesis = state.get("synthesis") or ""
     contradictions = state.get("contradictions") or []
 
-    llm = ChatAnthropic(model=_MODEL, temperature=0.7)
+    tier = pick_tier(state, _TIERS)
+    if tier is None:
+        logger.warning("[hypothesis_generator] Out of time — skipping")
+        return {"hypotheses": [], "errors": [skipped("hypothesis_generator", state)]}
+    notes = [] if tier is _TIERS[0] else [degraded("hypothesis_generator", state, tier)]
+
+    llm = _llm(tier.model)
+    # Same paper context as the synthesizer's, so its prefix is a cache read
+    context = paper_context(state.get("all_papers") or [], tier.model)
     prompt = _build_prompt(synthesis, contradictions)
 
     t0 = time.time()
     try:
-        response = llm.invoke(
-            [
-                SystemMessage(content=_SYSTEM),
-                HumanMessage(content=prompt),
-            ]
+        messages = [
+            SystemMessage(content=system_blocks(context, _SYSTEM)),
+            HumanMessage(content=prompt),
+        ]
+        prompt_tokens = estimate_tokens(tier.model, context, _SYSTEM, prompt)
+        response = await governor.call(
+            tier.model,
+            lambda: resilience.call(
+                "anthropic",
+                lambda: llm.ainvoke(messages),
+                deadline_s=call_deadline(state, "anthropic"),
+                on_hedge_cancelled=lambda: cost_tracker.track_cancelled_hedge(
+                    "hypothesis_generator", tier.model, prompt_tokens
+                ),
+            ),
+            prompt_tokens + _OUTPUT_TOKENS,
         )
         latency_ms = (time.time() - t0) * 1000
 
         usage = response.usage_metadata or {}
+        cache_read, cache_write = cache_usage(usage)
         cost_tracker.track_call(
             node_name="hypothesis_generator",
-            model=_MODEL,
+            model=tier.model,
             input_tokens=usage.get("input_tokens", 0),
             output_tokens=usage.get("output_tokens", 0),
             latency_ms=latency_ms,
+            cache_read_tokens=cache_read,
+            cache_write_tokens=cache_write,
         )
 
         data = json.loads(response.content)
@@ -78,14 +115,17 @@ def hypothesis_node(state: ResearchState) -> dict:
             h["confidence"] = max(0.0, min(1.0, float(h.get("confidence", 0.5))))
 
         logger.info(f"[hypothesis_generator] Generated {len(hypotheses)} hypotheses")
-        return {"hypotheses": hypotheses}
+        update = {"hypotheses": hypotheses}
+        if notes:
+            update["errors"] = notes
+        return update
 
     except json.JSONDecodeError as e:
         logger.warning(f"[hypothesis_generator] JSON parse failed: {e}")
         return {
             "hypotheses": [],
-            "errors": [f"hypothesis_generator: JSON parse failed: {e}"],
+            "errors": notes + [f"hypothesis_generator: JSON parse failed: {e}"],
         }
     except Exception as e:
         logger.error(f"[hypothesis_generator] Failed: {e}")
-        return {"hypotheses": [], "errors": [f"hypothesis_generator: {e}"]}
+        return {"hypotheses": [], "errors": notes + [f"hypothesis_generator: {e}"]}
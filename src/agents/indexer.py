@@ -0,0 +1,27 @@
+from src.graph.deadline import remaining_s, skipped
+from src.graph.state import ResearchState
+from src.storage.pinecone_store import embed_and_upsert
+from src.utils.logger import logger
+
+_MIN_BUDGET_S = 5.0
+
+
+async def indexer_node(state: ResearchState) -> dict:
+    papers = state.get("all_papers") or []
+    query_id = state.get("query_id", "unknown")
+
+    # The cost audit waits on indexing; don't hold up a run that is out of time
+    left = remaining_s(state)
+    if left is not None and left < _MIN_BUDGET_S:
+        logger.warning(f"[pinecone_indexer] {left:.1f}s left, skipping indexing")
+        return {"errors": [skipped("pinecone_indexer", state)]}
+
+    # Embed & store in Pinecone (best-effort) — runs beside the LLM nodes,
+    # nothing downstream reads the vectors.
+    try:
+        count = await embed_and_upsert(papers, query_id)
+        logger.info(f"[pinecone_indexer] Indexed {count} papers")
+    except Exception as e:
+        logger.warning(f"[pinecone_indexer] Pinecone upsert failed (continuing): {e}")
+
+    return {}
@@ -0,0 +1,132 @@
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+import numpy as np
+
+from src.graph.deadline import remaining_s
+from src.graph.state import ResearchState
+from src.storage.pinecone_store import embed_query, embed_texts_cached, paper_text
+from src.utils.logger import logger
+
+# Weight of embedding cosine vs. BM25 in the blended relevance score
+_EMBED_WEIGHT = float(os.getenv("RERANK_EMBED_WEIGHT", "0.7"))
+# MMR trade-off: 1.0 ranks purely by relevance, lower values favour diversity
+_MMR_LAMBDA = float(os.getenv("RERANK_MMR_LAMBDA", "1.0"))
+# With less run budget than this, rank by BM25 alone rather than wait on embeddings
+_EMBED_MIN_BUDGET_S = 10.0
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+
+
+def _tokens(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def bm25_scores(query: str, docs: list[str]) -> np.ndarray:
+    """Okapi BM25 of every doc against query, as one (docs x query terms)
+    term-frequency matrix."""
+    terms = sorted(set(_tokens(query)))
+    if not terms or not docs:
+        return np.zeros(len(docs))
+
+    doc_tokens = [_tokens(d) for d in docs]
+    counts = [Counter(tokens) for tokens in doc_tokens]
+    tf = np.array([[c[t] for t in terms] for c in counts], dtype=np.float64)
+    lengths = np.array([len(tokens) for tokens in doc_tokens], dtype=np.float64)
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log((len(docs) - df + 0.5) / (df + 0.5) + 1.0)
+    norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * lengths / max(lengths.mean(), 1.0))
+    return (idf * tf * (_BM25_K1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    span = scores.max() - scores.min() if len(scores) else 0.0
+    return (scores - scores.min()) / span if span > 0 else np.zeros_like(scores)
+
+
+def mmr_order(
+    relevance: np.ndarray, doc_vectors: np.ndarray, k: int, lam: float
+) -> list[int]:
+    """Greedy maximal marginal relevance: each pick maximises
+    lam * relevance - (1 - lam) * max cosine to what is already picked."""
+    similarity = doc_vectors @ doc_vectors.T
+    redundancy = np.full(len(relevance), -np.inf)
+    available = np.ones(len(relevance), dtype=bool)
+    order: list[int] = []
+    for _ in range(min(k, len(relevance))):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        marginal = np.where(available, lam * relevance - (1 - lam) * penalty, -np.inf)
+        pick = int(np.argmax(marginal))
+        order.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, similarity[:, pick])
+    return order
+
+
+def rerank(
+    query: str,
+    papers: list[dict],
+    query_vector: Optional[list[float]] = None,
+    paper_vectors: Optional[list[list[float]]] = None,
+    top_k: Optional[int] = None,
+    embed_weight: float = _EMBED_WEIGHT,
+    mmr_lambda: float = _MMR_LAMBDA,
+) -> list[dict]:
+    """Papers ordered by blended BM25 + embedding relevance to query (MMR
+    re-ordered when mmr_lambda < 1), each with a relevance_score in [0, 1].
+    Without vectors the score is BM25 alone."""
+    if not papers:
+        return []
+    top_k = min(top_k or len(papers), len(papers))
+    relevance = _min_max(bm25_scores(query, [paper_text(p) for p in papers]))
+
+    doc_vectors = None
+    if query_vector is not None and paper_vectors is not None:
+        doc_vectors = _unit_rows(np.asarray(paper_vectors, dtype=np.float32))
+        cosine = doc_vectors @ _unit_rows(np.asarray(query_vector, dtype=np.float32))
+        relevance = embed_weight * _min_max(cosine) + (1 - embed_weight) * relevance
+
+    if doc_vectors is not None and mmr_lambda < 1.0:
+        order = mmr_order(relevance, doc_vectors, top_k, mmr_lambda)
+    else:
+        order = np.argsort(-relevance, kind="stable")[:top_k].tolist()
+    return [
+        {**papers[i], "relevance_score": round(float(relevance[i]), 4)} for i in order
+    ]
+
+
+async def reranker_node(state: ResearchState) -> dict:
+    papers = state.get("all_papers") or []
+    if not papers:
+        return {}
+    query = state.get("original_query") or state.get("query", "")
+
+    query_vector = paper_vectors = None
+    left = remaining_s(state)
+    if left is not None and left < _EMBED_MIN_BUDGET_S:
+        logger.warning(f"[reranker] {left:.1f}s left, ranking by BM25 only")
+    else:
+        try:
+            # Same texts the indexer embeds, so its lookups hit the embedding cache
+            paper_vectors = await embed_texts_cached(
+                [paper_text(p) for p in papers], node_name="reranker_embed"
+            )
+            query_vector = await embed_query(query)
+        except Exception as e:
+            logger.warning(
+                f"[reranker] Embeddings unavailable, ranking by BM25 only: {e}"
+            )
+
+    ranked = rerank(
+        query, papers, query_vector, paper_vectors, top_k=state.get("max_papers")
+    )
+    logger.info(f"[reranker] Kept {len(ranked)} of {len(papers)} papers by relevance")
+    return {"all_papers": ranked}
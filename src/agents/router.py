@@ -2,11 +2,16 @@ import json
 import time
 
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 
+from src.graph.deadline import call_deadline, remaining_s, skipped
 from src.graph.state import ResearchState
+from src.utils.clients import clients
 from src.utils.cost_tracker import cost_tracker
 from src.utils.logger import logger
+from src.utils.rate_governor import estimate_tokens, governor
+from src.utils.resilience import resilience
+
+_MODEL = "gpt-4o-mini"
 
 _SYSTEM = (
     "You are a research query router. Extract keywords from the query. "
@@ -21,15 +26,40 @@ Return exactly this JSON:
 keywords: 3-5 specific technical terms from the query"""
 
 
-def router_node(state: ResearchState) -> dict:
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# Below this many seconds left the raw query goes straight to the fetchers
+_MIN_BUDGET_S = 8.0
+# The keyword JSON is short; this is what the rate governor reserves for it
+_OUTPUT_TOKENS = 100
+
+
+def _llm():
+    return clients.chat_openai(model=_MODEL, temperature=0)
+
+
+async def router_node(state: ResearchState) -> dict:
+    left = remaining_s(state)
+    if left is not None and left < _MIN_BUDGET_S:
+        # The fetchers can search the raw query; keep the time for them
+        logger.warning(f"[router] {left:.1f}s left, skipping keyword enrichment")
+        return {"routing_decision": "arxiv", "errors": [skipped("router", state)]}
+
+    llm = _llm()
     t0 = time.time()
     try:
-        response = llm.invoke(
-            [
-                SystemMessage(content=_SYSTEM),
-                HumanMessage(content=_USER_TEMPLATE.format(query=state["query"])),
-            ]
+        prompt = _USER_TEMPLATE.format(query=state["query"])
+        messages = [SystemMessage(content=_SYSTEM), HumanMessage(content=prompt)]
+        prompt_tokens = estimate_tokens(_MODEL, _SYSTEM, prompt)
+        response = await governor.call(
+            _MODEL,
+            lambda: resilience.call(
+                "openai",
+                lambda: llm.ainvoke(messages),
+                deadline_s=call_deadline(state, "openai"),
+                on_hedge_cancelled=lambda: cost_tracker.track_cancelled_hedge(
+                    "router", _MODEL, prompt_tokens
+                ),
+            ),
+            prompt_tokens + _OUTPUT_TOKENS,
         )
         latency_ms = (time.time() - t0) * 1000
 
@@ -39,7 +69,7 @@ def router_node(state: ResearchState) -> dict:
         usage = response.usage_metadata or {}
         cost_tracker.track_call(
             node_name="router",
-            model="gpt-4o-mini",
+            model=_MODEL,
             input_tokens=usage.get("input_tokens", 0),
             output_tokens=usage.get("output_tokens", 0),
             latency_ms=latency_ms,
@@ -50,7 +80,7 @@ def router_node(state: ResearchState) -> dict:
             enriched = f"{state['query']} {' '.join(keywords)}"
 
         logger.info(f"[router] keywords={keywords}")
-        return {"routing_decision": "arxiv", "query": enriched}
+        return {"routing_decision": "arxiv", "query": enriched, "keywords": keywords}
 
     except Exception as e:
         logger.warning(f"[router] Failed: {e}")
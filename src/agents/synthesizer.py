@@ -1,14 +1,45 @@
+import asyncio
+import os
 import time
+from typing import Optional
 
-from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage, SystemMessage
+from langgraph.constants import TAG_NOSTREAM
 
+from src.graph.deadline import Tier, call_deadline, degraded, pick_tier, skipped
 from src.graph.state import ResearchState
-from src.storage.pinecone_store import embed_and_upsert
-from src.utils.cost_tracker import cost_tracker
+from src.storage.pinecone_store import embed_texts_cached, paper_text
+from src.utils.clients import clients
+from src.utils.clustering import topic_chunks
+from src.utils.cost_tracker import cache_usage, cost_tracker
 from src.utils.logger import logger
+from src.utils.prompt_packer import cached_block, pack_papers
+from src.utils.rate_governor import estimate_tokens, governor
+from src.utils.resilience import resilience
 
 _MODEL = "claude-sonnet-4-6"
+# Cheaper paths as the run's deadline nears; below the last one the node is skipped
+_TIERS = (
+    Tier(min_s=15.0, model=_MODEL),
+    Tier(min_s=6.0, model="claude-haiku-4-5", max_papers=5),
+)
+# A 400-600 word synthesis; reserved with the rate governor before the call
+_OUTPUT_TOKENS = 1000
+# Paper context per prompt; the packer fits as many papers as this allows
+_PROMPT_TOKENS = int(os.getenv("SYNTHESIZER_PROMPT_TOKENS", "2500"))
+_ABSTRACT_TOKENS = 200
+
+# Above this many papers (job runs; /analyze is capped at 20) the synthesis is
+# map-reduced: topical chunks are summarised concurrently, then the summaries
+# are merged in a tree _REDUCE_FAN_IN wide, so no prompt grows with the paper
+# count and wall-clock time grows with the tree's depth
+_MAP_REDUCE_MIN_PAPERS = int(os.getenv("SYNTHESIS_MAP_REDUCE_MIN", "20"))
+_CHUNK_PAPERS = int(os.getenv("SYNTHESIS_CHUNK_PAPERS", "12"))
+_REDUCE_FAN_IN = max(2, int(os.getenv("SYNTHESIS_REDUCE_FAN_IN", "6")))
+# Chunk and merge calls in flight at once; the rate governor still paces them
+_MAP_CONCURRENCY = int(os.getenv("SYNTHESIS_MAP_CONCURRENCY", "8"))
+_MAP_MODEL = "claude-haiku-4-5"
+_MAP_OUTPUT_TOKENS = 500
 
 _SYSTEM = (
     "You are a scientific research synthesizer. Write a clear, structured narrative "
@@ -16,22 +47,77 @@ _SYSTEM = (
     "in the format [Author et al., Year]. Aim for 400-600 words."
 )
 
+_MAP_SYSTEM = (
+    "You are summarising one topical group of papers for a larger literature review. "
+    "In 150-250 words, state the group's theme and its main findings, methods and "
+    "disagreements. Cite every claim inline as [Author et al., Year] using the papers "
+    "as listed; never invent citations."
+)
+
+_REDUCE_SYSTEM = (
+    "You are merging partial summaries of a literature review. Combine them into one "
+    "summary of at most 300 words, grouping findings by theme. Keep every inline "
+    "citation [Author et al., Year] with the claim it supports; never invent citations."
+)
+
+
+def _header(p: dict) -> str:
+    authors = p.get("authors", [])
+    author_str = ", ".join(authors[:2])
+    if len(authors) > 2:
+        author_str += " et al."
+    return f"**{p.get('title', 'Untitled')}** ({author_str}, {p.get('year', 'n.d.')})"
+
+
+def _paper_list(
+    papers: list[dict], model: str, budget: int, max_papers: Optional[int] = None
+) -> str:
+    packed = pack_papers(
+        papers,
+        _header,
+        model,
+        budget=budget,
+        max_abstract_tokens=_ABSTRACT_TOKENS,
+        max_papers=max_papers,
+    )
+    if not packed:
+        return ""
+    lines = ["## Papers\n"]
+    for i, entry in enumerate(packed, 1):
+        lines.append(f"{i}. {_header(entry.paper)}\n   {entry.abstract}\n")
+    return "\n".join(lines)
+
 
-def _build_prompt(papers: list[dict], query: str) -> str:
-    lines = [
-        f'The user\'s research query is: "{query}"\n',
-        "Synthesize the following papers with a focus on this specific topic:\n",
-    ]
-    for i, p in enumerate(papers[:10], 1):
-        authors = p.get("authors", [])
-        author_str = ", ".join(authors[:2])
-        if len(authors) > 2:
-            author_str += " et al."
+def paper_context(papers: list[dict], model: str = _MODEL) -> str:
+    """The numbered paper list both Claude nodes put first in their system
+    prompt. It depends only on the papers and the model's tier, so the
+    hypothesis generator's call repeats the synthesizer's prefix and reads it
+    from Anthropic's prompt cache."""
+    max_papers = next((tier.max_papers for tier in _TIERS if tier.model == model), None)
+    return _paper_list(papers, model, _PROMPT_TOKENS, max_papers)
+
+
+def system_blocks(context: str, system: str) -> list[dict]:
+    """System prompt content with cache breakpoints after the shared paper
+    context and after the node's own instructions."""
+    blocks = [cached_block(context)] if context else []
+    return blocks + [cached_block(system)]
+
+
+def _query_line(query: str) -> str:
+    return f'The user\'s research query is: "{query}"\n'
+
+
+def _build_prompt(query: str, summaries: Optional[list[str]] = None) -> str:
+    lines = [_query_line(query)]
+    if summaries:
         lines.append(
-            f"{i}. **{p.get('title', 'Untitled')}** "
-            f"({author_str}, {p.get('year', 'n.d.')})\n"
-            f"   {p.get('abstract', '')[:300]}\n"
+            "The papers were summarised by topic below. Synthesize them "
+            "with a focus on this specific topic, keeping their citations.\n"
         )
+        lines.append("\n\n---\n\n".join(summaries))
+    else:
+        lines.append("Synthesize the papers above with a focus on this specific topic.")
     lines.append(
         "\nWrite a 400-600 word synthesis grouping papers by theme, "
         "keeping focus on the user's query. "
@@ -40,46 +126,199 @@ def _build_prompt(papers: list[dict], query: str) -> str:
     return "\n".join(lines)
 
 
-def synthesizer_node(state: ResearchState) -> dict:
-    papers = state.get("all_papers") or []
-    query_id = state.get("query_id", "unknown")
+def _llm(model: str = _MODEL):
+    return clients.chat_anthropic(model=model, temperature=0)
+
+
+async def _complete(
+    state: ResearchState,
+    node_name: str,
+    model: str,
+    system: list[dict],
+    prompt: str,
+    output_tokens: int,
+    stream: bool = False,
+) -> str:
+    """One Claude call through the breaker and rate governor, costed under
+    node_name. Only the final synthesis streams to SSE clients, and it is not
+    hedged: a duplicate would interleave a second copy into the stream."""
+    llm = _llm(model)
+    messages = [SystemMessage(content=system), HumanMessage(content=prompt)]
+    config = None if stream else {"tags": [TAG_NOSTREAM]}
+    prompt_tokens = estimate_tokens(model, *(b["text"] for b in system), prompt)
+
+    t0 = time.time()
+    response = await governor.call(
+        model,
+        lambda: resilience.call(
+            "anthropic",
+            lambda: llm.ainvoke(messages, config=config),
+            hedge=False if stream else None,
+            deadline_s=call_deadline(state, "anthropic"),
+            on_hedge_cancelled=lambda: cost_tracker.track_cancelled_hedge(
+                node_name, model, prompt_tokens
+            ),
+        ),
+        prompt_tokens + output_tokens,
+    )
+    latency_ms = (time.time() - t0) * 1000
 
-    # Embed & store in Pinecone (best-effort)
+    usage = response.usage_metadata or {}
+    cache_read, cache_write = cache_usage(usage)
+    cost_tracker.track_call(
+        node_name=node_name,
+        model=model,
+        input_tokens=usage.get("input_tokens", 0),
+        output_tokens=usage.get("output_tokens", 0),
+        latency_ms=latency_ms,
+        cache_read_tokens=cache_read,
+        cache_write_tokens=cache_write,
+    )
+    return response.content
+
+
+async def _chunks(papers: list[dict]) -> list[list[dict]]:
+    """Topical chunks of at most _CHUNK_PAPERS papers. The reranker has
+    already embedded every paper, so the vectors come from the embedding
+    cache; without them the chunks follow reranked order."""
     try:
-        embed_and_upsert(papers, query_id)
+        vectors = await embed_texts_cached(
+            [paper_text(p) for p in papers], node_name="synthesizer_embed"
+        )
+        groups = topic_chunks(vectors, _CHUNK_PAPERS)
     except Exception as e:
-        logger.warning(f"[synthesizer] Pinecone upsert failed (continuing): {e}")
+        logger.warning(f"[synthesizer] Embeddings unavailable, chunking by rank: {e}")
+        groups = [
+            list(range(i, min(i + _CHUNK_PAPERS, len(papers))))
+            for i in range(0, len(papers), _CHUNK_PAPERS)
+        ]
+    return [[papers[i] for i in group] for group in groups]
+
+
+async def _map_reduce(
+    state: ResearchState, papers: list[dict], query: str, model: str
+) -> tuple[str, list[str]]:
+    """(synthesis, errors) for a paper set too large for one prompt.
+
+    Each level of the tree is a list of tasks; a merge task starts as soon
+    as the group below it has finished, so merging overlaps with the
+    remaining chunk calls and each group's summaries are released once
+    merged. A failed chunk is reported and left out, and a failed merge is
+    reported and passes its summaries up unmerged, rather than failing the
+    whole synthesis.
+    """
+    chunks = await _chunks(papers)
+    pool = asyncio.Semaphore(_MAP_CONCURRENCY)
+    errors: list[str] = []
+
+    async def summarise(i: int, chunk: list[dict]) -> Optional[str]:
+        budget = len(chunk) * (_ABSTRACT_TOKENS + 60)
+        context = _paper_list(chunk, _MAP_MODEL, budget)
+        async with pool:
+            try:
+                return await _complete(
+                    state,
+                    "synthesizer_map",
+                    _MAP_MODEL,
+                    system_blocks(context, _MAP_SYSTEM),
+                    _query_line(query) + "\nSummarise the papers above.",
+                    _MAP_OUTPUT_TOKENS,
+                )
+            except Exception as e:
+                logger.warning(f"[synthesizer] Chunk {i} failed: {e}")
+                errors.append(f"synthesizer: chunk {i} of {len(chunks)} failed: {e}")
+                return None
+
+    async def merge(group: list[asyncio.Task]) -> Optional[str]:
+        summaries = [s for s in await asyncio.gather(*group) if s]
+        if len(summaries) <= 1:
+            return summaries[0] if summaries else None
+        joined = "\n\n---\n\n".join(summaries)
+        async with pool:
+            try:
+                return await _complete(
+                    state,
+                    "synthesizer_reduce",
+                    _MAP_MODEL,
+                    system_blocks("", _REDUCE_SYSTEM),
+                    _query_line(query) + "\n" + joined,
+                    _MAP_OUTPUT_TOKENS,
+                )
+            except Exception as e:
+                # Pass the group on unmerged so the level above still has it
+                logger.warning(f"[synthesizer] Merge failed: {e}")
+                errors.append(
+                    f"synthesizer: merge of {len(summaries)} summaries failed: {e}"
+                )
+                return joined
+
+    level = [asyncio.ensure_future(summarise(i, c)) for i, c in enumerate(chunks, 1)]
+    tasks = list(level)
+    try:
+        while len(level) > _REDUCE_FAN_IN:
+            level = [
+                asyncio.ensure_future(merge(level[i : i + _REDUCE_FAN_IN]))
+                for i in range(0, len(level), _REDUCE_FAN_IN)
+            ]
+            tasks += level
+        summaries = [s for s in await asyncio.gather(*level) if s]
+    finally:
+        for task in tasks:
+            task.cancel()
+    if not summaries:
+        raise RuntimeError(f"all {len(chunks)} chunk summaries failed")
+
+    logger.info(
+        f"[synthesizer] Map-reduced {len(papers)} papers in {len(chunks)} chunks"
+    )
+    synthesis = await _complete(
+        state,
+        "synthesizer",
+        model,
+        system_blocks("", _SYSTEM),
+        _build_prompt(query, summaries),
+        _OUTPUT_TOKENS,
+        stream=True,
+    )
+    return synthesis, errors
+
+
+async def synthesizer_node(state: ResearchState) -> dict:
+    papers = state.get("all_papers") or []
 
     if not papers:
         return {"synthesis": "", "errors": ["synthesizer: no papers to synthesize"]}
 
-    original_query = state.get("original_query") or state.get("query", "")
-    prompt = _build_prompt(papers, original_query)
-    llm = ChatAnthropic(model=_MODEL, temperature=0)
+    tier = pick_tier(state, _TIERS)
+    if tier is None:
+        logger.warning("[synthesizer] Out of time — skipping")
+        return {"synthesis": "", "errors": [skipped("synthesizer", state)]}
+    notes = [] if tier is _TIERS[0] else [degraded("synthesizer", state, tier)]
 
-    t0 = time.time()
+    original_query = state.get("original_query") or state.get("query", "")
     try:
-        response = llm.invoke(
-            [
-                SystemMessage(content=_SYSTEM),
-                HumanMessage(content=prompt),
-            ]
-        )
-        latency_ms = (time.time() - t0) * 1000
-
-        usage = response.usage_metadata or {}
-        cost_tracker.track_call(
-            node_name="synthesizer",
-            model=_MODEL,
-            input_tokens=usage.get("input_tokens", 0),
-            output_tokens=usage.get("output_tokens", 0),
-            latency_ms=latency_ms,
-        )
+        if tier is _TIERS[0] and len(papers) > _MAP_REDUCE_MIN_PAPERS:
+            synthesis, errors = await _map_reduce(
+                state, papers, original_query, tier.model
+            )
+            notes += errors
+        else:
+            synthesis = await _complete(
+                state,
+                "synthesizer",
+                tier.model,
+                system_blocks(paper_context(papers, tier.model), _SYSTEM),
+                _build_prompt(original_query),
+                _OUTPUT_TOKENS,
+                stream=True,
+            )
 
-        synthesis = response.content
         logger.info(f"[synthesizer] Generated {len(synthesis)} char synthesis")
-        return {"synthesis": synthesis}
+        update = {"synthesis": synthesis}
+        if notes:
+            update["errors"] = notes
+        return update
 
     except Exception as e:
         logger.error(f"[synthesizer] Failed: {e}")
-        return {"synthesis": "", "errors": [f"synthesizer: {str(e)}"]}
+        return {"synthesis": "", "errors": notes + [f"synthesizer: {str(e)}"]}
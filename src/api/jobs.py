@@ -0,0 +1,119 @@
+import asyncio
+from typing import Callable, Optional
+
+from src.api.models import QueryResponse
+from src.api.streaming import merge_update
+from src.graph.state import release_finished_run, thread_config
+from src.storage.job_store import JobStore
+from src.utils.cost_tracker import cost_tracker
+from src.utils.logger import logger
+
+
+async def run_job(graph, store: JobStore, job: dict) -> None:
+    """Run one queued analysis, writing partial results after every node."""
+    query_id = job["query_id"]
+    request = job["request"]
+    config = thread_config(query_id)
+
+    # A job requeued after a crash continues from its last checkpoint
+    snapshot = await graph.aget_state(config)
+    if snapshot.values and snapshot.next:
+        logger.info(f"[jobs] {query_id} resuming at {list(snapshot.next)}")
+        inputs, state = None, dict(snapshot.values)
+    else:
+        inputs = {
+            "query": request["query"],
+            "original_query": request["query"],
+            "query_id": query_id,
+            "max_papers": request["max_papers"],
+            "errors": [],
+        }
+        state = dict(inputs)
+
+    try:
+        cost_tracker.start_query(query_id)
+        async for update in graph.astream(inputs, config, stream_mode="updates"):
+            for node, node_update in update.items():
+                merge_update(state, node_update or {})
+                partial = QueryResponse.from_state(query_id, state).model_dump()
+                await asyncio.to_thread(store.update_progress, query_id, node, partial)
+
+        result = QueryResponse.from_state(query_id, state).model_dump()
+        await asyncio.to_thread(store.finish, query_id, result)
+        await release_finished_run(graph, query_id, state)
+
+    except Exception as e:
+        logger.error(f"[jobs] {query_id} failed: {e}")
+        try:
+            cost_tracker.finish_query()
+        except RuntimeError:
+            pass
+        await asyncio.to_thread(store.fail, query_id, str(e))
+
+
+class JobWorkerPool:
+    """A fixed number of asyncio workers draining the JobStore queue.
+
+    `get_graph` is called per job, so the pipeline is only compiled once the
+    first job is actually claimed; `get_store` is called on start, so the
+    queue file is only opened where workers actually run.
+    """
+
+    def __init__(
+        self,
+        get_graph: Callable,
+        get_store: Callable[[], JobStore],
+        workers: int = 2,
+        poll_interval: float = 1.0,
+    ) -> None:
+        self.get_graph = get_graph
+        self.get_store = get_store
+        self.store: Optional[JobStore] = None
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.busy = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        self.store = self.get_store()
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self.store.requeue_running)
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"[jobs] Started {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers after an enqueue instead of waiting for the next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            logger.info(f"[jobs] worker {n} picked up {job['query_id']}")
+            self.busy += 1
+            try:
+                # Own task per job → own context, so each job gets its own cost report
+                await asyncio.create_task(run_job(self.get_graph(), self.store, job))
+            finally:
+                self.busy -= 1
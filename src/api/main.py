@@ -1,20 +1,84 @@
+import asyncio
+import functools
+import os
 import secrets
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from mangum import Mangum
+from fastapi.responses import StreamingResponse
 
-from src.api.models import HealthResponse, QueryRequest, QueryResponse, StatsResponse
-from src.graph.pipeline import graph
+from src.api.jobs import JobWorkerPool
+from src.api.models import (
+    HealthResponse,
+    JobRequest,
+    JobStatusResponse,
+    MetricsResponse,
+    QueryRequest,
+    QueryResponse,
+    StatsResponse,
+)
+from src.api.result_cache import (
+    ResultCache,
+    SingleFlight,
+    StreamFlight,
+    result_cache_key,
+)
+from src.api.streaming import replay_response, stream_analysis
+from src.graph.deadline import deadline_in, resume_input
+from src.graph.state import discard_run, release_finished_run, thread_config
+from src.storage.arxiv_cache import default_arxiv_cache
+from src.storage.job_store import default_job_store
+from src.storage.pinecone_store import embed_query
+from src.storage.query_cache import default_query_cache
 from src.storage.supabase_store import get_recent_queries
+from src.utils.clients import clients
 from src.utils.cost_tracker import cost_tracker
 from src.utils.logger import logger
+from src.utils.rate_governor import governor
+from src.utils.resilience import resilience
 
 load_dotenv()
 
-app = FastAPI(title="Research Synthesis Agent", version="1.0.0")
+
+def _graph():
+    """The compiled pipeline. Importing it pulls in LangGraph and every agent,
+    so it is deferred to the first request instead of paid at cold start."""
+    from src.graph.pipeline import get_graph
+
+    return get_graph()
+
+
+# The queue file is opened on first use, not at import: on Lambda only /tmp is writable
+job_pool = JobWorkerPool(
+    _graph, default_job_store, workers=int(os.getenv("JOB_WORKERS", "2"))
+)
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", "256")),
+    ttl_s=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+)
+analysis_flight = SingleFlight()
+stream_flight = StreamFlight()
+
+# Lambda and API Gateway end requests at 30 s; nodes degrade to fit this budget
+_ANALYZE_DEADLINE_S = float(os.getenv("ANALYZE_DEADLINE", "25"))
+# How long past the deadline the graph may still run before it is cut off
+_DEADLINE_GRACE_S = 2.0
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await job_pool.start()
+    yield
+    await job_pool.stop()
+    await clients.aclose()
+
+
+app = FastAPI(title="Research Synthesis Agent", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,33 +88,162 @@ app.add_middleware(
 )
 
 
+def _initial_state(request: QueryRequest, query_id: str, deadline: float) -> dict:
+    return {
+        "query": request.query,
+        "original_query": request.query,
+        "query_id": query_id,
+        "deadline": deadline,
+        "max_papers": request.max_papers,
+        "errors": [],
+    }
+
+
+async def _invoke_by_deadline(
+    graph, inputs: Any, query_id: str, deadline: Optional[float]
+) -> dict:
+    """Run the graph; if it is still going shortly after the deadline, stop it
+    and return what its last checkpoint holds instead of failing the request."""
+    config = thread_config(query_id)
+    timeout = None
+    if deadline is not None:
+        timeout = max(0.0, deadline - time.time()) + _DEADLINE_GRACE_S
+    try:
+        result = await asyncio.wait_for(graph.ainvoke(inputs, config), timeout)
+        await release_finished_run(graph, query_id, result)
+        return result
+    except asyncio.TimeoutError:
+        snapshot = await graph.aget_state(config)
+        state = dict(snapshot.values or (inputs if isinstance(inputs, dict) else {}))
+        unfinished = ", ".join(snapshot.next) or "none"
+        logger.warning(
+            f"[/analyze] query_id={query_id} deadline passed, returning partial "
+            f"results (unfinished: {unfinished})"
+        )
+        state["errors"] = (state.get("errors") or []) + [
+            f"deadline: returned partial results, unfinished nodes: {unfinished}"
+        ]
+        if not state.get("cost_report"):
+            try:
+                state["cost_report"] = cost_tracker.finish_query()
+            except RuntimeError:
+                pass
+        return state
+
+
+async def _query_embedding(query: str) -> Optional[list[float]]:
+    """Embedding of the question for the semantic cache; None if it can't be had."""
+    try:
+        return await embed_query(query)
+    except Exception as e:
+        logger.warning(f"[semantic_cache] Query embedding failed, cache skipped: {e}")
+        return None
+
+
+async def _semantic_hit(
+    request: QueryRequest, embedding: Optional[list[float]]
+) -> Optional[dict]:
+    """A stored answer to a rephrasing of this question, marked as a cache hit."""
+    if embedding is None:
+        return None
+    hit = await asyncio.to_thread(
+        default_query_cache().lookup, embedding, request.max_papers
+    )
+    if hit is None:
+        return None
+    cached, similarity = hit
+    logger.info(
+        f"[semantic_cache] hit (similarity={similarity:.3f}, "
+        f"original={cached['query_id']})"
+    )
+    return {**cached, "cache_hit": True, "cache_similarity": similarity}
+
+
+async def _semantic_lookup(
+    request: QueryRequest,
+) -> tuple[Optional[list[float]], Optional[dict]]:
+    """(embedding, cached answer) for the semantic cache. A failed lookup is
+    a miss: the pipeline answers instead."""
+    embedding = await _query_embedding(request.query)
+    try:
+        return embedding, await _semantic_hit(request, embedding)
+    except Exception as e:
+        logger.warning(f"[semantic_cache] Lookup failed, running the pipeline: {e}")
+        return embedding, None
+
+
+async def _cancel_run(run: asyncio.Task, graph, query_id: str) -> None:
+    """Stop a pipeline run that a cache hit made redundant and drop its
+    checkpoints: nobody will resume it."""
+    run.cancel()
+    await asyncio.gather(run, return_exceptions=True)
+    await discard_run(graph, query_id)
+
+
+async def _remember(
+    request: QueryRequest,
+    key: str,
+    embedding: Optional[list[float]],
+    response: QueryResponse,
+) -> None:
+    """Keep a finished answer for exact and rephrased repeats. Runs that hit
+    errors may be missing sections, so they are not served again."""
+    if response.errors:
+        return
+    result_cache.put(key, response.model_dump())
+    if embedding is not None:
+        await asyncio.to_thread(
+            default_query_cache().store,
+            request.query,
+            request.max_papers,
+            embedding,
+            response.model_dump(),
+        )
+
+
 @app.post("/analyze", response_model=QueryResponse)
 async def analyze(request: QueryRequest):
-    query_id = secrets.token_hex(4)
+    key = result_cache_key(request.query, request.max_papers)
+    cached = result_cache.get(key)
+    if cached is not None:
+        logger.info(f"[/analyze] exact cache hit (original={cached['query_id']})")
+        return QueryResponse(**{**cached, "cache_hit": True, "cache_similarity": 1.0})
+
+    # Identical requests that arrive while this one runs await the same run
+    return await analysis_flight.do(key, lambda: _run_analysis(request, key))
+
+
+async def _run_analysis(request: QueryRequest, key: str) -> QueryResponse:
+    query_id = secrets.token_hex(8)
+    deadline = deadline_in(_ANALYZE_DEADLINE_S)
     logger.info(f"[/analyze] query_id={query_id} query={request.query!r}")
 
     try:
         cost_tracker.start_query(query_id)
 
-        result = graph.invoke(
-            {
-                "query": request.query,
-                "original_query": request.query,
-                "query_id": query_id,
-                "max_papers": request.max_papers,
-                "errors": [],
-            }
+        # The lookup needs an embedding round trip: start the pipeline
+        # alongside it rather than after it, and drop the run on a hit
+        lookup = asyncio.create_task(_semantic_lookup(request))
+        graph = _graph()
+        run = asyncio.create_task(
+            _invoke_by_deadline(
+                graph, _initial_state(request, query_id, deadline), query_id, deadline
+            )
         )
+        try:
+            embedding, cached = await lookup
+            if cached is not None:
+                await _cancel_run(run, graph, query_id)
+                cost_tracker.finish_query()
+                result_cache.put(key, cached)
+                return QueryResponse(**cached)
+            result = await run
+        finally:
+            run.cancel()  # no-op once it has finished
 
-        return QueryResponse(
-            query_id=query_id,
-            papers=result.get("all_papers") or [],
-            synthesis=result.get("synthesis") or "",
-            contradictions=result.get("contradictions") or [],
-            hypotheses=result.get("hypotheses") or [],
-            cost_report=result.get("cost_report") or {},
-            errors=result.get("errors") or [],
-        )
+        response = QueryResponse.from_state(query_id, result)
+        await _remember(request, key, embedding, response)
+        return response
 
     except Exception as e:
         logger.error(f"[/analyze] Unhandled error: {e}")
@@ -58,7 +251,137 @@ async def analyze(request: QueryRequest):
             cost_tracker.finish_query()
         except RuntimeError:
             pass
-        raise HTTPException(status_code=500, detail=str(e))
+        # The run is checkpointed — the id lets the client call /resume
+        raise HTTPException(
+            status_code=500, detail=str(e), headers={"X-Query-Id": query_id}
+        )
+
+
+@app.post("/analyze/{query_id}/resume", response_model=QueryResponse)
+async def resume(query_id: str):
+    """Continue a checkpointed run from its last completed node."""
+    config = thread_config(query_id)
+    graph = _graph()
+    snapshot = await graph.aget_state(config)
+    if not snapshot.values:
+        raise HTTPException(
+            status_code=404, detail=f"No checkpointed run for query_id {query_id!r}"
+        )
+    if not snapshot.next:
+        logger.info(f"[/resume] query_id={query_id} already complete")
+        return QueryResponse.from_state(query_id, snapshot.values)
+
+    logger.info(f"[/resume] query_id={query_id} continuing at {list(snapshot.next)}")
+    try:
+        cost_tracker.start_query(query_id)
+
+        # Continue from the latest checkpoint instead of starting over, under
+        # a fresh deadline: the original one has long passed
+        inputs, deadline = resume_input(_ANALYZE_DEADLINE_S)
+        result = await _invoke_by_deadline(graph, inputs, query_id, deadline)
+
+        return QueryResponse.from_state(query_id, result)
+
+    except Exception as e:
+        logger.error(f"[/resume] Unhandled error: {e}")
+        try:
+            cost_tracker.finish_query()
+        except RuntimeError:
+            pass
+        raise HTTPException(
+            status_code=500, detail=str(e), headers={"X-Query-Id": query_id}
+        )
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(request: QueryRequest):
+    """Same pipeline as /analyze, streamed as Server-Sent Events per finished
+    node. It shares /analyze's caches: a cached answer is replayed as the same
+    events, and identical streams in flight follow one run."""
+    key = result_cache_key(request.query, request.max_papers)
+    cached = result_cache.get(key)
+    if cached is not None:
+        logger.info(
+            f"[/analyze/stream] exact cache hit (original={cached['query_id']})"
+        )
+        frames = replay_response({**cached, "cache_hit": True, "cache_similarity": 1.0})
+    else:
+        frames = stream_flight.subscribe(key, lambda: _stream_run(request, key))
+
+    return StreamingResponse(
+        frames,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_run(request: QueryRequest, key: str) -> AsyncIterator[str]:
+    query_id = secrets.token_hex(8)
+    logger.info(f"[/analyze/stream] query_id={query_id} query={request.query!r}")
+
+    cost_tracker.start_query(query_id)
+    # As in /analyze, the pipeline starts alongside the lookup; its events
+    # are held back until the lookup has missed
+    lookup = asyncio.create_task(_semantic_lookup(request))
+
+    async def remember(response: QueryResponse) -> None:
+        embedding, _ = await lookup
+        await _remember(request, key, embedding, response)
+
+    graph = _graph()
+    held: asyncio.Queue[Optional[str]] = asyncio.Queue()
+
+    async def pump() -> None:
+        try:
+            async for frame in stream_analysis(
+                graph,
+                _initial_state(request, query_id, deadline_in(_ANALYZE_DEADLINE_S)),
+                on_done=remember,
+            ):
+                held.put_nowait(frame)
+        finally:
+            held.put_nowait(None)
+
+    run = asyncio.create_task(pump())
+    try:
+        _, cached = await lookup
+        if cached is not None:
+            await _cancel_run(run, graph, query_id)
+            cost_tracker.finish_query()
+            result_cache.put(key, cached)
+            async for frame in replay_response(cached):
+                yield frame
+            return
+        while (frame := await held.get()) is not None:
+            yield frame
+        await run
+    finally:
+        run.cancel()  # no-op once it has finished
+
+
+@app.post("/jobs", response_model=JobStatusResponse, status_code=202)
+async def create_job(request: JobRequest):
+    """Enqueue an analysis and return immediately; poll GET /jobs/{query_id}."""
+    if not job_pool.running:
+        # e.g. on Lambda (no lifespan): nothing would ever pick the job up
+        raise HTTPException(
+            status_code=503, detail="No job workers are running in this deployment"
+        )
+    query_id = secrets.token_hex(8)
+    logger.info(f"[/jobs] query_id={query_id} query={request.query!r}")
+    job = await asyncio.to_thread(
+        default_job_store().enqueue, query_id, request.model_dump()
+    )
+    job_pool.notify()
+    return JobStatusResponse.from_job(job)
+
+
+@app.get("/jobs/{query_id}", response_model=JobStatusResponse)
+async def get_job(query_id: str):
+    job = await asyncio.to_thread(default_job_store().get, query_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job {query_id!r}")
+    return JobStatusResponse.from_job(job)
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -69,10 +392,29 @@ async def health():
     )
 
 
+@app.get("/metrics", response_model=MetricsResponse)
+async def metrics():
+    """Process-local counters: provider connection pools, health and rate
+    budgets, the job queue and caches."""
+    return MetricsResponse(
+        connection_pools=clients.metrics(),
+        jobs=await asyncio.to_thread(default_job_store().counts),
+        caches={
+            "arxiv": await asyncio.to_thread(default_arxiv_cache().stats),
+            "semantic": await asyncio.to_thread(default_query_cache().stats),
+            "result": result_cache.stats(),
+            "analyze_coalescing": analysis_flight.stats(),
+            "stream_coalescing": stream_flight.stats(),
+        },
+        resilience=resilience.metrics(),
+        rate_limits=governor.metrics(),
+    )
+
+
 @app.get("/stats", response_model=StatsResponse)
 async def stats():
     try:
-        rows = get_recent_queries(10)
+        rows = await get_recent_queries(10)
         if not rows:
             return StatsResponse(
                 total_queries=0,
@@ -100,5 +442,14 @@ async def stats():
         )
 
 
-# AWS Lambda handler
-handler = Mangum(app)
+@functools.lru_cache(maxsize=1)
+def _mangum():
+    from mangum import Mangum
+
+    # No lifespan on Lambda: background job workers cannot outlive an invocation
+    return Mangum(app, lifespan="off")
+
+
+def handler(event, context):
+    """AWS Lambda handler. Mangum is built on the first invocation, not at import."""
+    return _mangum()(event, context)
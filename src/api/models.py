@@ -16,6 +16,43 @@ class QueryResponse(BaseModel):
     hypotheses: list[dict]
     cost_report: dict
     errors: list[str]
+    # Set when an earlier answer to a near-identical question was returned
+    cache_hit: bool = False
+    cache_similarity: Optional[float] = None
+
+    @classmethod
+    def from_state(cls, query_id: str, state: dict) -> "QueryResponse":
+        """Build a response from a (possibly partial) ResearchState."""
+        return cls(
+            query_id=query_id,
+            papers=state.get("all_papers") or [],
+            synthesis=state.get("synthesis") or "",
+            contradictions=state.get("contradictions") or [],
+            hypotheses=state.get("hypotheses") or [],
+            cost_report=state.get("cost_report") or {},
+            errors=state.get("errors") or [],
+        )
+
+
+class JobRequest(QueryRequest):
+    # Jobs run outside the 30 s API Gateway/Lambda request window; above 20
+    # papers the synthesizer map-reduces over topical chunks
+    max_papers: int = Field(default=10, ge=4, le=300)
+
+
+class JobStatusResponse(BaseModel):
+    query_id: str
+    status: str
+    current_node: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @classmethod
+    def from_job(cls, job: dict) -> "JobStatusResponse":
+        return cls(**{k: v for k, v in job.items() if k in cls.model_fields})
 
 
 class HealthResponse(BaseModel):
@@ -30,3 +67,11 @@ class StatsResponse(BaseModel):
     avg_papers: float
     recent_queries: list[dict]
     error: Optional[str] = None
+
+
+class MetricsResponse(BaseModel):
+    connection_pools: dict[str, dict]
+    jobs: dict[str, int]
+    caches: dict[str, dict]
+    resilience: dict[str, dict]
+    rate_limits: dict[str, dict]
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from src.storage.arxiv_cache import normalize_query
+from src.utils.logger import logger
+
+
+def result_cache_key(query: str, max_papers: int) -> str:
+    return f"{normalize_query(query)}|{max_papers}"
+
+
+class ResultCache:
+    """In-process LRU of finished /analyze responses, keyed by normalised request."""
+
+    def __init__(self, max_entries: int = 256, ttl_s: float = 3600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_s:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, response: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work as its own task; everyone who
+    arrives before it finishes awaits that task and gets the same result or
+    exception. A caller that disconnects does not cancel the shared work.
+    """
+
+    def __init__(self) -> None:
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+            logger.info(f"[single_flight] Joined in-flight run for {key!r}")
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
+
+
+class _Broadcast:
+    """Frames of one producer, kept so that late subscribers replay them."""
+
+    def __init__(self) -> None:
+        self.frames: list[str] = []
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    async def run(self, frames: AsyncIterator[str]) -> None:
+        try:
+            async for frame in frames:
+                async with self._changed:
+                    self.frames.append(frame)
+                    self._changed.notify_all()
+        finally:
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    async def follow(self) -> AsyncIterator[str]:
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: sent < len(self.frames) or self.done
+                )
+                batch, finished = self.frames[sent:], self.done
+            sent += len(batch)
+            for frame in batch:
+                yield frame
+            if finished:
+                return
+
+
+class StreamFlight:
+    """Coalesce concurrent identical event streams onto one producer.
+
+    The first subscriber for a key starts the producer as its own task;
+    everyone who arrives before it finishes first replays the frames sent so
+    far, then follows live. A subscriber that disconnects does not stop the
+    shared producer.
+    """
+
+    def __init__(self) -> None:
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: dict[str, _Broadcast] = {}
+
+    async def subscribe(
+        self, key: str, produce: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        broadcast = self._in_flight.get(key)
+        if broadcast is None:
+            self.executions += 1
+            broadcast = _Broadcast()
+            self._in_flight[key] = broadcast
+            # Held on the broadcast: the loop keeps only weak references to tasks
+            broadcast.task = asyncio.create_task(
+                self._produce(key, broadcast, produce())
+            )
+        else:
+            self.coalesced += 1
+            logger.info(f"[single_flight] Joined in-flight stream for {key!r}")
+        async for frame in broadcast.follow():
+            yield frame
+
+    async def _produce(
+        self, key: str, broadcast: _Broadcast, frames: AsyncIterator[str]
+    ) -> None:
+        try:
+            await broadcast.run(frames)
+        finally:
+            if self._in_flight.get(key) is broadcast:
+                del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
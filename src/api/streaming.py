@@ -0,0 +1,113 @@
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from src.api.models import QueryResponse
+from src.graph.state import release_finished_run, thread_config
+from src.utils.cost_tracker import cost_tracker
+from src.utils.logger import logger
+
+# Node whose LLM tokens are forwarded to the client as they are generated
+_TOKEN_NODE = "synthesizer"
+
+# Node → (SSE event name, ResearchState key) for each section the client renders
+_SECTION_EVENTS = {
+    "reranker": ("papers", "all_papers"),
+    "synthesizer": ("synthesis", "synthesis"),
+    "contradiction_detector": ("contradictions", "contradictions"),
+    "hypothesis_generator": ("hypotheses", "hypotheses"),
+    "cost_auditor": ("cost_report", "cost_report"),
+}
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Serialise one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _chunk_text(content) -> str:
+    """Extract text from a message chunk (plain string or Anthropic content blocks)."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "")
+        for block in content
+        if isinstance(block, dict) and block.get("type") == "text"
+    )
+
+
+def merge_update(state: dict, update: dict) -> None:
+    """Apply one node's update to an accumulated state (errors are appended)."""
+    for key, value in update.items():
+        if key == "errors":
+            state["errors"] = (state.get("errors") or []) + (value or [])
+        else:
+            state[key] = value
+
+
+async def stream_analysis(
+    graph,
+    initial_state: dict,
+    on_done: Optional[Callable[[QueryResponse], Awaitable[None]]] = None,
+) -> AsyncIterator[str]:
+    """Run the graph and yield an SSE frame as each node finishes. The caller
+    starts the query's cost report; on_done sees the finished response before
+    the done event is sent.
+
+    Events, in the order they typically arrive: started, stage (one per node),
+    papers, synthesis_token (many), synthesis, contradictions, hypotheses,
+    cost_report, then done with the full QueryResponse — or error.
+    """
+    query_id = initial_state["query_id"]
+    state = dict(initial_state)
+    t0 = time.time()
+
+    yield format_sse("started", {"query_id": query_id})
+
+    try:
+        async for mode, chunk in graph.astream(
+            initial_state,
+            thread_config(query_id),
+            stream_mode=["updates", "messages"],
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if metadata.get("langgraph_node") == _TOKEN_NODE:
+                    text = _chunk_text(message.content)
+                    if text:
+                        yield format_sse("synthesis_token", {"text": text})
+                continue
+
+            for node, update in chunk.items():
+                update = update or {}
+                merge_update(state, update)
+                yield format_sse(
+                    "stage",
+                    {"node": node, "elapsed_ms": round((time.time() - t0) * 1000)},
+                )
+                if node in _SECTION_EVENTS:
+                    event, key = _SECTION_EVENTS[node]
+                    yield format_sse(event, {event: update.get(key)})
+
+        await release_finished_run(graph, query_id, state)
+        response = QueryResponse.from_state(query_id, state)
+        if on_done is not None:
+            await on_done(response)
+        yield format_sse("done", response.model_dump())
+
+    except Exception as e:
+        logger.error(f"[/analyze/stream] Unhandled error: {e}")
+        try:
+            cost_tracker.finish_query()
+        except RuntimeError:
+            pass
+        yield format_sse("error", {"query_id": query_id, "detail": str(e)})
+
+
+async def replay_response(response: dict) -> AsyncIterator[str]:
+    """A finished QueryResponse (e.g. a cached one) as the events a live run
+    would have sent, so clients render it exactly like a fresh analysis."""
+    yield format_sse("started", {"query_id": response["query_id"]})
+    for event, _ in _SECTION_EVENTS.values():
+        yield format_sse(event, {event: response.get(event)})
+    yield format_sse("done", response)
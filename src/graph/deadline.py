@@ -0,0 +1,73 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from src.utils.resilience import resilience
+
+
+@dataclass(frozen=True)
+class Tier:
+    """One way to run a node: used while at least min_s seconds remain."""
+
+    min_s: float
+    model: str
+    max_papers: Optional[int] = None
+
+
+def deadline_in(seconds: float) -> float:
+    """Absolute deadline for a run, stored in the state as epoch seconds so it
+    survives checkpointing."""
+    return time.time() + seconds
+
+
+def remaining_s(state: dict) -> Optional[float]:
+    """Seconds left before the run's deadline; None when it has none."""
+    deadline = state.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def call_deadline(state: dict, provider: str) -> float:
+    """A provider call's own deadline, cut down to what is left of the run's."""
+    budget = resilience.deadline_for(provider)
+    left = remaining_s(state)
+    if left is None:
+        return budget
+    return max(0.1, min(budget, left))
+
+
+def pick_tier(state: dict, tiers: Sequence[Tier]) -> Optional[Tier]:
+    """The first (most capable) tier the remaining budget allows, or None if
+    even the last one doesn't fit. Runs without a deadline get the first."""
+    left = remaining_s(state)
+    if left is None:
+        return tiers[0]
+    return next((tier for tier in tiers if left >= tier.min_s), None)
+
+
+def skipped(node: str, state: dict) -> str:
+    return f"{node}: skipped, {max(0.0, remaining_s(state) or 0.0):.1f}s left before deadline"
+
+
+def degraded(node: str, state: dict, tier: Tier) -> str:
+    papers = f" on {tier.max_papers} papers" if tier.max_papers else ""
+    return (
+        f"{node}: degraded to {tier.model}{papers}, "
+        f"{max(0.0, remaining_s(state) or 0.0):.1f}s left before deadline"
+    )
+
+
+def resume_input(seconds: float) -> tuple[Any, float]:
+    """Input that continues a checkpointed run under a new deadline, and that
+    deadline.
+
+    The deadline is sent as a Command update, which is stored against the
+    latest checkpoint and applied when the run picks up, rather than written
+    as a new checkpoint. Branches of an interrupted parallel step that had
+    already finished keep their writes, and only the unfinished ones run again.
+    """
+    from langgraph.types import Command
+
+    deadline = deadline_in(seconds)
+    return Command(update={"deadline": deadline}), deadline
@@ -0,0 +1,155 @@
+import asyncio
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Protocol
+
+import xxhash
+
+from src.utils.cost_tracker import cost_tracker
+from src.utils.logger import logger
+
+DEFAULT_NODE_MEMO_DB = "data/node_memo.sqlite"
+
+
+@dataclass(frozen=True)
+class NodeMemo:
+    """What a node's output depends on, and how long to trust a stored output."""
+
+    reads: tuple[str, ...]
+    ttl_s: float = 86400.0
+    # Sampled at temperature > 0: replaying would freeze one sample, so opt-in only
+    stochastic: bool = False
+
+
+class MemoBackend(Protocol):
+    def get(self, key: str, ttl_s: float) -> Optional[dict]: ...
+
+    def set(self, key: str, node: str, value: dict) -> None: ...
+
+
+class LRUMemoBackend:
+    """Process-local memo store, bounded to max_entries."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, ttl_s: float) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > ttl_s:
+                return None
+            self._entries.move_to_end(key)
+        return json.loads(entry[1])
+
+    def set(self, key: str, node: str, value: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), json.dumps(value, default=str))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteMemoBackend:
+    """Memo store in a local SQLite file, shared by runs and restarts."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS node_memo (key TEXT PRIMARY KEY, "
+                "node TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str, ttl_s: float) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM node_memo WHERE key = ? AND created_at > ?",
+                (key, time.time() - ttl_s),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, node: str, value: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO node_memo VALUES (?, ?, ?, ?)",
+                (key, node, json.dumps(value, default=str), time.time()),
+            )
+            self._conn.commit()
+
+
+def default_memo_backend() -> Optional[MemoBackend]:
+    """Backend chosen by NODE_MEMO: "sqlite" (default), "memory" or "off"."""
+    kind = os.getenv("NODE_MEMO", "sqlite").lower()
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return LRUMemoBackend(int(os.getenv("NODE_MEMO_SIZE", "1024")))
+    return SQLiteMemoBackend(os.getenv("NODE_MEMO_DB", DEFAULT_NODE_MEMO_DB))
+
+
+@functools.lru_cache(maxsize=None)
+def _code_version(fn: Callable) -> str:
+    """Hash of the node's module source, so editing a node invalidates its entries."""
+    try:
+        source = inspect.getsource(inspect.getmodule(fn) or fn)
+    except (OSError, TypeError):
+        source = fn.__qualname__
+    return xxhash.xxh3_64_hexdigest(source)
+
+
+def memo_key(node: str, fn: Callable, state: dict, reads: tuple[str, ...]) -> str:
+    inputs = json.dumps({k: state.get(k) for k in reads}, sort_keys=True, default=str)
+    return xxhash.xxh3_128_hexdigest(f"{node}\0{_code_version(fn)}\0{inputs}")
+
+
+def _record(node: str, hit: bool) -> None:
+    cost_tracker.track_cache(f"node:{node}", hits=int(hit), misses=int(not hit))
+
+
+def memoize_node(
+    node: str,
+    fn: Callable,
+    memo: NodeMemo,
+    backend: MemoBackend,
+    include_stochastic: bool = False,
+) -> Callable:
+    """Wrap a graph node so that, for the same values of memo.reads, it replays
+    its stored partial-state update instead of running. Updates carrying
+    errors are never stored."""
+    if memo.stochastic and not include_stochastic:
+        return fn
+
+    @functools.wraps(fn)
+    async def wrapper(state: dict) -> dict:
+        key = memo_key(node, fn, state, memo.reads)
+        cached = await asyncio.to_thread(backend.get, key, memo.ttl_s)
+        if cached is not None:
+            logger.info(f"[memo] {node} replayed from cache")
+            _record(node, hit=True)
+            return cached
+
+        update = fn(state)
+        if inspect.isawaitable(update):
+            update = await update
+        _record(node, hit=False)
+        if update and not update.get("errors"):
+            await asyncio.to_thread(backend.set, key, node, update)
+        return update
+
+    return wrapper
@@ -1,36 +1,94 @@
+import os
+from functools import lru_cache
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, START, StateGraph
 
 from src.agents.contradiction import contradiction_node
 from src.agents.cost_auditor import cost_auditor_node
 from src.agents.deduplicator import deduplicator_node
-from src.agents.fetchers import arxiv_fetcher
+from src.agents.fetchers import arxiv_fetcher, semantic_scholar_fetcher
 from src.agents.hypothesis import hypothesis_node
+from src.agents.indexer import indexer_node
+from src.agents.reranker import reranker_node
 from src.agents.router import router_node
 from src.agents.synthesizer import synthesizer_node
+from src.graph.checkpoint import default_checkpointer
+from src.graph.memo import MemoBackend, NodeMemo, default_memo_backend, memoize_node
 from src.graph.state import ResearchState
 
+_DAY = 86400.0
+
+# State keys each pure node reads. Fetching, dedup, indexing and the cost audit
+# are left out: they have side effects or are cached closer to the source.
+_NODE_MEMO = {
+    "router": NodeMemo(reads=("query",), ttl_s=7 * _DAY),
+    "synthesizer": NodeMemo(reads=("all_papers", "original_query", "query")),
+    "contradiction_detector": NodeMemo(reads=("all_papers",)),
+    "hypothesis_generator": NodeMemo(
+        reads=("all_papers", "synthesis", "contradictions"), stochastic=True
+    ),
+}
 
-def build_graph():
+
+def build_graph(
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    memo_backend: Optional[MemoBackend] = None,
+):
+    """Compile the pipeline. Runs are checkpointed after every superstep
+    (local SQLite unless another saver is passed) so they can be resumed.
+    Pure nodes are memoized on the state they read (see NODE_MEMO)."""
     builder = StateGraph(ResearchState)
+    backend = memo_backend if memo_backend is not None else default_memo_backend()
+    include_stochastic = os.getenv("NODE_MEMO_STOCHASTIC", "0") == "1"
+
+    def add_node(name, fn):
+        if backend is not None and name in _NODE_MEMO:
+            fn = memoize_node(name, fn, _NODE_MEMO[name], backend, include_stochastic)
+        builder.add_node(name, fn)
 
-    builder.add_node("router", router_node)
-    builder.add_node("arxiv_fetcher", arxiv_fetcher)
-    builder.add_node("deduplicator", deduplicator_node)
-    builder.add_node("synthesizer", synthesizer_node)
-    builder.add_node("contradiction_detector", contradiction_node)
-    builder.add_node("hypothesis_generator", hypothesis_node)
-    builder.add_node("cost_auditor", cost_auditor_node)
+    add_node("router", router_node)
+    add_node("arxiv_fetcher", arxiv_fetcher)
+    add_node("semantic_scholar_fetcher", semantic_scholar_fetcher)
+    add_node("deduplicator", deduplicator_node)
+    add_node("reranker", reranker_node)
+    add_node("synthesizer", synthesizer_node)
+    add_node("contradiction_detector", contradiction_node)
+    add_node("hypothesis_generator", hypothesis_node)
+    add_node("pinecone_indexer", indexer_node)
+    add_node("cost_auditor", cost_auditor_node)
 
     builder.add_edge(START, "router")
+    # Both sources are searched in parallel; dedup merges them once both return
     builder.add_edge("router", "arxiv_fetcher")
-    builder.add_edge("arxiv_fetcher", "deduplicator")
-    builder.add_edge("deduplicator", "synthesizer")
-    builder.add_edge("synthesizer", "contradiction_detector")
-    builder.add_edge("contradiction_detector", "hypothesis_generator")
-    builder.add_edge("hypothesis_generator", "cost_auditor")
+    builder.add_edge("router", "semantic_scholar_fetcher")
+    builder.add_edge(["arxiv_fetcher", "semantic_scholar_fetcher"], "deduplicator")
+    # The fetcher over-fetches; the reranker keeps the max_papers most relevant
+    builder.add_edge("deduplicator", "reranker")
+
+    # Fan out: synthesis, contradiction detection and indexing only need all_papers
+    builder.add_edge("reranker", "synthesizer")
+    builder.add_edge("reranker", "contradiction_detector")
+    builder.add_edge("reranker", "pinecone_indexer")
+
+    # Join: hypotheses need both the synthesis and the contradictions
+    builder.add_edge(["synthesizer", "contradiction_detector"], "hypothesis_generator")
+    # Indexing stays off the critical path; it only has to finish before costs are audited
+    builder.add_edge(["hypothesis_generator", "pinecone_indexer"], "cost_auditor")
     builder.add_edge("cost_auditor", END)
 
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer or default_checkpointer())
+
+
+@lru_cache(maxsize=1)
+def get_graph():
+    """The process-wide compiled pipeline, built on first use rather than at import."""
+    return build_graph()
 
 
-graph = build_graph()
+def __getattr__(name: str):
+    # `from src.graph.pipeline import graph` keeps working, but compiles lazily
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,17 +2,47 @@ import operator
 from typing import Annotated
 from typing_extensions import TypedDict
 
+from src.utils.logger import logger
+
 
 class ResearchState(TypedDict, total=False):
     query: str
     original_query: str
     query_id: str
+    # Epoch seconds by which the response must be returned (absent = no limit)
+    deadline: float
     max_papers: int
     routing_decision: str
+    keywords: list
     arxiv_papers: list
+    semantic_scholar_papers: list
     all_papers: list
     synthesis: str
     contradictions: list
     hypotheses: list
     cost_report: dict
     errors: Annotated[list, operator.add]
+
+
+def thread_config(query_id: str) -> dict:
+    """Graph config that checkpoints a run under its query_id."""
+    return {"configurable": {"thread_id": query_id}}
+
+
+async def release_finished_run(graph, thread_id: str, result: dict) -> None:
+    """Delete a run's checkpoints once it has reached the end without errors:
+    there is nothing left to resume. Runs with errors are kept for /resume
+    until the TTL sweep removes them."""
+    if not result.get("errors"):
+        await discard_run(graph, thread_id)
+
+
+async def discard_run(graph, thread_id: str) -> None:
+    """Delete a run's checkpoints, e.g. of a run cancelled as redundant."""
+    checkpointer = getattr(graph, "checkpointer", None)
+    if checkpointer is None:
+        return
+    try:
+        await checkpointer.adelete_thread(thread_id)
+    except Exception as e:
+        logger.warning(f"[checkpoint] Could not delete thread {thread_id}: {e}")
@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from src.utils.logger import logger
+
+DEFAULT_ARXIV_CACHE_DB = "data/arxiv_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS arxiv_cache (
+    key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    max_results INTEGER NOT NULL,
+    papers TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_hit_at REAL
+);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search string."""
+    return " ".join(query.lower().split())
+
+
+def _key(query: str, max_results: int) -> str:
+    return f"{normalize_query(query)}|{max_results}"
+
+
+class ArxivCache:
+    """Persistent (query, max_results) → paper list cache for the arXiv fetcher.
+
+    Entries are never deleted on expiry: the fetcher decides whether an entry
+    is fresh, stale-but-servable (refreshed in the background) or too old,
+    based on the age returned by get().
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def get(self, query: str, max_results: int) -> Optional[tuple[list[dict], float]]:
+        """(papers, age in seconds) and a recorded hit, or None if never fetched."""
+        key = _key(query, max_results)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT papers, fetched_at FROM arxiv_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE arxiv_cache SET hits = hits + 1, last_hit_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+        return json.loads(row[0]), now - row[1]
+
+    def put(self, query: str, max_results: int, papers: list[dict]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO arxiv_cache (key, query, max_results, papers, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "papers = excluded.papers, fetched_at = excluded.fetched_at",
+                (
+                    _key(query, max_results),
+                    normalize_query(query),
+                    max_results,
+                    json.dumps(papers),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+        logger.info(f"[arxiv_cache] Stored {len(papers)} papers for {query!r}")
+
+    def entry_stats(self, query: str, max_results: int) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hits, fetched_at, last_hit_at FROM arxiv_cache WHERE key = ?",
+                (_key(query, max_results),),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"hits": row[0], "fetched_at": row[1], "last_hit_at": row[2]}
+
+    def stats(self, top: int = 5) -> dict:
+        """Entry count, total hits and the most-hit queries."""
+        with self._lock:
+            entries, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM arxiv_cache"
+            ).fetchone()
+            rows = self._conn.execute(
+                "SELECT query, max_results, hits FROM arxiv_cache "
+                "ORDER BY hits DESC LIMIT ?",
+                (top,),
+            ).fetchall()
+        return {
+            "entries": entries,
+            "hits": hits,
+            "top_queries": [
+                {"query": q, "max_results": n, "hits": h} for q, n, h in rows
+            ],
+        }
+
+
+@lru_cache(maxsize=1)
+def default_arxiv_cache() -> ArxivCache:
+    return ArxivCache(os.getenv("ARXIV_CACHE_DB", DEFAULT_ARXIV_CACHE_DB))
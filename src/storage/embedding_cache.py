@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import xxhash
+
+from src.utils.logger import logger
+
+DEFAULT_EMBEDDING_CACHE_DB = "data/embeddings.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    dims INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER on older builds (999)
+_BATCH = 500
+
+
+def cache_key(model: str, text: str) -> str:
+    """Content address of one embedding: xxh3-128 of model name + text."""
+    return xxhash.xxh3_128_hexdigest(f"{model}\0{text}".encode("utf-8"))
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: an in-memory LRU in front of a SQLite file.
+
+    Vectors are stored as float32 blobs alongside the number of input tokens
+    they cost to compute, so a hit can be reported as tokens saved. Entries are
+    content-addressed, so the same paper text is embedded once across queries.
+    """
+
+    def __init__(self, path: str, max_memory_entries: int = 10_000) -> None:
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self._memory: OrderedDict[str, tuple[np.ndarray, int]] = OrderedDict()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def _remember(self, key: str, entry: tuple[np.ndarray, int]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(
+        self, model: str, texts: list[str]
+    ) -> list[Optional[tuple[list[float], int]]]:
+        """(vector, tokens) per text, or None where the text has not been embedded."""
+        keys = [cache_key(model, t) for t in texts]
+        found: dict[str, tuple[np.ndarray, int]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+            missing = [k for k in dict.fromkeys(keys) if k not in found]
+            for i in range(0, len(missing), _BATCH):
+                chunk = missing[i : i + _BATCH]
+                rows = self._conn.execute(
+                    "SELECT key, vector, tokens FROM embeddings WHERE key IN "
+                    f"({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob, tokens in rows:
+                    entry = (np.frombuffer(blob, dtype=np.float32), tokens)
+                    found[key] = entry
+                    self._remember(key, entry)
+
+        return [
+            (found[k][0].tolist(), found[k][1]) if k in found else None for k in keys
+        ]
+
+    def put_many(
+        self,
+        model: str,
+        texts: list[str],
+        vectors: list[list[float]],
+        tokens: list[int],
+    ) -> None:
+        rows = []
+        with self._lock:
+            for text, vector, n_tokens in zip(texts, vectors, tokens):
+                key = cache_key(model, text)
+                array = np.asarray(vector, dtype=np.float32)
+                self._remember(key, (array, n_tokens))
+                rows.append(
+                    (key, model, array.size, array.tobytes(), n_tokens, time.time())
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+        logger.info(f"[embedding_cache] Stored {len(rows)} embeddings")
+
+
+def split_tokens(total_tokens: int, texts: list[str]) -> list[int]:
+    """Apportion a batch's billed token count over its texts by length.
+
+    The embeddings API only reports usage for the whole batch; this is what a
+    later cache hit on each text is credited as having saved.
+    """
+    lengths = [max(1, len(t)) for t in texts]
+    total_length = sum(lengths)
+    shares = [total_tokens * n // total_length for n in lengths]
+    if shares:
+        shares[-1] += total_tokens - sum(shares)
+    return shares
+
+
+@lru_cache(maxsize=1)
+def default_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(
+        os.getenv("EMBEDDING_CACHE_DB", DEFAULT_EMBEDDING_CACHE_DB),
+        max_memory_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+    )
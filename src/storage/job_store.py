@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+from src.utils.logger import logger
+
+DEFAULT_JOB_DB = "data/jobs.sqlite"
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    query_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    current_node TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created_idx ON jobs (status, created_at);
+"""
+
+_COLUMNS = (
+    "query_id",
+    "status",
+    "request",
+    "result",
+    "error",
+    "current_node",
+    "attempts",
+    "created_at",
+    "started_at",
+    "finished_at",
+)
+
+
+class JobStore:
+    """Durable FIFO job queue in a local SQLite file.
+
+    Claiming a job is a single BEGIN IMMEDIATE transaction, so several worker
+    processes can share one file without handing out the same job twice.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _row(self, row: Optional[tuple]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, query_id: str, request: dict) -> dict:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (query_id, status, request, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (query_id, QUEUED, json.dumps(request), time.time()),
+            )
+        logger.info(f"[job_store] Enqueued job {query_id}")
+        return self.get(query_id)
+
+    def claim(self) -> Optional[dict]:
+        """Atomically move the oldest queued job to running and return it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT query_id FROM jobs WHERE status = ? "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 "
+                    "WHERE query_id = ?",
+                    (RUNNING, time.time(), row[0]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row[0])
+
+    def update_progress(self, query_id: str, node: str, result: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET current_node = ?, result = ? WHERE query_id = ?",
+                (node, json.dumps(result, default=str), query_id),
+            )
+
+    def finish(self, query_id: str, result: dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? "
+                "WHERE query_id = ?",
+                (SUCCEEDED, json.dumps(result, default=str), time.time(), query_id),
+            )
+        logger.info(f"[job_store] Job {query_id} succeeded")
+
+    def fail(self, query_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE query_id = ?",
+                (FAILED, error, time.time(), query_id),
+            )
+        logger.warning(f"[job_store] Job {query_id} failed: {error}")
+
+    def requeue_running(self) -> int:
+        """Return jobs left running by a dead process to the queue."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING)
+            )
+        if cursor.rowcount:
+            logger.info(f"[job_store] Requeued {cursor.rowcount} interrupted jobs")
+        return cursor.rowcount
+
+    def get(self, query_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE query_id = ?",
+                (query_id,),
+            ).fetchone()
+        return self._row(row)
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {status: n for status, n in rows}
+
+
+@lru_cache(maxsize=1)
+def default_job_store() -> JobStore:
+    return JobStore(os.getenv("JOB_DB", DEFAULT_JOB_DB))
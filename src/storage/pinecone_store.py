@@ -1,48 +1,99 @@
-import os
+import asyncio
 import time
 
-from openai import OpenAI
-from pinecone import Pinecone
-
+from src.storage.embedding_cache import default_embedding_cache, split_tokens
+from src.utils.clients import clients
 from src.utils.cost_tracker import cost_tracker
 from src.utils.logger import logger
+from src.utils.rate_governor import estimate_tokens, governor
+from src.utils.resilience import resilience
 
-
-def _get_index():
-    pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
-    return pc.Index(os.environ["PINECONE_INDEX"])
+_EMBED_MODEL = "text-embedding-3-small"
 
 
-def _embed_texts(texts: list[str]) -> tuple[list[list[float]], int]:
+async def _embed_texts(
+    texts: list[str], node_name: str = "pinecone_embed"
+) -> tuple[list[list[float]], int]:
     """Returns (embeddings, total_tokens)."""
-    client = OpenAI()
-    response = client.embeddings.create(
-        input=texts,
-        model="text-embedding-3-small",
+    tokens = estimate_tokens(_EMBED_MODEL, *texts)
+    response = await governor.call(
+        _EMBED_MODEL,
+        lambda: resilience.call(
+            "openai",
+            lambda: clients.openai().embeddings.create(input=texts, model=_EMBED_MODEL),
+            on_hedge_cancelled=lambda: cost_tracker.track_cancelled_hedge(
+                node_name, _EMBED_MODEL, tokens
+            ),
+        ),
+        tokens,
     )
     embeddings = [item.embedding for item in response.data]
     total_tokens = response.usage.total_tokens
     return embeddings, total_tokens
 
 
-def embed_and_upsert(papers: list[dict], query_id: str) -> int:
+def paper_text(paper: dict) -> str:
+    """The text a paper is embedded (and reranked) by."""
+    return f"{paper.get('title', '')}. {paper.get('abstract', '')[:500]}"
+
+
+async def embed_texts_cached(
+    texts: list[str], node_name: str = "pinecone_embed"
+) -> list[list[float]]:
+    """Embed texts, sending only cache misses to the API. Costs and cache
+    hits are recorded against the active query."""
+    cache = default_embedding_cache()
+    cached = await asyncio.to_thread(cache.get_many, _EMBED_MODEL, texts)
+    embeddings = [hit[0] if hit else None for hit in cached]
+    misses = [i for i, hit in enumerate(cached) if hit is None]
+
+    if misses:
+        miss_texts = [texts[i] for i in misses]
+        t0 = time.time()
+        fresh, total_tokens = await _embed_texts(miss_texts, node_name)
+        latency_ms = (time.time() - t0) * 1000
+
+        cost_tracker.track_call(
+            node_name=node_name,
+            model=_EMBED_MODEL,
+            input_tokens=total_tokens,
+            output_tokens=0,
+            latency_ms=latency_ms,
+        )
+        for i, vector in zip(misses, fresh):
+            embeddings[i] = vector
+        await asyncio.to_thread(
+            cache.put_many,
+            _EMBED_MODEL,
+            miss_texts,
+            fresh,
+            split_tokens(total_tokens, miss_texts),
+        )
+
+    cost_tracker.track_cache(
+        "embeddings",
+        model=_EMBED_MODEL,
+        hits=len(texts) - len(misses),
+        misses=len(misses),
+        tokens_saved=sum(hit[1] for hit in cached if hit),
+    )
+    return embeddings
+
+
+async def embed_query(text: str) -> list[float]:
+    """Embed one query string (through the embedding cache)."""
+    [embedding] = await embed_texts_cached([text], node_name="query_embed")
+    return embedding
+
+
+async def embed_and_upsert(papers: list[dict], query_id: str) -> int:
     """Embed papers and upsert into Pinecone. Returns number of vectors upserted."""
     if not papers:
         return 0
 
-    texts = [f"{p['title']}. {p['abstract'][:500]}" for p in papers]
+    texts = [paper_text(p) for p in papers]
 
-    t0 = time.time()
-    embeddings, total_tokens = _embed_texts(texts)
-    latency_ms = (time.time() - t0) * 1000
-
-    cost_tracker.track_call(
-        node_name="pinecone_embed",
-        model="text-embedding-3-small",
-        input_tokens=total_tokens,
-        output_tokens=0,
-        latency_ms=latency_ms,
-    )
+    embeddings = await embed_texts_cached(texts)
 
     vectors = [
         {
@@ -59,8 +110,13 @@ def embed_and_upsert(papers: list[dict], query_id: str) -> int:
         for i in range(len(papers))
     ]
 
-    index = _get_index()
-    index.upsert(vectors=vectors, namespace=query_id)
+    # The shared index client is blocking (pooled urllib3) — keep it off the loop
+    index = await asyncio.to_thread(clients.pinecone_index)
+    # Upserts are keyed by paper id, so a hedged duplicate is harmless
+    await resilience.call(
+        "pinecone",
+        lambda: asyncio.to_thread(index.upsert, vectors=vectors, namespace=query_id),
+    )
 
     logger.info(
         f"[pinecone_store] Upserted {len(vectors)} vectors (namespace={query_id})"
@@ -68,14 +124,18 @@ def embed_and_upsert(papers: list[dict], query_id: str) -> int:
     return len(vectors)
 
 
-def query_similar(query_text: str, query_id: str, top_k: int = 10) -> list[dict]:
+async def query_similar(query_text: str, query_id: str, top_k: int = 10) -> list[dict]:
     """Query Pinecone for similar papers. Returns list of metadata dicts."""
-    embeddings, _ = _embed_texts([query_text])
-    index = _get_index()
-    result = index.query(
-        vector=embeddings[0],
-        top_k=top_k,
-        include_metadata=True,
-        namespace=query_id,
+    embeddings, _ = await _embed_texts([query_text])
+    index = await asyncio.to_thread(clients.pinecone_index)
+    result = await resilience.call(
+        "pinecone",
+        lambda: asyncio.to_thread(
+            index.query,
+            vector=embeddings[0],
+            top_k=top_k,
+            include_metadata=True,
+            namespace=query_id,
+        ),
     )
     return [match.metadata for match in result.matches]
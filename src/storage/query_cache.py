@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from src.utils.logger import logger
+
+DEFAULT_QUERY_CACHE_DB = "data/query_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    max_papers INTEGER NOT NULL,
+    embedding BLOB NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _unit(vector) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+class SemanticQueryCache:
+    """Finished QueryResponses indexed by the embedding of the question asked.
+
+    All live entries are held as one L2-normalised float32 matrix, so a lookup
+    is a single matrix-vector product; the closest entry with the same
+    max_papers is returned if its cosine similarity clears the threshold.
+    SQLite keeps entries across restarts. Entries expire after ttl_s and the
+    least recently used are evicted beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+        ttl_s: float = 86400.0,
+    ) -> None:
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+            self._load()
+
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            "SELECT id, max_papers, embedding, created_at, last_used_at "
+            "FROM query_cache ORDER BY id"
+        ).fetchall()
+        self._ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self._max_papers = np.array([r[1] for r in rows], dtype=np.int64)
+        self._created = np.array([r[3] for r in rows], dtype=np.float64)
+        self._last_used = np.array([r[4] for r in rows], dtype=np.float64)
+        self._matrix = (
+            np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+            if rows
+            else np.empty((0, 0), dtype=np.float32)
+        )
+
+    def _drop(self, keep: np.ndarray) -> None:
+        """Delete every entry whose mask value is False, in memory and on disk."""
+        doomed = self._ids[~keep].tolist()
+        if not doomed:
+            return
+        self._conn.executemany(
+            "DELETE FROM query_cache WHERE id = ?", [(i,) for i in doomed]
+        )
+        self._conn.commit()
+        self._ids = self._ids[keep]
+        self._max_papers = self._max_papers[keep]
+        self._created = self._created[keep]
+        self._last_used = self._last_used[keep]
+        self._matrix = self._matrix[keep]
+
+    def lookup(
+        self, embedding: list[float], max_papers: int
+    ) -> Optional[tuple[dict, float]]:
+        """(stored response, cosine similarity) of the nearest live match, or None."""
+        query = _unit(embedding)
+        now = time.time()
+        with self._lock:
+            self._drop(self._created > now - self.ttl_s)
+            if not len(self._ids) or self._matrix.shape[1] != query.shape[0]:
+                return None
+
+            similarities = self._matrix @ query
+            similarities[self._max_papers != max_papers] = -1.0
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                return None
+
+            entry_id = int(self._ids[best])
+            self._last_used[best] = now
+            row = self._conn.execute(
+                "SELECT response FROM query_cache WHERE id = ?", (entry_id,)
+            ).fetchone()
+            self._conn.execute(
+                "UPDATE query_cache SET hits = hits + 1, last_used_at = ? WHERE id = ?",
+                (now, entry_id),
+            )
+            self._conn.commit()
+        return json.loads(row[0]), similarity
+
+    def store(
+        self, query: str, max_papers: int, embedding: list[float], response: dict
+    ) -> None:
+        vector = _unit(embedding)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO query_cache "
+                "(query, max_papers, embedding, response, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    query,
+                    max_papers,
+                    vector.tobytes(),
+                    json.dumps(response, default=str),
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+            self._ids = np.append(self._ids, cursor.lastrowid)
+            self._max_papers = np.append(self._max_papers, max_papers)
+            self._created = np.append(self._created, now)
+            self._last_used = np.append(self._last_used, now)
+            self._matrix = (
+                np.vstack([self._matrix, vector]) if self._matrix.size else vector[None]
+            )
+
+            overflow = len(self._ids) - self.max_entries
+            if overflow > 0:
+                keep = np.ones(len(self._ids), dtype=bool)
+                keep[np.argsort(self._last_used, kind="stable")[:overflow]] = False
+                self._drop(keep)
+        logger.info(f"[query_cache] Stored result for {query!r}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._conn.execute(
+                "SELECT COALESCE(SUM(hits), 0) FROM query_cache"
+            ).fetchone()[0]
+            return {
+                "entries": len(self._ids),
+                "hits": hits,
+                "threshold": self.threshold,
+                "max_entries": self.max_entries,
+            }
+
+
+@lru_cache(maxsize=1)
+def default_query_cache() -> SemanticQueryCache:
+    return SemanticQueryCache(
+        os.getenv("SEMANTIC_CACHE_DB", DEFAULT_QUERY_CACHE_DB),
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000")),
+        ttl_s=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+    )
@@ -1,27 +1,29 @@
-import os
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
 
-from supabase import Client, create_client
-
+from src.utils.clients import clients
 from src.utils.logger import logger
+from src.utils.resilience import resilience
 
+if TYPE_CHECKING:
+    from supabase import AsyncClient
 
-def _client() -> Client:
-    return create_client(
-        os.environ["SUPABASE_URL"],
-        os.environ["SUPABASE_KEY"],
-    )
+
+async def _client() -> "AsyncClient":
+    return await clients.supabase()
 
 
-def log_query(
+async def log_query(
     query_id: str,
     query: str,
     cost_report: dict,
     num_papers: int,
     num_contradictions: int,
     num_hypotheses: int,
+    deadline_s: Optional[float] = None,
 ) -> None:
-    _client().table("query_logs").insert(
+    client = await _client()
+    insert = client.table("query_logs").insert(
         {
             "query_id": query_id,
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -33,17 +35,18 @@ def log_query(
             "num_hypotheses": num_hypotheses,
             "node_breakdown": cost_report.get("breakdown", []),
         }
-    ).execute()
+    )
+    # Not hedged: a duplicate insert would log the query twice
+    await resilience.call(
+        "supabase", insert.execute, deadline_s=deadline_s, hedge=False
+    )
     logger.info(f"[supabase_store] Logged query {query_id}")
 
 
-def get_recent_queries(n: int = 10) -> list[dict]:
-    result = (
-        _client()
-        .table("query_logs")
-        .select("*")
-        .order("timestamp", desc=True)
-        .limit(n)
-        .execute()
+async def get_recent_queries(n: int = 10) -> list[dict]:
+    client = await _client()
+    select = (
+        client.table("query_logs").select("*").order("timestamp", desc=True).limit(n)
     )
+    result = await resilience.call("supabase", select.execute)
     return result.data or []
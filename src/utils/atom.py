@@ -0,0 +1,80 @@
+import re
+from typing import Iterable, Iterator, Optional
+from xml.etree.ElementTree import Element, XMLPullParser
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_ENTRY = f"{_ATOM}entry"
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ArxivAPIError(Exception):
+    """The arXiv API answered with an error entry instead of results."""
+
+
+def _text(entry: Element, tag: str) -> str:
+    return _WHITESPACE.sub(" ", entry.findtext(f"{_ATOM}{tag}") or "").strip()
+
+
+def _paper(entry: Element) -> dict:
+    entry_id = _text(entry, "id")
+    published = _text(entry, "published")
+    return {
+        "id": entry_id,
+        "title": _text(entry, "title"),
+        "abstract": _text(entry, "summary"),
+        "authors": [
+            _WHITESPACE.sub(" ", a.findtext(f"{_ATOM}name") or "").strip()
+            for a in entry.findall(f"{_ATOM}author")[:5]
+        ],
+        "year": int(published[:4]) if published[:4].isdigit() else None,
+        "url": entry_id,
+        "source": "arxiv",
+        "citation_count": 0,
+    }
+
+
+class AtomPaperParser:
+    """Incremental parser for arXiv API Atom feeds.
+
+    feed() accepts the response body in chunks of any size and returns the
+    papers whose <entry> closed inside that chunk, so callers can act on the
+    first results before the body has fully arrived. Each finished entry is
+    detached from the tree, keeping memory flat however long the feed is.
+    """
+
+    def __init__(self) -> None:
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._root: Optional[Element] = None
+
+    def _drain(self) -> list[dict]:
+        papers = []
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                continue
+            if element.tag != _ENTRY:
+                continue
+            paper = _paper(element)
+            if "/api/errors" in paper["id"]:
+                raise ArxivAPIError(paper["abstract"] or paper["title"])
+            papers.append(paper)
+            self._root.remove(element)
+        return papers
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> list[dict]:
+        self._parser.close()
+        return self._drain()
+
+
+def iter_atom_papers(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Papers from an Atom feed delivered as byte chunks, yielded as each
+    entry completes."""
+    parser = AtomPaperParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
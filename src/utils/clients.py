@@ -0,0 +1,287 @@
+import asyncio
+import os
+import socket
+import threading
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Any, Optional
+
+import httpx
+
+from src.utils.logger import logger
+
+# Providers whose APIs negotiate HTTP/2 over TLS (Pinecone's client is urllib3, 1.1 only)
+_HTTP2_PROVIDERS = {"openai", "anthropic", "supabase"}
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls) -> "PoolLimits":
+        return cls(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+            http2=os.getenv("HTTP2", "1").lower() not in ("0", "false", "no"),
+        )
+
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts requests and in-flight calls per provider."""
+
+    def __init__(self, stats: dict, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.stats["in_flight"] -= 1
+
+
+@lru_cache(maxsize=1)
+def _pooled_chat_anthropic():
+    """ChatAnthropic subclass that takes an http_async_client, like ChatOpenAI
+    does. Built on first use: importing langchain_anthropic is slow."""
+    import anthropic
+    from langchain_anthropic import ChatAnthropic
+    from pydantic import Field
+
+    class PooledChatAnthropic(ChatAnthropic):
+        http_async_client: Any = Field(default=None, exclude=True)
+
+        @cached_property
+        def _async_client(self) -> anthropic.AsyncAnthropic:
+            # Mirrors ChatAnthropic's own client from its public fields, but on
+            # the shared pool instead of a private httpx client per model
+            params = {
+                "api_key": self.anthropic_api_key.get_secret_value(),
+                "base_url": self.anthropic_api_url,
+                "max_retries": self.max_retries,
+                "default_headers": self.default_headers,
+                "http_client": self.http_async_client,
+            }
+            timeout = self.default_request_timeout
+            if timeout is None or timeout > 0:
+                params["timeout"] = timeout
+            return anthropic.AsyncAnthropic(**params)
+
+    return PooledChatAnthropic
+
+
+def _connections(transport: httpx.AsyncHTTPTransport) -> list:
+    """Open httpcore connections behind a transport (empty if httpx's layout
+    changes, so /metrics degrades instead of failing)."""
+    return list(getattr(getattr(transport, "_pool", None), "connections", None) or [])
+
+
+def _shut_down_sockets(transport: httpx.AsyncHTTPTransport) -> None:
+    """Shut down the sockets behind a transport whose event loop has closed.
+    aclose() can no longer run there, and this way the servers see the
+    connections end instead of them lingering until garbage collection
+    (skipped for any connection whose httpcore layout is not the expected one)."""
+    for connection in _connections(transport):
+        inner = getattr(connection, "_connection", None)
+        stream = getattr(inner, "_network_stream", None)
+        sock = stream.get_extra_info("socket") if stream is not None else None
+        if sock is None:
+            continue
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # already closed by the peer
+
+
+class ClientRegistry:
+    """Process-wide provider clients, built once and shared by every node and request.
+
+    Each provider gets one pooled httpx.AsyncClient (keep-alive, HTTP/2 where the
+    provider supports it, limits from PoolLimits) that its SDK clients and
+    LangChain chat models are wired to, so TLS sessions are reused across
+    queries. Async clients are bound to the event loop that created them and
+    are rebuilt if a different loop asks for them (e.g. successive asyncio.run),
+    after the old pools are closed.
+    """
+
+    def __init__(self, limits: Optional[PoolLimits] = None) -> None:
+        self.limits = limits or PoolLimits.from_env()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._http: dict[str, httpx.AsyncClient] = {}
+        self._transports: dict[str, _MeteredTransport] = {}
+        self._stats: dict[str, dict] = {}
+        self._chat_models: dict[tuple, object] = {}
+        self._openai = None
+        self._supabase = None
+        self._supabase_lock: Optional[asyncio.Lock] = None
+        self._pinecone_index = None
+
+    def _bind_loop(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if loop is self._loop:
+            return
+        # Connections belong to the loop that opened them — start fresh pools
+        self._release_pools(self._loop)
+        self._loop = loop
+        self._http.clear()
+        self._transports.clear()
+        self._chat_models.clear()
+        self._openai = None
+        self._supabase = None
+        self._supabase_lock = asyncio.Lock()
+
+    def _release_pools(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close the pools opened on a previous loop before they are dropped.
+        aclose() must run on that loop, so it is scheduled there while the
+        loop is still open (e.g. serving on another thread); once it has
+        closed, the sockets are shut down directly."""
+        if loop is None:
+            return
+        for provider, client in self._http.items():
+            if loop.is_closed():
+                _shut_down_sockets(self._transports[provider])
+            else:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    def _stats_for(self, provider: str) -> dict:
+        return self._stats.setdefault(
+            provider, {"requests": 0, "in_flight": 0, "clients_created": 0}
+        )
+
+    # ── httpx pools ────────────────────────────────────────────────────────
+
+    def http(self, provider: str) -> httpx.AsyncClient:
+        """The shared pooled httpx client for one provider."""
+        with self._lock:
+            self._bind_loop()
+            if provider not in self._http:
+                stats = self._stats_for(provider)
+                limits = httpx.Limits(
+                    max_connections=self.limits.max_connections,
+                    max_keepalive_connections=self.limits.max_keepalive,
+                    keepalive_expiry=self.limits.keepalive_expiry,
+                )
+                transport = _MeteredTransport(
+                    stats,
+                    limits=limits,
+                    http2=self.limits.http2 and provider in _HTTP2_PROVIDERS,
+                )
+                self._transports[provider] = transport
+                self._http[provider] = httpx.AsyncClient(
+                    transport=transport, timeout=httpx.Timeout(600.0, connect=10.0)
+                )
+                stats["clients_created"] += 1
+                logger.info(f"[clients] Opened {provider} connection pool")
+            return self._http[provider]
+
+    # ── provider clients ───────────────────────────────────────────────────
+
+    def chat_openai(self, model: str, temperature: float = 0):
+        from langchain_openai import ChatOpenAI  # deferred: heavy SDK import
+
+        key = ("openai", model, temperature)
+        http_client = self.http("openai")
+        with self._lock:
+            if key not in self._chat_models:
+                self._chat_models[key] = ChatOpenAI(
+                    model=model, temperature=temperature, http_async_client=http_client
+                )
+            return self._chat_models[key]
+
+    def chat_anthropic(self, model: str, temperature: float = 0):
+        key = ("anthropic", model, temperature)
+        http_client = self.http("anthropic")
+        with self._lock:
+            if key not in self._chat_models:
+                self._chat_models[key] = _pooled_chat_anthropic()(
+                    model=model, temperature=temperature, http_async_client=http_client
+                )
+            return self._chat_models[key]
+
+    def openai(self):
+        from openai import AsyncOpenAI  # deferred: heavy SDK import
+
+        http_client = self.http("openai")
+        with self._lock:
+            if self._openai is None:
+                self._openai = AsyncOpenAI(http_client=http_client)
+            return self._openai
+
+    async def supabase(self):
+        from supabase import AsyncClientOptions, acreate_client  # deferred
+
+        http_client = self.http("supabase")
+        async with self._supabase_lock:
+            if self._supabase is None:
+                self._supabase = await acreate_client(
+                    os.environ["SUPABASE_URL"],
+                    os.environ["SUPABASE_KEY"],
+                    options=AsyncClientOptions(httpx_client=http_client),
+                )
+            return self._supabase
+
+    def pinecone_index(self):
+        """Shared Pinecone index handle (thread-safe urllib3 pool; call via to_thread)."""
+        from pinecone import Pinecone  # deferred: heavy SDK import
+
+        with self._lock:
+            if self._pinecone_index is None:
+                pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
+                host = pc.describe_index(os.environ["PINECONE_INDEX"]).host
+                self._pinecone_index = pc.Index(
+                    host=host, connection_pool_maxsize=self.limits.max_keepalive
+                )
+                self._stats_for("pinecone")["clients_created"] += 1
+                logger.info("[clients] Opened pinecone connection pool")
+            return self._pinecone_index
+
+    # ── lifecycle & metrics ────────────────────────────────────────────────
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._http.values())
+            self._loop = None
+        for client in clients:
+            await client.aclose()
+
+    def metrics(self) -> dict[str, dict]:
+        """Per-provider pool stats: requests, in-flight calls and open connections."""
+        with self._lock:
+            out = {provider: dict(stats) for provider, stats in self._stats.items()}
+            for provider, transport in self._transports.items():
+                connections = _connections(transport)
+                out[provider].update(
+                    connections=len(connections),
+                    idle=sum(1 for c in connections if c.is_idle()),
+                    http2=sum(1 for c in connections if "HTTP/2" in c.info()),
+                )
+            if self._pinecone_index is not None:
+                pools = _urllib3_pools(self._pinecone_index)
+                out["pinecone"].update(
+                    requests=sum(getattr(p, "num_requests", 0) for p in pools),
+                    connections=sum(getattr(p, "num_connections", 0) for p in pools),
+                )
+        return out
+
+
+def _urllib3_pools(index) -> list:
+    """Per-host urllib3 pools behind a Pinecone index (empty if the SDK layout changes)."""
+    try:
+        rest_client = index._vector_api.api_client.rest_client
+        return list(rest_client.pool_manager.pools._container.values())
+    except AttributeError:
+        return []
+
+
+clients = ClientRegistry()
@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def _farthest_points(x: np.ndarray, k: int) -> np.ndarray:
+    """k seed rows, each the least similar to the seeds before it. Starts from
+    row 0, so with reranked input the most relevant paper seeds a topic."""
+    seeds = [0]
+    closest = x @ x[0]
+    for _ in range(1, k):
+        pick = int(np.argmin(closest))
+        seeds.append(pick)
+        closest = np.maximum(closest, x @ x[pick])
+    return x[seeds]
+
+
+def topic_chunks(
+    vectors: np.ndarray, max_size: int, iterations: int = 10
+) -> list[list[int]]:
+    """Partition rows into ceil(n / max_size) topical groups of at most
+    max_size rows each.
+
+    Spherical k-means finds the topics; the final assignment then hands out
+    (row, topic) pairs in order of cosine similarity while topics have room,
+    so no group overflows. Groups list their row indices in ascending order
+    and are ordered by their first row, keeping reranked order throughout.
+    """
+    n = len(vectors)
+    if n == 0:
+        return []
+    k = math.ceil(n / max_size)
+    if k == 1:
+        return [list(range(n))]
+
+    x = _unit_rows(np.asarray(vectors, dtype=np.float32))
+    centers = _farthest_points(x, k)
+    for _ in range(iterations):
+        labels = np.argmax(x @ centers.T, axis=1)
+        updated = centers.copy()
+        for j in range(k):
+            members = x[labels == j]
+            if len(members):
+                updated[j] = members.sum(axis=0)
+        updated = _unit_rows(updated)
+        if np.allclose(updated, centers, atol=1e-6):
+            break
+        centers = updated
+
+    similarity = x @ centers.T
+    label = np.full(n, -1)
+    room = np.full(k, max_size)
+    unassigned = n
+    for flat in np.argsort(-similarity, axis=None, kind="stable"):
+        row, topic = divmod(int(flat), k)
+        if label[row] == -1 and room[topic] > 0:
+            label[row] = topic
+            room[topic] -= 1
+            unassigned -= 1
+            if not unassigned:
+                break
+
+    groups = [np.flatnonzero(label == j).tolist() for j in range(k)]
+    return sorted((g for g in groups if g), key=lambda g: g[0])
@@ -1,4 +1,6 @@
 import os
+import threading
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -9,10 +11,22 @@ class CostLimitExceededError(Exception):
     pass
 
 
-# Pricing per 1M tokens (input, output) in USD
+# Pricing per 1M tokens in USD. cache_read / cache_write price prompt-cache
+# hits and 5-minute cache writes; models without them bill cached input as input.
 PRICING = {
-    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
-    "claude-sonnet-4": {"input": 3.00, "output": 15.00},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cache_read": 0.075},
+    "claude-sonnet-4": {
+        "input": 3.00,
+        "output": 15.00,
+        "cache_read": 0.30,
+        "cache_write": 3.75,
+    },
+    "claude-haiku-4": {
+        "input": 1.00,
+        "output": 5.00,
+        "cache_read": 0.10,
+        "cache_write": 1.25,
+    },
     "text-embedding-3-small": {"input": 0.02, "output": 0.02},
 }
 
@@ -27,6 +41,13 @@ def _get_model_pricing(model: str) -> dict:
     raise ValueError(f"Unknown model for pricing: {model}")
 
 
+def cache_usage(usage: dict) -> tuple[int, int]:
+    """(cache_read, cache_write) input tokens from a LangChain usage_metadata
+    dict; both are already included in its input_tokens."""
+    details = usage.get("input_token_details") or {}
+    return details.get("cache_read") or 0, details.get("cache_creation") or 0
+
+
 @dataclass
 class NodeCost:
     node_name: str
@@ -35,6 +56,16 @@ class NodeCost:
     output_tokens: int
     latency_ms: float
     cost_usd: float
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    tokens_saved: int = 0
+    cost_saved_usd: float = 0.0
 
 
 @dataclass
@@ -43,18 +74,34 @@ class QueryCostReport:
     total_cost_usd: float = 0.0
     total_latency_ms: float = 0.0
     node_costs: list = field(default_factory=list)
+    caches: dict = field(default_factory=dict)
 
 
 class CostTracker:
+    """Per-query cost accounting.
+
+    The active report lives in a ContextVar, so every asyncio task (one per
+    request) and every graph node it spawns records into its own query's report.
+    Concurrent queries in the same process never see each other's costs.
+    """
+
     def __init__(self):
-        self._report: Optional[QueryCostReport] = None
+        self._active: ContextVar[Optional[QueryCostReport]] = ContextVar(
+            f"cost_report_{id(self)}", default=None
+        )
+        # Parallel graph branches of one query may record from worker threads
+        self._lock = threading.Lock()
+
+    @property
+    def _report(self) -> Optional[QueryCostReport]:
+        return self._active.get()
 
     def start_query(self, query_id: str) -> None:
         if self._report is not None:
             raise RuntimeError(
                 f"Query '{self._report.query_id}' is already active. Call finish_query() first."
             )
-        self._report = QueryCostReport(query_id=query_id)
+        self._active.set(QueryCostReport(query_id=query_id))
         logger.info(f"[CostTracker] Started query: {query_id}")
 
     def track_call(
@@ -64,58 +111,137 @@ class CostTracker:
         input_tokens: int,
         output_tokens: int,
         latency_ms: float,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
     ) -> float:
-        if self._report is None:
+        """Record one model call. input_tokens is the whole prompt; the part of
+        it read from or written to the provider's prompt cache is priced at
+        the model's cache rates."""
+        report = self._report
+        if report is None:
             raise RuntimeError("No active query. Call start_query() first.")
 
         pricing = _get_model_pricing(model)
+        uncached = input_tokens - cache_read_tokens - cache_write_tokens
         cost = (
-            input_tokens * pricing["input"] + output_tokens * pricing["output"]
+            uncached * pricing["input"]
+            + cache_read_tokens * pricing.get("cache_read", pricing["input"])
+            + cache_write_tokens * pricing.get("cache_write", pricing["input"])
+            + output_tokens * pricing["output"]
         ) / 1_000_000
 
-        self._report.total_cost_usd += cost
-        self._report.total_latency_ms += latency_ms
-        self._report.node_costs.append(
-            NodeCost(
-                node_name=node_name,
-                model=model,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                latency_ms=latency_ms,
-                cost_usd=cost,
+        with self._lock:
+            report.total_cost_usd += cost
+            report.total_latency_ms += latency_ms
+            report.node_costs.append(
+                NodeCost(
+                    node_name=node_name,
+                    model=model,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    latency_ms=latency_ms,
+                    cost_usd=cost,
+                    cache_read_tokens=cache_read_tokens,
+                    cache_write_tokens=cache_write_tokens,
+                )
             )
-        )
+            running_total = report.total_cost_usd
 
         logger.info(
-            f"[CostTracker] {node_name} | {model} | "
-            f"in={input_tokens} out={output_tokens} | "
+            f"[CostTracker] {report.query_id} | {node_name} | {model} | "
+            f"in={input_tokens} (cache read={cache_read_tokens} "
+            f"write={cache_write_tokens}) out={output_tokens} | "
             f"${cost:.6f} | {latency_ms:.0f}ms | "
-            f"running total=${self._report.total_cost_usd:.6f}"
+            f"running total=${running_total:.6f}"
         )
 
         max_cost = os.getenv("MAX_COST_PER_QUERY")
-        if max_cost is not None and self._report.total_cost_usd > float(max_cost):
+        if max_cost is not None and running_total > float(max_cost):
             raise CostLimitExceededError(
-                f"Cost limit ${max_cost} exceeded: current total ${self._report.total_cost_usd:.6f}"
+                f"Cost limit ${max_cost} exceeded: current total ${running_total:.6f}"
             )
 
         warning_threshold = os.getenv("COST_WARNING_THRESHOLD")
-        if warning_threshold is not None and self._report.total_cost_usd > float(
-            warning_threshold
-        ):
+        if warning_threshold is not None and running_total > float(warning_threshold):
             logger.warning(
                 f"[CostTracker] Warning threshold ${warning_threshold} exceeded: "
-                f"${self._report.total_cost_usd:.6f}"
+                f"${running_total:.6f}"
             )
 
         return cost
 
-    def finish_query(self) -> dict:
-        if self._report is None:
-            raise RuntimeError("No active query to finish.")
+    def track_cancelled_hedge(
+        self, node_name: str, model: str, input_tokens: int
+    ) -> float:
+        """Record a losing hedged attempt that was cancelled in flight. No
+        usage comes back for it, but the provider may already have billed
+        the prompt, so it is charged at the caller's input_tokens estimate
+        and no output. It is not checked against MAX_COST_PER_QUERY here:
+        raising while the winner's result is being returned would lose it,
+        and the query's next call is checked with this cost included.
+        Outside a query it is not recorded."""
+        report = self._report
+        if report is None:
+            return 0.0
+
+        cost = input_tokens * _get_model_pricing(model)["input"] / 1_000_000
+        with self._lock:
+            report.total_cost_usd += cost
+            report.node_costs.append(
+                NodeCost(
+                    node_name=f"{node_name}:cancelled_hedge",
+                    model=model,
+                    input_tokens=input_tokens,
+                    output_tokens=0,
+                    latency_ms=0.0,
+                    cost_usd=cost,
+                )
+            )
 
+        logger.info(
+            f"[CostTracker] {report.query_id} | {node_name} | {model} | "
+            f"cancelled hedge, est. in={input_tokens} | ${cost:.6f}"
+        )
+        return cost
+
+    def track_cache(
+        self,
+        cache_name: str,
+        hits: int,
+        misses: int,
+        model: Optional[str] = None,
+        tokens_saved: int = 0,
+    ) -> None:
+        """Record lookups against a cache. If it stands in for paid `model`
+        calls, the tokens it saved are also priced. Outside a query (a bare
+        graph run, a background refresh, a script) there is nothing to
+        attribute the lookup to, so it is not recorded."""
+        report = self._report
+        if report is None:
+            return
+
+        saved_usd = (
+            tokens_saved * _get_model_pricing(model)["input"] / 1_000_000
+            if model
+            else 0.0
+        )
+        with self._lock:
+            stats = report.caches.setdefault(cache_name, CacheStats())
+            stats.hits += hits
+            stats.misses += misses
+            stats.tokens_saved += tokens_saved
+            stats.cost_saved_usd += saved_usd
+
+        logger.info(
+            f"[CostTracker] {report.query_id} | cache {cache_name} | "
+            f"hits={hits} misses={misses} | saved {tokens_saved} tokens (${saved_usd:.6f})"
+        )
+
+    def finish_query(self) -> dict:
         report = self._report
-        self._report = None
+        if report is None:
+            raise RuntimeError("No active query to finish.")
+        self._active.set(None)
 
         breakdown = [
             {
@@ -125,15 +251,43 @@ class CostTracker:
                 "output_tokens": nc.output_tokens,
                 "latency_ms": nc.latency_ms,
                 "cost_usd": nc.cost_usd,
+                "cache_read_tokens": nc.cache_read_tokens,
+                "cache_write_tokens": nc.cache_write_tokens,
             }
             for nc in report.node_costs
         ]
 
+        # Share of each node's prompt tokens served from the provider's prompt cache
+        prompt_cache: dict[str, dict] = {}
+        for nc in report.node_costs:
+            if not (nc.cache_read_tokens or nc.cache_write_tokens):
+                continue
+            node = prompt_cache.setdefault(
+                nc.node_name,
+                {"input_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0},
+            )
+            node["input_tokens"] += nc.input_tokens
+            node["cache_read_tokens"] += nc.cache_read_tokens
+            node["cache_write_tokens"] += nc.cache_write_tokens
+        for node in prompt_cache.values():
+            node["hit_ratio"] = node["cache_read_tokens"] / max(1, node["input_tokens"])
+
         result = {
             "query_id": report.query_id,
             "total_cost_usd": report.total_cost_usd,
             "total_latency_ms": report.total_latency_ms,
             "breakdown": breakdown,
+            "caches": {
+                name: {
+                    "hits": stats.hits,
+                    "misses": stats.misses,
+                    "hit_rate": stats.hits / max(1, stats.hits + stats.misses),
+                    "tokens_saved": stats.tokens_saved,
+                    "cost_saved_usd": stats.cost_saved_usd,
+                }
+                for name, stats in report.caches.items()
+            },
+            "prompt_cache": prompt_cache,
         }
 
         logger.info(
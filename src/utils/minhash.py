@@ -0,0 +1,115 @@
+import re
+from typing import Iterable
+
+import mmh3
+import numpy as np
+
+_BATCH = 256
+# Odd 64-bit multipliers that mix word hashes into shingle hashes
+_MIX = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F))
+_SHIFT = np.uint64(32)
+
+
+def _words(text: str) -> list[str]:
+    return re.sub(r"[^\w\s]", " ", text.lower().replace("-", " ")).split()
+
+
+def shingle_hashes(text: str, k: int = 3) -> np.ndarray:
+    """32-bit hashes of the word k-shingles of lower-cased, punctuation-free
+    text, built by mixing per-word mmh3 hashes in NumPy rather than hashing
+    each shingle string."""
+    words = _words(text) or [""]
+    h = np.fromiter(
+        (mmh3.hash(w, signed=False) for w in words), dtype=np.uint64, count=len(words)
+    )
+    k = min(k, len(h))
+    combined = h[: len(h) - k + 1].copy()
+    for offset in range(1, k):
+        combined = combined * _MIX[offset % 2] + h[offset : len(h) - k + 1 + offset]
+    return combined >> _SHIFT
+
+
+def lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    """(bands, rows) with bands * rows == num_perm whose S-curve midpoint
+    (1 / bands) ** (1 / rows) lies closest to the Jaccard threshold."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class MinHasher:
+    """MinHash signatures over word-shingle hashes, with num_perm
+    multiply-shift hash functions applied to a batch of documents at a time."""
+
+    def __init__(self, num_perm: int = 128, k: int = 3, seed: int = 1) -> None:
+        self.num_perm = num_perm
+        self.k = k
+        rng = np.random.default_rng(seed)
+        top = np.iinfo(np.uint64).max
+        self._a = rng.integers(1, top, size=(num_perm, 1), dtype=np.uint64) | 1
+        self._b = rng.integers(0, top, size=(num_perm, 1), dtype=np.uint64)
+
+    def signatures(self, texts: Iterable[str]) -> np.ndarray:
+        """(len(texts), num_perm) uint32 signature matrix."""
+        texts = list(texts)
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(texts), _BATCH):
+            batch = texts[start : start + _BATCH]
+            hashed = [shingle_hashes(t, self.k) for t in batch]
+            lengths = np.fromiter((len(h) for h in hashed), dtype=np.int64)
+            # uint64 products wrap; the high half is the permuted 32-bit value
+            permuted = (self._a * np.concatenate(hashed) + self._b) >> _SHIFT
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            out[start : start + len(batch)] = np.minimum.reduceat(
+                permuted, offsets, axis=1
+            ).T
+        return out
+
+
+def near_duplicate_pairs(
+    signatures: np.ndarray, threshold: float
+) -> list[tuple[int, int]]:
+    """Index pairs whose estimated Jaccard similarity is at least threshold.
+
+    Signatures are split into LSH bands; only documents sharing a bucket in
+    some band are compared, so the cost grows with the number of documents
+    rather than the number of pairs.
+    """
+    n, num_perm = signatures.shape
+    bands, rows = lsh_params(threshold, num_perm)
+    candidates: set[tuple[int, int]] = set()
+    for band in range(bands):
+        chunk = np.ascontiguousarray(signatures[:, band * rows : (band + 1) * rows])
+        keys = chunk.view(np.dtype((np.void, chunk.dtype.itemsize * rows))).ravel()
+        _, bucket = np.unique(keys, return_inverse=True)
+        order = np.argsort(bucket, kind="stable")
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket[order])) + 1))
+        sizes = np.diff(np.append(starts, n))
+        # Only buckets shared by two or more documents yield candidates
+        for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+            members = order[start : start + size].tolist()
+            for i, left in enumerate(members):
+                for right in members[i + 1 :]:
+                    candidates.add((left, right))
+
+    return sorted(
+        (i, j)
+        for i, j in candidates
+        if np.mean(signatures[i] == signatures[j]) >= threshold
+    )
+
+
+def cluster(n: int, pairs: Iterable[tuple[int, int]]) -> list[int]:
+    """Union-find over pairs; returns each index's cluster root."""
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    return [find(i) for i in range(n)]
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+
+
+class PolitenessScheduler:
+    """Spaces requests to one host: starts are at least min_interval apart
+    and at most max_concurrent are open at once.
+
+    Slots are handed out in arrival order. Callers that find the window
+    closed sleep until their reserved start time instead of polling. The
+    concurrency semaphore is rebuilt if a different event loop uses the
+    scheduler (e.g. successive asyncio.run calls).
+    """
+
+    def __init__(self, min_interval_s: float, max_concurrent: int = 1) -> None:
+        self.min_interval_s = min_interval_s
+        self.max_concurrent = max_concurrent
+        self.requests = 0
+        self.waited_s = 0.0
+        self._next_start = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _bound_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self._bound_semaphore():
+            # Reserve the next start time synchronously, so concurrent callers
+            # queue behind each other without a lock
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval_s
+            if start > now:
+                self.waited_s += start - now
+                await asyncio.sleep(start - now)
+            self.requests += 1
+            yield
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "waited_s": round(self.waited_s, 3),
+            "min_interval_s": self.min_interval_s,
+            "max_concurrent": self.max_concurrent,
+        }
+
+
+@lru_cache(maxsize=1)
+def arxiv_scheduler() -> PolitenessScheduler:
+    """arXiv's API terms ask for one connection at a time and no more than
+    one request every three seconds."""
+    return PolitenessScheduler(
+        min_interval_s=float(os.getenv("ARXIV_MIN_INTERVAL", "3.0")),
+        max_concurrent=int(os.getenv("ARXIV_MAX_CONCURRENT", "1")),
+    )
+
+
+@lru_cache(maxsize=1)
+def semantic_scholar_scheduler() -> PolitenessScheduler:
+    """Semantic Scholar grants API keys one request per second by default."""
+    return PolitenessScheduler(
+        min_interval_s=float(os.getenv("SEMANTIC_SCHOLAR_MIN_INTERVAL", "1.0")),
+        max_concurrent=int(os.getenv("SEMANTIC_SCHOLAR_MAX_CONCURRENT", "1")),
+    )
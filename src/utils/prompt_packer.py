@@ -0,0 +1,105 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+
+from src.utils.rate_governor import estimate_tokens
+
+# A sentence ends at . ! or ? followed by whitespace and a capital, digit or bracket
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])")
+_ELLIPSIS = "…"
+
+
+@dataclass(frozen=True)
+class PackedPaper:
+    paper: dict
+    abstract: str  # trimmed to whole sentences where possible
+    tokens: int  # header + abstract, as charged against the budget
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(model: str, text: str) -> int:
+    """Token count of one prompt fragment, cached: the same papers are packed
+    by several nodes and again on repeat queries."""
+    return estimate_tokens(model, text) if text else 0
+
+
+@lru_cache(maxsize=4096)
+def _sentences(model: str, abstract: str) -> tuple[tuple[str, int], ...]:
+    return tuple(
+        (sentence, count_tokens(model, sentence))
+        for sentence in _SENTENCE_END.split(abstract.strip())
+        if sentence
+    )
+
+
+def _cut_words(model: str, sentence: str, tokens: int, limit: int) -> str:
+    """Longest word-boundary prefix of one overlong sentence within limit."""
+    chars = int(len(sentence) * limit / tokens)
+    while chars > 0:
+        prefix = sentence[:chars].rsplit(" ", 1)[0].rstrip(",;:")
+        if count_tokens(model, prefix + _ELLIPSIS) <= limit:
+            return prefix + _ELLIPSIS
+        chars = int(chars * 0.9)
+    return ""
+
+
+def trim_abstract(model: str, abstract: str, limit: int) -> tuple[str, int]:
+    """(text, tokens): as many leading sentences of abstract as fit in limit
+    tokens. If even the first sentence doesn't fit it is cut at a word."""
+    kept, used = [], 0
+    for sentence, tokens in _sentences(model, abstract):
+        cost = tokens + (1 if kept else 0)  # the joining space
+        if used + cost > limit:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept), used
+    sentences = _sentences(model, abstract)
+    if not sentences or limit <= 0:
+        return "", 0
+    first, tokens = sentences[0]
+    text = _cut_words(model, first, tokens, limit)
+    return text, count_tokens(model, text)
+
+
+def cached_block(text: str) -> dict:
+    """An Anthropic text content block ending in a prompt-cache breakpoint:
+    the prompt up to and including it is cached for five minutes and billed
+    at the cache-read rate when a later call repeats it exactly."""
+    return {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+
+
+def pack_papers(
+    papers: list[dict],
+    header: Callable[[dict], str],
+    model: str,
+    budget: int,
+    max_abstract_tokens: int,
+    min_abstract_tokens: int = 20,
+    max_papers: Optional[int] = None,
+) -> list[PackedPaper]:
+    """Fit as many papers as the token budget allows, in the given (reranked)
+    order. Each paper costs its header plus its abstract, trimmed at sentence
+    boundaries to max_abstract_tokens; a paper whose header and at least
+    min_abstract_tokens of abstract no longer fit is passed over for shorter
+    ones further down."""
+    packed: list[PackedPaper] = []
+    left = budget
+    for paper in papers:
+        if max_papers is not None and len(packed) >= max_papers:
+            break
+        head_tokens = count_tokens(model, header(paper)) + 2  # numbering, newlines
+        room = min(max_abstract_tokens, left - head_tokens)
+        if room < min_abstract_tokens:
+            continue
+        abstract, abstract_tokens = trim_abstract(
+            model, paper.get("abstract") or "", room
+        )
+        if not abstract and paper.get("abstract"):
+            continue
+        tokens = head_tokens + abstract_tokens
+        packed.append(PackedPaper(paper=paper, abstract=abstract, tokens=tokens))
+        left -= tokens
+    return packed
@@ -0,0 +1,286 @@
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from src.utils.logger import logger
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Requests and tokens per minute allowed for one model (None = unlimited)."""
+
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+
+
+# Per-model limits, keyed by the model names the agents call (their _MODEL
+# constants and the embedding model). Deliberately below the providers'
+# entry-tier quotas; raise them with RATE_LIMITS for higher tiers.
+_DEFAULT_LIMITS = {
+    "gpt-4o-mini": Limits(rpm=500, tpm=200_000),
+    "text-embedding-3-small": Limits(rpm=3000, tpm=1_000_000),
+    "claude-sonnet-4-6": Limits(rpm=50, tpm=30_000),
+    "claude-haiku-4-5": Limits(rpm=50, tpm=50_000),
+}
+
+
+def parse_limits(spec: str) -> dict[str, Limits]:
+    """RATE_LIMITS format: "model=rpm:tpm,..."; either number may be left
+    empty for no limit, e.g. "gpt-4o-mini=5000:2000000,claude-haiku-4-5=:80000"."""
+    limits = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        model, _, values = item.partition("=")
+        rpm, _, tpm = values.partition(":")
+        limits[model.strip()] = Limits(
+            rpm=float(rpm) if rpm.strip() else None,
+            tpm=float(tpm) if tpm.strip() else None,
+        )
+    return limits
+
+
+class TokenBucket:
+    """Refills at per_minute/60 units a second up to a full minute's worth."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_s(self, n: float, now: float) -> float:
+        """Seconds until n units are available (a request larger than the
+        bucket waits for a full bucket rather than forever)."""
+        self._refill(now)
+        return max(0.0, (min(n, self.capacity) - self.level) / self.rate)
+
+    def take(self, n: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(n, self.capacity)
+
+    def credit(self, n: float) -> None:
+        """Give back (or, if negative, charge) units once a call's real size is known."""
+        self.level = min(self.capacity, self.level + n)
+
+
+@dataclass
+class _ModelState:
+    requests: Optional[TokenBucket]
+    tokens: Optional[TokenBucket]
+    paused_until: float = 0.0
+    calls: int = 0
+    queued_s: float = 0.0
+    throttled: int = 0
+    queue: Optional[asyncio.Lock] = None
+    loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def retry_after_s(exc: BaseException) -> Optional[float]:
+    """How long a rate-limited provider asked us to wait, from the error's
+    response (OpenAI/Anthropic SDK errors and httpx.HTTPStatusError all carry
+    one). None if the error was not a 429/503."""
+    response = getattr(exc, "response", None)
+    if getattr(response, "status_code", None) not in (429, 503):
+        return None
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    # A 429 without a hint still means back off; a bare 503 is just an outage
+    return 1.0 if response.status_code == 429 else None
+
+
+@lru_cache(maxsize=4)
+def _encoding(name: str):
+    try:
+        import tiktoken  # deferred: loads BPE tables
+
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"[rate_governor] tiktoken {name} unavailable, estimating: {e}")
+        return None
+
+
+def estimate_tokens(model: str, *texts: str) -> int:
+    """Token count of texts for model. Claude has no public tokenizer, so its
+    models are counted with o200k_base, close enough for budgeting; without
+    the BPE tables (offline, no TIKTOKEN_CACHE_DIR) it is ~4 chars a token."""
+    try:
+        import tiktoken
+
+        name = tiktoken.encoding_name_for_model(model)
+    except (ImportError, KeyError):
+        name = "o200k_base"
+    encoding = _encoding(name)
+    if encoding is None:
+        return sum(len(t) for t in texts) // 4 + 1
+    return sum(len(encoding.encode(t, disallowed_special=())) for t in texts)
+
+
+def usage_tokens(response) -> Optional[int]:
+    """Tokens a finished call actually used, if its response reports them.
+    Prompt-cache reads are left out: Anthropic doesn't count them against
+    input tokens per minute."""
+    usage = getattr(response, "usage_metadata", None)  # LangChain chat models
+    if isinstance(usage, dict):
+        total = usage.get("total_tokens") or (
+            usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+        )
+        cache_read = (usage.get("input_token_details") or {}).get("cache_read")
+        if isinstance(total, int) and isinstance(cache_read, int):
+            total -= cache_read
+    else:  # OpenAI SDK responses
+        total = getattr(getattr(response, "usage", None), "total_tokens", None)
+    return total if isinstance(total, int) else None
+
+
+class RateGovernor:
+    """Process-wide request and token budgets per model.
+
+    Every LLM and embeddings call waits here for room in its model's
+    requests-per-minute and tokens-per-minute buckets instead of being sent
+    into a 429. Waiters for one model are served strictly in arrival order, so
+    a large prompt holds back the calls behind it rather than being starved by
+    them. Token charges are estimated up front and corrected from the
+    response's usage. A 429/503 carrying Retry-After pauses the whole model
+    for that long and the call is queued again, up to max_retries times.
+    """
+
+    def __init__(
+        self, limits: Optional[dict[str, Limits]] = None, max_retries: int = 2
+    ) -> None:
+        self.limits = limits if limits is not None else dict(_DEFAULT_LIMITS)
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._models: dict[str, _ModelState] = {}
+
+    @classmethod
+    def from_env(cls) -> "RateGovernor":
+        limits = dict(_DEFAULT_LIMITS)
+        limits.update(parse_limits(os.getenv("RATE_LIMITS", "")))
+        return cls(limits=limits, max_retries=int(os.getenv("RATE_LIMIT_RETRIES", "2")))
+
+    def _state(self, model: str) -> _ModelState:
+        with self._lock:
+            if model not in self._models:
+                limits = self.limits.get(model, Limits())
+                self._models[model] = _ModelState(
+                    requests=TokenBucket(limits.rpm) if limits.rpm else None,
+                    tokens=TokenBucket(limits.tpm) if limits.tpm else None,
+                )
+            state = self._models[model]
+            # The FIFO lock belongs to one event loop; rebuild it for a new one
+            loop = asyncio.get_running_loop()
+            if state.loop is not loop:
+                state.loop = loop
+                state.queue = asyncio.Lock()
+            return state
+
+    async def acquire(self, model: str, tokens: int = 0) -> None:
+        """Wait for this call's turn and for room for one request of `tokens`."""
+        state = self._state(model)
+        t0 = time.monotonic()
+        async with state.queue:
+            while True:
+                now = time.monotonic()
+                wait = state.paused_until - now
+                if state.requests is not None:
+                    wait = max(wait, state.requests.wait_s(1, now))
+                if state.tokens is not None:
+                    wait = max(wait, state.tokens.wait_s(tokens, now))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if state.requests is not None:
+                state.requests.take(1, now)
+            if state.tokens is not None:
+                state.tokens.take(tokens, now)
+        with self._lock:
+            state.calls += 1
+            state.queued_s += time.monotonic() - t0
+
+    def settle(self, model: str, estimated: int, actual: int) -> None:
+        state = self._state(model)
+        if state.tokens is not None:
+            state.tokens.credit(estimated - actual)
+
+    def pause(self, model: str, seconds: float) -> None:
+        state = self._state(model)
+        with self._lock:
+            state.throttled += 1
+            state.paused_until = max(state.paused_until, time.monotonic() + seconds)
+
+    async def call(
+        self,
+        model: str,
+        fn: Callable[[], Awaitable[T]],
+        tokens: int = 0,
+    ) -> T:
+        """Run fn() once model's budget allows, retrying after Retry-After."""
+        retries = 0
+        while True:
+            await self.acquire(model, tokens)
+            try:
+                result = await fn()
+                break
+            except Exception as e:
+                wait = retry_after_s(e)
+                if wait is None or retries >= self.max_retries:
+                    raise
+                logger.warning(
+                    f"[rate_governor] {model} rate-limited, pausing {wait:.1f}s"
+                )
+                self.pause(model, wait)
+                retries += 1
+        used = usage_tokens(result)
+        if used is not None:
+            self.settle(model, tokens, used)
+        return result
+
+    def metrics(self) -> dict[str, dict]:
+        """Per-model limits, calls, time spent queued and 429s honoured."""
+        out = {}
+        with self._lock:
+            models = dict(self._models)
+        now = time.monotonic()
+        for model, state in models.items():
+            limits = self.limits.get(model, Limits())
+            out[model] = {
+                "rpm": limits.rpm,
+                "tpm": limits.tpm,
+                "calls": state.calls,
+                "queued_s": round(state.queued_s, 3),
+                "throttled": state.throttled,
+                "paused_s": round(max(0.0, state.paused_until - now), 3),
+                "tokens_available": (
+                    round(state.tokens.level) if state.tokens is not None else None
+                ),
+            }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+
+governor = RateGovernor.from_env()
@@ -0,0 +1,296 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import numpy as np
+
+from src.utils.logger import logger
+from src.utils.rate_governor import retry_after_s
+
+T = TypeVar("T")
+
+# End-to-end budget per call, overridable with <PROVIDER>_DEADLINE
+_DEFAULT_DEADLINES = {
+    "openai": 20.0,
+    "anthropic": 25.0,
+    "arxiv": 60.0,
+    "semantic_scholar": 10.0,
+    "pinecone": 10.0,
+    "supabase": 5.0,
+}
+# arXiv and Semantic Scholar are held to one request at a time by their
+# politeness schedulers, so a duplicate would only queue behind the original
+_DEFAULT_HEDGED = "openai,anthropic,pinecone,supabase"
+
+
+class CircuitOpenError(Exception):
+    """A provider's breaker is open: the call was rejected without being made."""
+
+
+@dataclass
+class ProviderHealth:
+    """Breaker state and call statistics for one provider."""
+
+    state: str = "closed"  # closed → open → half_open → closed | open
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    probing: bool = False  # the one half-open trial call is in flight
+    times_opened: int = 0
+    calls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    rejected: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    hedges_cancelled: int = 0
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=200))
+
+
+class Resilience:
+    """Per-call deadlines, hedged requests and circuit breakers for every
+    external provider, shared process-wide like the client registry.
+
+    call() runs a zero-argument coroutine factory. Once a provider has enough
+    latency samples, a duplicate is started if the first attempt outlives the
+    provider's recent p95, and whichever succeeds first wins. After
+    `failure_threshold` consecutive failures or timeouts the provider's
+    breaker opens and calls fail fast with CircuitOpenError until
+    `reset_after_s` has passed; the next call is then the only trial let
+    through, closing the breaker on success or re-opening it on failure, and
+    other callers keep getting CircuitOpenError until it settles.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_after_s: float = 30.0,
+        hedge_min_samples: int = 20,
+        hedged_providers: Optional[set[str]] = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self.hedge_min_samples = hedge_min_samples
+        self.hedged_providers = hedged_providers or set()
+        self._lock = threading.Lock()
+        self._health: dict[str, ProviderHealth] = {}
+
+    @classmethod
+    def from_env(cls) -> "Resilience":
+        hedged = os.getenv("HEDGE_PROVIDERS", _DEFAULT_HEDGED)
+        return cls(
+            failure_threshold=int(os.getenv("BREAKER_FAILURES", "5")),
+            reset_after_s=float(os.getenv("BREAKER_RESET_S", "30")),
+            hedge_min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+            hedged_providers={p.strip() for p in hedged.split(",") if p.strip()},
+        )
+
+    def _get(self, provider: str) -> ProviderHealth:
+        return self._health.setdefault(provider, ProviderHealth())
+
+    def deadline_for(self, provider: str) -> float:
+        default = _DEFAULT_DEADLINES.get(provider, 30.0)
+        return float(os.getenv(f"{provider.upper()}_DEADLINE", default))
+
+    # ── breaker ────────────────────────────────────────────────────────────
+
+    def _admit(self, provider: str) -> bool:
+        """Let a call through or raise CircuitOpenError. Returns True if the
+        call is the half-open trial, which the caller must settle."""
+        with self._lock:
+            health = self._get(provider)
+            probe = False
+            if health.state == "open":
+                if time.monotonic() - health.opened_at < self.reset_after_s:
+                    health.rejected += 1
+                    raise CircuitOpenError(f"{provider} circuit open")
+                health.state = "half_open"
+                logger.info(f"[resilience] {provider} breaker half-open, trying")
+            if health.state == "half_open":
+                if health.probing:
+                    health.rejected += 1
+                    raise CircuitOpenError(
+                        f"{provider} circuit half-open, trial running"
+                    )
+                health.probing = probe = True
+            health.calls += 1
+            return probe
+
+    def _settle_probe(self, provider: str) -> None:
+        """Free the trial slot. A trial cancelled before it finished leaves the
+        breaker half-open, so the next caller becomes the trial."""
+        with self._lock:
+            self._get(provider).probing = False
+
+    def _succeeded(self, provider: str, latency_ms: float) -> None:
+        with self._lock:
+            health = self._get(provider)
+            health.latencies_ms.append(latency_ms)
+            health.consecutive_failures = 0
+            health.probing = False
+            if health.state != "closed":
+                logger.info(f"[resilience] {provider} breaker closed")
+            health.state = "closed"
+
+    def _failed(self, provider: str, timed_out: bool) -> None:
+        with self._lock:
+            health = self._get(provider)
+            health.failures += 1
+            health.timeouts += int(timed_out)
+            health.consecutive_failures += 1
+            health.probing = False
+            if health.state == "half_open" or (
+                health.state == "closed"
+                and health.consecutive_failures >= self.failure_threshold
+            ):
+                health.state = "open"
+                health.opened_at = time.monotonic()
+                health.times_opened += 1
+                logger.warning(
+                    f"[resilience] {provider} breaker opened after "
+                    f"{health.consecutive_failures} consecutive failures"
+                )
+
+    # ── hedging ────────────────────────────────────────────────────────────
+
+    def _hedge_delay_s(self, provider: str) -> Optional[float]:
+        with self._lock:
+            samples = list(self._get(provider).latencies_ms)
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return float(np.percentile(samples, 95)) / 1000
+
+    async def _race(
+        self,
+        provider: str,
+        fn: Callable[[], Awaitable[T]],
+        hedge: bool,
+        on_hedge_cancelled: Optional[Callable[[], None]],
+    ) -> T:
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        hedged = False
+        try:
+            delay = self._hedge_delay_s(provider) if hedge else None
+            if delay is not None:
+                done, pending = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    with self._lock:
+                        self._get(provider).hedges += 1
+                    hedged = True
+                    pending.add(asyncio.ensure_future(fn()))
+                else:
+                    pending = done
+
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner is not None:
+                    if winner is not primary:
+                        with self._lock:
+                            self._get(provider).hedge_wins += 1
+                    return winner.result()
+                if not pending:
+                    raise next(iter(done)).exception()
+        finally:
+            # A losing attempt cancelled mid-flight may still be billed
+            in_flight = [t for t in pending if not t.done()]
+            if hedged and in_flight:
+                with self._lock:
+                    self._get(provider).hedges_cancelled += len(in_flight)
+                if on_hedge_cancelled is not None:
+                    for _ in in_flight:
+                        on_hedge_cancelled()
+            for task in pending:
+                task.cancel()
+
+    async def call(
+        self,
+        provider: str,
+        fn: Callable[[], Awaitable[T]],
+        deadline_s: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        on_hedge_cancelled: Optional[Callable[[], None]] = None,
+    ) -> T:
+        """Run fn() for provider under its breaker, deadline and hedging
+        policy. fn must build a fresh awaitable each time it is called; pass
+        hedge=False for calls that must not run twice (inserts, streams).
+        on_hedge_cancelled is called once for every losing attempt cancelled
+        in flight, so that the caller can account for what it may be billed.
+
+        Rate-governed calls wrap this, not the other way round, so time spent
+        queued for a rate limit never counts against the deadline, the breaker
+        or the latency samples. A 429 the governor will retry is likewise not
+        a breaker failure."""
+        probe = self._admit(provider)
+        if hedge is None:
+            hedge = provider in self.hedged_providers
+        deadline = deadline_s if deadline_s is not None else self.deadline_for(provider)
+
+        t0 = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                self._race(provider, fn, hedge, on_hedge_cancelled), timeout=deadline
+            )
+        except asyncio.TimeoutError:
+            self._failed(provider, timed_out=True)
+            raise
+        except Exception as e:
+            if retry_after_s(e) is not None:
+                # Throttled, not down: the rate governor waits and retries
+                if probe:
+                    self._settle_probe(provider)
+            else:
+                self._failed(provider, timed_out=False)
+            raise
+        except asyncio.CancelledError:
+            if probe:
+                self._settle_probe(provider)
+            raise
+        self._succeeded(provider, (time.monotonic() - t0) * 1000)
+        return result
+
+    # ── metrics ────────────────────────────────────────────────────────────
+
+    def metrics(self) -> dict[str, dict]:
+        """Per-provider breaker state, failure counts, hedge win rate, losing
+        attempts cancelled in flight and latency percentiles."""
+        out = {}
+        with self._lock:
+            for provider, health in self._health.items():
+                samples = list(health.latencies_ms)
+                p50, p95, p99 = (
+                    np.percentile(samples, [50, 95, 99]) if samples else (0, 0, 0)
+                )
+                out[provider] = {
+                    "state": health.state,
+                    "times_opened": health.times_opened,
+                    "calls": health.calls,
+                    "failures": health.failures,
+                    "timeouts": health.timeouts,
+                    "rejected": health.rejected,
+                    "hedges": health.hedges,
+                    "hedge_wins": health.hedge_wins,
+                    "hedges_cancelled": health.hedges_cancelled,
+                    "hedge_win_rate": (
+                        round(health.hedge_wins / health.hedges, 4)
+                        if health.hedges
+                        else 0.0
+                    ),
+                    "p50_ms": round(float(p50), 1),
+                    "p95_ms": round(float(p95), 1),
+                    "p99_ms": round(float(p99), 1),
+                }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._health.clear()
+
+
+resilience = Resilience.from_env()
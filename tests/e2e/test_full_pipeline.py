@@ -4,6 +4,7 @@ Requires env var: E2E_API_URL=https://<id>.execute-api.<region>.amazonaws.com
 All API keys must also be set in the Lambda environment.
 """
 
+import asyncio
 import os
 import time
 
@@ -44,7 +45,7 @@ def test_full_pipeline():
     # Verify Supabase record was written
     from src.storage.supabase_store import get_recent_queries
 
-    rows = get_recent_queries(10)
+    rows = asyncio.run(get_recent_queries(10))
     assert any(
         r.get("query_id") == query_id for r in rows
     ), f"query_id {query_id!r} not found in Supabase logs"
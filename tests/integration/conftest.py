@@ -2,6 +2,7 @@
 Integration test configuration:
 - Loads .env so real API keys are available
 - Resets CostTracker singleton between tests to prevent state leakage
+- Resets provider circuit breakers and rate budgets so tests don't affect each other
 """
 
 import pytest
@@ -10,6 +11,8 @@ from dotenv import load_dotenv
 load_dotenv()  # loads .env from project root before any test runs
 
 from src.utils.cost_tracker import cost_tracker  # noqa: E402
+from src.utils.rate_governor import governor  # noqa: E402
+from src.utils.resilience import resilience  # noqa: E402
 
 
 @pytest.fixture(autouse=True)
@@ -20,3 +23,12 @@ def reset_cost_tracker():
     yield
     if cost_tracker._report is not None:
         cost_tracker.finish_query()
+
+
+@pytest.fixture(autouse=True)
+def reset_provider_state():
+    resilience.reset()
+    governor.reset()
+    yield
+    resilience.reset()
+    governor.reset()
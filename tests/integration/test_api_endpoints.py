@@ -1,9 +1,16 @@
-from unittest.mock import patch
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import PropertyMock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
-from src.api.main import app
+from src.api.main import app, job_pool
+from src.api.result_cache import ResultCache, SingleFlight, StreamFlight
+from src.storage.arxiv_cache import ArxivCache
+from src.storage.job_store import JobStore
+from src.storage.query_cache import SemanticQueryCache
 
 client = TestClient(app)
 
@@ -32,6 +39,44 @@ def test_stats_returns_200_on_supabase_failure():
     assert data["error"] is not None
 
 
+def test_resume_unknown_query_returns_404():
+    response = client.post("/analyze/no-such-run/resume")
+    assert response.status_code == 404
+
+
+def _workers_running():
+    return patch.object(
+        type(job_pool), "running", new_callable=PropertyMock, return_value=True
+    )
+
+
+def test_create_job_returns_202_and_is_pollable(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    with patch(
+        "src.api.main.default_job_store", return_value=store
+    ), _workers_running():
+        created = client.post(
+            "/jobs",
+            json={"query": "transformer attention mechanisms", "max_papers": 60},
+        )
+        assert created.status_code == 202
+        query_id = created.json()["query_id"]
+        assert created.json()["status"] == "queued"
+
+        polled = client.get(f"/jobs/{query_id}")
+        assert polled.status_code == 200
+        assert polled.json()["query_id"] == query_id
+
+        assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_job_max_papers_is_capped():
+    response = client.post(
+        "/jobs", json={"query": "transformer attention mechanisms", "max_papers": 500}
+    )
+    assert response.status_code == 422
+
+
 @pytest.mark.integration
 def test_analyze_returns_full_response():
     """Real call — needs OPENAI_API_KEY, ANTHROPIC_API_KEY, PINECONE_API_KEY, SUPABASE_URL/KEY."""
@@ -50,3 +95,300 @@ def test_analyze_returns_full_response():
     assert "hypotheses" in data
     assert "cost_report" in data
     assert "errors" in data
+
+
+def test_analyze_stream_emits_server_sent_events():
+    class _FakeGraph:
+        async def astream(self, state, config=None, stream_mode=None):
+            yield ("updates", {"reranker": {"all_papers": [{"title": "P"}]}})
+            yield ("updates", {"cost_auditor": {"cost_report": {}}})
+
+    with patch("src.api.main._graph", return_value=_FakeGraph()):
+        response = client.post(
+            "/analyze/stream",
+            json={"query": "transformer attention mechanisms", "max_papers": 4},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: papers" in response.text
+    assert "event: done" in response.text
+
+
+def test_analyze_returns_partial_results_at_deadline():
+    class _SlowGraph:
+        async def ainvoke(self, state, config=None):
+            await asyncio.sleep(5)
+
+        async def aget_state(self, config):
+            return SimpleNamespace(
+                values={"all_papers": [{"title": "P"}], "synthesis": "S"},
+                next=("hypothesis_generator",),
+            )
+
+    with patch("src.api.main._graph", return_value=_SlowGraph()), patch(
+        "src.api.main._ANALYZE_DEADLINE_S", 0.05
+    ), patch("src.api.main._DEADLINE_GRACE_S", 0.05), patch(
+        "src.api.main._query_embedding", return_value=None
+    ), patch(
+        "src.api.main.result_cache", ResultCache(max_entries=8, ttl_s=60)
+    ):
+        response = client.post(
+            "/analyze",
+            json={"query": "partial results under a deadline", "max_papers": 4},
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["synthesis"] == "S"
+    assert data["papers"] == [{"title": "P"}]
+    assert data["errors"] == [
+        "deadline: returned partial results, unfinished nodes: hypothesis_generator"
+    ]
+    assert data["cost_report"]["total_cost_usd"] == 0.0
+
+
+def test_create_job_without_workers_returns_503(tmp_path):
+    # Lambda runs without lifespan, so no worker pool would drain the queue
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    with patch("src.api.main.default_job_store", return_value=store):
+        response = client.post(
+            "/jobs",
+            json={"query": "transformer attention mechanisms", "max_papers": 60},
+        )
+    assert response.status_code == 503
+    assert store.counts() == {}
+
+
+def test_metrics_reports_pools_and_jobs(tmp_path):
+    with patch(
+        "src.api.main.default_job_store",
+        return_value=JobStore(str(tmp_path / "jobs.sqlite")),
+    ), patch(
+        "src.api.main.default_arxiv_cache",
+        return_value=ArxivCache(str(tmp_path / "arxiv.sqlite")),
+    ), patch(
+        "src.api.main.default_query_cache",
+        return_value=SemanticQueryCache(":memory:"),
+    ):
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    data = response.json()
+    assert isinstance(data["connection_pools"], dict)
+    assert data["jobs"] == {}
+    assert data["caches"]["arxiv"]["entries"] == 0
+    assert isinstance(data["resilience"], dict)
+    assert isinstance(data["rate_limits"], dict)
+
+
+def test_rephrased_query_served_from_semantic_cache():
+    class _FakeGraph:
+        calls = 0
+
+        async def ainvoke(self, state, config=None):
+            # Started alongside the lookup; a hit cancels it before it finishes
+            await asyncio.sleep(0.1)
+            _FakeGraph.calls += 1
+            return {"all_papers": [{"title": "P"}], "synthesis": "S", "errors": []}
+
+    # Two phrasings of one question embed to nearly the same direction
+    embeddings = {
+        "transformer attention in NLP": [1.0, 0.1, 0.0],
+        "attention mechanisms for NLP transformers": [1.0, 0.12, 0.01],
+    }
+
+    async def fake_embed(query):
+        return embeddings[query]
+
+    with patch("src.api.main._graph", return_value=_FakeGraph()), patch(
+        "src.api.main.embed_query", fake_embed
+    ), patch(
+        "src.api.main.default_query_cache",
+        return_value=SemanticQueryCache(":memory:", threshold=0.95),
+    ), patch(
+        "src.api.main.result_cache", ResultCache()
+    ):
+        first = client.post(
+            "/analyze", json={"query": "transformer attention in NLP", "max_papers": 4}
+        ).json()
+        second = client.post(
+            "/analyze",
+            json={
+                "query": "attention mechanisms for NLP transformers",
+                "max_papers": 4,
+            },
+        ).json()
+
+    assert _FakeGraph.calls == 1
+    assert first["cache_hit"] is False
+    assert second["cache_hit"] is True
+    assert second["cache_similarity"] > 0.95
+    assert second["query_id"] == first["query_id"]
+    assert second["synthesis"] == "S"
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_share_one_run():
+    class _SlowGraph:
+        calls = 0
+
+        async def ainvoke(self, state, config=None):
+            _SlowGraph.calls += 1
+            await asyncio.sleep(0.2)
+            return {"synthesis": "S", "errors": []}
+
+    async def no_embedding(query):
+        return None
+
+    flight, cache = SingleFlight(), ResultCache()
+    with patch("src.api.main._graph", return_value=_SlowGraph()), patch(
+        "src.api.main._query_embedding", no_embedding
+    ), patch("src.api.main.analysis_flight", flight), patch(
+        "src.api.main.result_cache", cache
+    ):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as ac:
+            body = {"query": "offline reinforcement learning", "max_papers": 4}
+            responses = await asyncio.gather(
+                *(ac.post("/analyze", json=body) for _ in range(5))
+            )
+            again = await ac.post(
+                "/analyze",
+                json={"query": "Offline  Reinforcement Learning", "max_papers": 4},
+            )
+
+    assert _SlowGraph.calls == 1
+    assert {r.json()["query_id"] for r in responses} == {
+        responses[0].json()["query_id"]
+    }
+    assert flight.stats()["coalesced"] == 4
+    assert again.json()["cache_hit"] is True
+    assert cache.stats()["hits"] == 1
+
+
+def test_stream_replays_a_semantic_cache_hit_without_finishing_a_run():
+    class _FakeGraph:
+        calls = 0
+
+        async def ainvoke(self, state, config=None):
+            _FakeGraph.calls += 1
+            return {"all_papers": [{"title": "P"}], "synthesis": "S", "errors": []}
+
+        async def astream(self, state, config=None, stream_mode=None):
+            await asyncio.sleep(0.1)
+            _FakeGraph.calls += 1
+            yield ("updates", {"synthesizer": {"synthesis": "fresh"}})
+
+    async def fake_embed(query):
+        return [1.0, 0.1, 0.0]
+
+    cache = ResultCache()
+    with patch("src.api.main._graph", return_value=_FakeGraph()), patch(
+        "src.api.main.embed_query", fake_embed
+    ), patch(
+        "src.api.main.default_query_cache",
+        return_value=SemanticQueryCache(":memory:", threshold=0.95),
+    ), patch(
+        "src.api.main.result_cache", cache
+    ):
+        first = client.post(
+            "/analyze", json={"query": "transformer attention in NLP", "max_papers": 4}
+        ).json()
+        semantic = client.post(
+            "/analyze/stream",
+            json={"query": "attention in NLP transformers", "max_papers": 4},
+        )
+        exact = client.post(
+            "/analyze/stream",
+            json={"query": "attention in NLP transformers", "max_papers": 4},
+        )
+
+    assert _FakeGraph.calls == 1
+    for response in (semantic, exact):
+        assert "event: papers" in response.text
+        assert '"synthesis": "S"' in response.text
+        assert f'"query_id": "{first["query_id"]}"' in response.text
+        assert '"cache_hit": true' in response.text
+        assert "event: done" in response.text
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_streams_share_one_run():
+    class _SlowGraph:
+        calls = 0
+
+        async def astream(self, state, config=None, stream_mode=None):
+            _SlowGraph.calls += 1
+            yield ("updates", {"reranker": {"all_papers": [{"title": "P"}]}})
+            await asyncio.sleep(0.2)
+            yield ("updates", {"synthesizer": {"synthesis": "S"}})
+
+    async def no_embedding(query):
+        return None
+
+    flight, cache = StreamFlight(), ResultCache()
+    with patch("src.api.main._graph", return_value=_SlowGraph()), patch(
+        "src.api.main._query_embedding", no_embedding
+    ), patch("src.api.main.stream_flight", flight), patch(
+        "src.api.main.result_cache", cache
+    ):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as ac:
+            body = {"query": "offline reinforcement learning", "max_papers": 4}
+            responses = await asyncio.gather(
+                *(ac.post("/analyze/stream", json=body) for _ in range(3))
+            )
+            again = await ac.post("/analyze", json=body)
+
+    assert _SlowGraph.calls == 1
+    assert {r.text for r in responses} == {responses[0].text}
+    assert "event: synthesis" in responses[0].text
+    assert flight.stats()["coalesced"] == 2
+    assert again.json()["cache_hit"] is True
+
+
+def test_pipeline_starts_while_the_semantic_lookup_is_in_flight():
+    started = []
+
+    class _FakeGraph:
+        async def ainvoke(self, state, config=None):
+            started.append("analyze")
+            return {"synthesis": "S", "errors": []}
+
+        async def astream(self, state, config=None, stream_mode=None):
+            started.append("stream")
+            yield ("updates", {"synthesizer": {"synthesis": "S"}})
+
+    graph_running_during_lookup = []
+
+    embeddings = {
+        "graph neural networks": [1.0, 0.0, 0.0],
+        "protein structure prediction": [0.0, 1.0, 0.0],
+    }
+
+    async def slow_embed(query):
+        await asyncio.sleep(0.05)
+        graph_running_during_lookup.append(bool(started))
+        started.clear()
+        return embeddings[query]
+
+    with patch("src.api.main._graph", return_value=_FakeGraph()), patch(
+        "src.api.main.embed_query", slow_embed
+    ), patch(
+        "src.api.main.default_query_cache",
+        return_value=SemanticQueryCache(":memory:", threshold=0.95),
+    ), patch(
+        "src.api.main.result_cache", ResultCache()
+    ):
+        analyzed = client.post(
+            "/analyze", json={"query": "graph neural networks", "max_papers": 4}
+        )
+        streamed = client.post(
+            "/analyze/stream",
+            json={"query": "protein structure prediction", "max_papers": 4},
+        )
+
+    assert analyzed.json()["cache_hit"] is False
+    assert '"cache_hit": false' in streamed.text
+    assert graph_running_during_lookup == [True, True]
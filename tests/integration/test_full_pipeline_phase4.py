@@ -1,22 +1,27 @@
+import secrets
+
 import pytest
 
+from src.graph.checkpoint import thread_config
 from src.graph.pipeline import graph
 from src.utils.cost_tracker import cost_tracker
 
 
 @pytest.mark.integration
-def test_full_pipeline_produces_synthesis_and_hypotheses():
+@pytest.mark.asyncio
+async def test_full_pipeline_produces_synthesis_and_hypotheses():
     """Real call — needs OPENAI_API_KEY, ANTHROPIC_API_KEY, PINECONE_API_KEY."""
-    query_id = "integration-phase4-001"
+    query_id = f"integration-phase4-{secrets.token_hex(4)}"
     cost_tracker.start_query(query_id)
 
-    result = graph.invoke(
+    result = await graph.ainvoke(
         {
             "query": "deep learning image segmentation",
             "query_id": query_id,
             "max_papers": 6,
             "errors": [],
-        }
+        },
+        thread_config(query_id),
     )
 
     try:
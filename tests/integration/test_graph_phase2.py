@@ -1,22 +1,27 @@
+import secrets
+
 import pytest
 
+from src.graph.checkpoint import thread_config
 from src.graph.pipeline import graph
 from src.utils.cost_tracker import cost_tracker
 
 
 @pytest.mark.integration
-def test_graph_fetches_papers_for_known_query():
+@pytest.mark.asyncio
+async def test_graph_fetches_papers_for_known_query():
     """Real network call — needs OPENAI_API_KEY set."""
-    query_id = "integration-phase2-001"
+    query_id = f"integration-phase2-{secrets.token_hex(4)}"
     cost_tracker.start_query(query_id)
 
-    result = graph.invoke(
+    result = await graph.ainvoke(
         {
             "query": "BERT pretraining language models",
             "query_id": query_id,
             "max_papers": 4,
             "errors": [],
-        }
+        },
+        thread_config(query_id),
     )
 
     try:
@@ -5,7 +5,8 @@ from src.utils.cost_tracker import cost_tracker
 
 
 @pytest.mark.integration
-def test_synthesis_contains_citation_bracket():
+@pytest.mark.asyncio
+async def test_synthesis_contains_citation_bracket():
     """Real Claude call — needs ANTHROPIC_API_KEY and PINECONE_API_KEY."""
     cost_tracker.start_query("integration-synthesis-001")
 
@@ -43,7 +44,7 @@ def test_synthesis_contains_citation_bracket():
         ],
     }
 
-    result = synthesizer_node(state)
+    result = await synthesizer_node(state)
 
     try:
         cost_tracker.finish_query()
@@ -0,0 +1,15 @@
+import pytest
+
+from src.utils.rate_governor import governor
+from src.utils.resilience import resilience
+
+
+@pytest.fixture(autouse=True)
+def reset_provider_state():
+    """Breakers opened and budgets spent by one test's stubs must not reject
+    or queue the next test's calls."""
+    resilience.reset()
+    governor.reset()
+    yield
+    resilience.reset()
+    governor.reset()
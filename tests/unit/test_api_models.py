@@ -1,7 +1,7 @@
 import pytest
 from pydantic import ValidationError
 
-from src.api.models import QueryRequest
+from src.api.models import JobRequest, QueryRequest
 
 
 def test_query_too_short_fails_validation():
@@ -16,6 +16,13 @@ def test_max_papers_out_of_range_fails():
         QueryRequest(query="a valid long enough query string here", max_papers=2)
 
 
+def test_jobs_accept_literature_review_sizes():
+    req = JobRequest(query="a valid long enough query string here", max_papers=300)
+    assert req.max_papers == 300
+    with pytest.raises(ValidationError):
+        JobRequest(query="a valid long enough query string here", max_papers=301)
+
+
 def test_valid_request_passes():
     req = QueryRequest(query="transformer attention mechanisms in NLP", max_papers=8)
     assert req.max_papers == 8
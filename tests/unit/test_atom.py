@@ -0,0 +1,66 @@
+import pytest
+
+from src.utils.atom import ArxivAPIError, AtomPaperParser, iter_atom_papers
+
+_FEED = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title>arXiv Query</title>
+  <entry>
+    <id>http://arxiv.org/abs/1706.03762v7</id>
+    <published>2017-06-12T17:57:34Z</published>
+    <title>Attention Is All
+      You Need</title>
+    <summary>The dominant sequence transduction models are based on
+  complex recurrent or convolutional neural networks.</summary>
+    <author><name>Ashish Vaswani</name></author>
+    <author><name>Noam Shazeer</name></author>
+  </entry>
+  <entry>
+    <id>http://arxiv.org/abs/1810.04805v2</id>
+    <published>2018-10-11T00:50:01Z</published>
+    <title>BERT</title>
+    <summary>We introduce a new language representation model.</summary>
+    <author><name>Jacob Devlin</name></author>
+  </entry>
+</feed>
+"""
+
+
+def test_parses_entries_into_paper_dicts():
+    papers = list(iter_atom_papers([_FEED]))
+    assert [p["id"] for p in papers] == [
+        "http://arxiv.org/abs/1706.03762v7",
+        "http://arxiv.org/abs/1810.04805v2",
+    ]
+    first = papers[0]
+    assert first["title"] == "Attention Is All You Need"
+    assert first["abstract"].startswith("The dominant sequence transduction models")
+    assert "\n" not in first["abstract"]
+    assert first["authors"] == ["Ashish Vaswani", "Noam Shazeer"]
+    assert first["year"] == 2017
+    assert first["url"] == first["id"]
+    assert (first["source"], first["citation_count"]) == ("arxiv", 0)
+
+
+def test_yields_each_entry_as_soon_as_it_closes():
+    parser = AtomPaperParser()
+    split = _FEED.index(b"</entry>") + len(b"</entry>")
+    assert [p["title"] for p in parser.feed(_FEED[:split])] == [
+        "Attention Is All You Need"
+    ]
+    assert [p["title"] for p in parser.feed(_FEED[split:])] == ["BERT"]
+    assert parser.close() == []
+
+
+def test_byte_at_a_time_chunks_match_whole_feed():
+    chunks = [_FEED[i : i + 1] for i in range(len(_FEED))]
+    assert list(iter_atom_papers(chunks)) == list(iter_atom_papers([_FEED]))
+
+
+def test_api_error_entry_raises():
+    feed = b"""<feed xmlns="http://www.w3.org/2005/Atom"><entry>
+      <id>http://arxiv.org/api/errors#incorrect_id_format_for_1234</id>
+      <title>Error</title><summary>incorrect id format for 1234</summary>
+    </entry></feed>"""
+    with pytest.raises(ArxivAPIError, match="incorrect id format"):
+        list(iter_atom_papers([feed]))
@@ -0,0 +1,212 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.graph.checkpoint import SQLiteCheckpointSaver, thread_config
+from src.graph.deadline import resume_input
+from src.graph.memo import LRUMemoBackend
+from src.graph.pipeline import build_graph
+
+_CALLS: dict[str, int] = {}
+
+
+def _stub(name: str, update: dict):
+    async def node(state):
+        _CALLS[name] = _CALLS.get(name, 0) + 1
+        return update
+
+    return node
+
+
+def _failing_hypothesis():
+    async def node(state):
+        _CALLS["hypothesis_generator"] = _CALLS.get("hypothesis_generator", 0) + 1
+        raise RuntimeError("Lambda timed out")
+
+    return node
+
+
+def _build(saver, hypothesis, **nodes):
+    stubs = {
+        "router_node": _stub("router", {"query": "q kw"}),
+        "arxiv_fetcher": _stub("arxiv_fetcher", {"arxiv_papers": [{"title": "P"}]}),
+        "semantic_scholar_fetcher": _stub("semantic_scholar_fetcher", {}),
+        "deduplicator_node": _stub("deduplicator", {"all_papers": [{"title": "P"}]}),
+        "reranker_node": _stub("reranker", {}),
+        "synthesizer_node": _stub("synthesizer", {"synthesis": "S"}),
+        "contradiction_node": _stub("contradiction_detector", {"contradictions": []}),
+        "indexer_node": _stub("pinecone_indexer", {}),
+        "hypothesis_node": hypothesis,
+        "cost_auditor_node": _stub("cost_auditor", {"cost_report": {"x": 1}}),
+        **nodes,
+    }
+    patches = [patch(f"src.graph.pipeline.{name}", fn) for name, fn in stubs.items()]
+    for p in patches:
+        p.start()
+    try:
+        return build_graph(checkpointer=saver, memo_backend=LRUMemoBackend())
+    finally:
+        for p in patches:
+            p.stop()
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    _CALLS.clear()
+
+
+@pytest.mark.asyncio
+async def test_checkpoints_persist_across_saver_instances(tmp_path):
+    db = str(tmp_path / "ckpt.sqlite")
+    graph = _build(SQLiteCheckpointSaver(db), _stub("hypothesis_generator", {}))
+    await graph.ainvoke({"query": "q", "query_id": "t1"}, thread_config("t1"))
+
+    reopened = SQLiteCheckpointSaver(db)
+    saved = reopened.get_tuple(thread_config("t1"))
+    assert saved is not None
+    assert saved.checkpoint["channel_values"]["synthesis"] == "S"
+    assert len(list(reopened.list(thread_config("t1")))) > 1
+
+
+@pytest.mark.asyncio
+async def test_resume_continues_from_last_completed_node(tmp_path):
+    db = str(tmp_path / "ckpt.sqlite")
+    config = thread_config("t2")
+
+    crashing = _build(SQLiteCheckpointSaver(db), _failing_hypothesis())
+    with pytest.raises(RuntimeError):
+        await crashing.ainvoke({"query": "q", "query_id": "t2"}, config)
+
+    # A fresh process (new saver, new graph) picks the run up where it stopped
+    fixed = _build(
+        SQLiteCheckpointSaver(db),
+        _stub("hypothesis_generator", {"hypotheses": [{"hypothesis": "H"}]}),
+    )
+    snapshot = await fixed.aget_state(config)
+    assert snapshot.next == ("hypothesis_generator",)
+
+    result = await fixed.ainvoke(None, config)
+
+    assert result["hypotheses"] == [{"hypothesis": "H"}]
+    assert result["cost_report"] == {"x": 1}
+    for upstream in (
+        "router",
+        "arxiv_fetcher",
+        "synthesizer",
+        "contradiction_detector",
+    ):
+        assert _CALLS[upstream] == 1, f"{upstream} was re-run on resume"
+    assert _CALLS["hypothesis_generator"] == 2
+
+
+def test_delete_thread_removes_checkpoints(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.sqlite"))
+    graph = _build(saver, _stub("hypothesis_generator", {}))
+    asyncio.run(graph.ainvoke({"query": "q", "query_id": "t3"}, thread_config("t3")))
+    saver.delete_thread("t3")
+    assert saver.get_tuple(thread_config("t3")) is None
+
+
+@pytest.mark.asyncio
+async def test_resume_gets_a_fresh_deadline(tmp_path):
+    config = thread_config("t4")
+    seen = []
+
+    async def recording_hypothesis(state):
+        seen.append(state["deadline"])
+        return {"hypotheses": []}
+
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.sqlite"))
+    crashing = _build(saver, _failing_hypothesis())
+    with pytest.raises(RuntimeError):
+        await crashing.ainvoke(
+            {"query": "q", "query_id": "t4", "deadline": 1.0}, config
+        )
+
+    fixed = _build(saver, recording_hypothesis)
+    inputs, deadline = resume_input(25)
+    await fixed.ainvoke(inputs, config)
+
+    assert seen == [deadline]
+    assert _CALLS["synthesizer"] == 1
+
+
+@pytest.mark.asyncio
+async def test_resume_mid_fan_out_reruns_only_the_failed_branch(tmp_path):
+    config = thread_config("t9")
+    seen = []
+
+    async def failing_contradiction(state):
+        _CALLS["contradiction_detector"] = _CALLS.get("contradiction_detector", 0) + 1
+        raise RuntimeError("Lambda timed out")
+
+    async def recording_contradiction(state):
+        seen.append(state["deadline"])
+        return {"contradictions": []}
+
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.sqlite"))
+    crashing = _build(
+        saver,
+        _stub("hypothesis_generator", {}),
+        contradiction_node=failing_contradiction,
+    )
+    with pytest.raises(RuntimeError):
+        await crashing.ainvoke(
+            {"query": "q", "query_id": "t9", "deadline": 1.0}, config
+        )
+    # The synthesizer and indexer finished in the same superstep
+    assert _CALLS["synthesizer"] == 1
+    assert _CALLS["pinecone_indexer"] == 1
+
+    fixed = _build(
+        saver,
+        _stub("hypothesis_generator", {}),
+        contradiction_node=recording_contradiction,
+    )
+    inputs, deadline = resume_input(25)
+    result = await fixed.ainvoke(inputs, config)
+
+    assert seen == [deadline]
+    assert result["synthesis"] == "S"
+    assert result["cost_report"] == {"x": 1}
+    assert _CALLS["synthesizer"] == 1, "synthesizer was re-run on resume"
+    assert _CALLS["pinecone_indexer"] == 1, "indexer was re-run on resume"
+
+
+def _rows(saver) -> dict:
+    return {
+        table: saver._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("checkpoints", "writes", "threads")
+    }
+
+
+@pytest.mark.asyncio
+async def test_completed_run_leaves_no_rows_behind(tmp_path):
+    from src.api.main import _invoke_by_deadline
+
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.sqlite"))
+    graph = _build(saver, _stub("hypothesis_generator", {}))
+    await _invoke_by_deadline(graph, {"query": "q", "query_id": "t5"}, "t5", None)
+    assert _rows(saver) == {"checkpoints": 0, "writes": 0, "threads": 0}
+
+
+@pytest.mark.asyncio
+async def test_abandoned_threads_are_swept_when_a_new_one_starts(tmp_path):
+    saver = SQLiteCheckpointSaver(str(tmp_path / "ckpt.sqlite"), ttl_s=3600)
+    crashing = _build(saver, _failing_hypothesis())
+    with pytest.raises(RuntimeError):
+        await crashing.ainvoke({"query": "q", "query_id": "t6"}, thread_config("t6"))
+    with pytest.raises(RuntimeError):
+        await crashing.ainvoke({"query": "q", "query_id": "t7"}, thread_config("t7"))
+    # t6 looks long abandoned; t7 was just written and must survive
+    saver._conn.execute("UPDATE threads SET updated_at = 0 WHERE thread_id = 't6'")
+
+    graph = _build(saver, _stub("hypothesis_generator", {}))
+    await graph.ainvoke({"query": "q", "query_id": "t8"}, thread_config("t8"))
+
+    assert saver.get_tuple(thread_config("t6")) is None
+    assert saver.get_tuple(thread_config("t7")) is not None
+    assert saver._conn.execute(
+        "SELECT COUNT(*) FROM writes WHERE thread_id = 't6'"
+    ).fetchone() == (0,)
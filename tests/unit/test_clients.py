@@ -0,0 +1,220 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from src.utils.clients import ClientRegistry, PoolLimits
+
+
+async def _serve_keepalive():
+    """Minimal HTTP/1.1 server that keeps connections open between requests."""
+    accepted = []
+
+    async def handle(reader, writer):
+        accepted.append(writer)
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok"
+                )
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()  # the client hung up
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, accepted
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_per_provider():
+    registry = ClientRegistry(PoolLimits())
+    assert registry.http("openai") is registry.http("openai")
+    assert registry.http("openai") is not registry.http("anthropic")
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_requests_reuse_one_keepalive_connection():
+    server, accepted = await _serve_keepalive()
+    port = server.sockets[0].getsockname()[1]
+    registry = ClientRegistry(PoolLimits(max_keepalive=4))
+
+    http = registry.http("local")
+    for _ in range(3):
+        response = await http.get(f"http://127.0.0.1:{port}/")
+        assert response.text == "ok"
+
+    stats = registry.metrics()["local"]
+    assert stats["requests"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["connections"] == 1
+    assert stats["idle"] == 1
+    assert len(accepted) == 1
+
+    await registry.aclose()
+    server.close()
+
+
+def test_pools_are_rebuilt_for_a_new_event_loop():
+    registry = ClientRegistry(PoolLimits())
+
+    async def get():
+        return registry.http("openai")
+
+    first = asyncio.run(get())
+    second = asyncio.run(get())
+    assert first is not second
+    assert registry.metrics()["openai"]["clients_created"] == 2
+
+
+@contextmanager
+def _loop_in_thread():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield loop
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def _on(loop, coro):
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout=5)
+
+
+def _eventually(predicate, timeout_s=2.0) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+async def _get(registry, port):
+    response = await registry.http("local").get(f"http://127.0.0.1:{port}/")
+    return response.text
+
+
+def test_pools_of_a_closed_loop_are_shut_down_on_rebind():
+    registry = ClientRegistry(PoolLimits())
+    with _loop_in_thread() as server_loop:
+        server, accepted = _on(server_loop, _serve_keepalive())
+        port = server.sockets[0].getsockname()[1]
+
+        assert asyncio.run(_get(registry, port)) == "ok"
+        assert not accepted[0].is_closing()  # kept alive in the stale pool
+
+        asyncio.run(_get(registry, port))
+        assert _eventually(lambda: accepted[0].is_closing())
+        server_loop.call_soon_threadsafe(server.close)
+
+
+def test_pools_of_a_running_loop_are_closed_there_on_rebind():
+    registry = ClientRegistry(PoolLimits())
+    with _loop_in_thread() as old_loop:
+        server, accepted = _on(old_loop, _serve_keepalive())
+        port = server.sockets[0].getsockname()[1]
+        assert _on(old_loop, _get(registry, port)) == "ok"
+        stale = registry._http["local"]
+
+        async def rebind():
+            return registry.http("local")
+
+        assert asyncio.run(rebind()) is not stale
+        assert _eventually(lambda: stale.is_closed and accepted[0].is_closing())
+        old_loop.call_soon_threadsafe(server.close)
+
+
+@pytest.mark.asyncio
+async def test_chat_models_are_cached_and_use_the_pool(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    registry = ClientRegistry(PoolLimits())
+
+    openai_llm = registry.chat_openai("gpt-4o-mini", temperature=0)
+    assert registry.chat_openai("gpt-4o-mini", temperature=0) is openai_llm
+    assert registry.chat_openai("gpt-4o-mini", temperature=0.5) is not openai_llm
+    assert openai_llm.http_async_client is registry.http("openai")
+
+    claude = registry.chat_anthropic("claude-sonnet-4-6", temperature=0)
+    assert registry.chat_anthropic("claude-sonnet-4-6", temperature=0) is claude
+    assert claude._async_client._client is registry.http("anthropic")
+    await registry.aclose()
+
+
+def test_pool_limits_from_env(monkeypatch):
+    monkeypatch.setenv("HTTP_MAX_CONNECTIONS", "10")
+    monkeypatch.setenv("HTTP_MAX_KEEPALIVE", "5")
+    monkeypatch.setenv("HTTP2", "0")
+    limits = PoolLimits.from_env()
+    assert (limits.max_connections, limits.max_keepalive, limits.http2) == (
+        10,
+        5,
+        False,
+    )
+
+
+# The registry leans on these SDK internals; pins in requirements.txt are the
+# versions they were checked against. An upgrade that moves them fails here.
+_TESTED_VERSIONS = {
+    "httpx": "0.28.1",
+    "httpcore": "1.0.9",
+    "anthropic": "0.84.0",
+    "langchain-anthropic": "1.3.4",
+    "pinecone": "8.1.0",
+}
+
+
+def test_requirements_pin_the_tested_sdk_versions():
+    from pathlib import Path
+
+    pins = dict(
+        line.strip().split("==", 1)
+        for line in Path("requirements.txt").read_text().splitlines()
+        if "==" in line
+    )
+    assert {name: pins.get(name) for name in _TESTED_VERSIONS} == _TESTED_VERSIONS
+
+
+def test_sdk_internals_the_registry_relies_on_still_exist():
+    from functools import cached_property
+
+    import httpx
+    from langchain_anthropic import ChatAnthropic
+    from pinecone import Pinecone
+
+    from src.utils.clients import _connections, _urllib3_pools
+
+    # PooledChatAnthropic overrides the cached client ChatAnthropic calls
+    assert isinstance(ChatAnthropic.__dict__.get("_async_client"), cached_property)
+    for field in (
+        "anthropic_api_key",
+        "anthropic_api_url",
+        "max_retries",
+        "default_headers",
+        "default_request_timeout",
+    ):
+        assert field in ChatAnthropic.model_fields
+
+    transport = httpx.AsyncHTTPTransport()
+    assert hasattr(transport._pool, "connections")
+    assert _connections(transport) == []
+    # _shut_down_sockets reaches the socket through the connection's stream
+    import httpcore
+
+    for connection_class in (
+        httpcore.AsyncHTTP11Connection,
+        httpcore.AsyncHTTP2Connection,
+    ):
+        assert "_network_stream" in connection_class.__init__.__code__.co_names
+    assert "_connection" in httpcore.AsyncHTTPConnection.__init__.__code__.co_names
+
+    index = Pinecone(api_key="test").Index(host="https://example.invalid")
+    pools = index._vector_api.api_client.rest_client.pool_manager.pools
+    assert hasattr(pools, "_container")
+    assert _urllib3_pools(index) == []
@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.utils.clustering import topic_chunks
+
+
+def _topics(sizes: list[int], dim: int = 16, seed: int = 0) -> np.ndarray:
+    """Rows scattered tightly around one random direction per topic, interleaved."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for topic, size in enumerate(sizes):
+        center = rng.normal(size=dim)
+        rows += [(topic, center + 0.05 * rng.normal(size=dim)) for _ in range(size)]
+    order = rng.permutation(len(rows))
+    labels = np.array([rows[i][0] for i in order])
+    return np.array([rows[i][1] for i in order]), labels
+
+
+def test_groups_rows_by_topic():
+    vectors, labels = _topics([10, 10, 10])
+    chunks = topic_chunks(vectors, max_size=10)
+    assert len(chunks) == 3
+    for chunk in chunks:
+        assert len(set(labels[chunk])) == 1
+
+
+def test_no_chunk_exceeds_max_size():
+    vectors, _ = _topics([25, 3, 2])
+    chunks = topic_chunks(vectors, max_size=12)
+    assert len(chunks) == 3
+    assert all(len(c) <= 12 for c in chunks)
+    assert sorted(i for c in chunks for i in c) == list(range(30))
+
+
+def test_chunks_keep_input_order():
+    vectors, _ = _topics([8, 8])
+    chunks = topic_chunks(vectors, max_size=8)
+    assert all(c == sorted(c) for c in chunks)
+    assert chunks[0][0] == 0
+
+
+def test_small_inputs_are_one_chunk():
+    assert topic_chunks(np.ones((5, 4)), max_size=12) == [[0, 1, 2, 3, 4]]
+    assert topic_chunks(np.zeros((0, 4)), max_size=12) == []
@@ -1,5 +1,6 @@
 import json
-from unittest.mock import MagicMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -49,18 +50,20 @@ def mock_cost():
 # ── tests ───────────────────────────────────────────────────────────────────
 
 
-def test_returns_empty_for_fewer_than_two_papers():
-    with patch("src.agents.contradiction.ChatOpenAI") as mock_cls:
-        result = contradiction_node({"all_papers": _papers(1)})
+@pytest.mark.asyncio
+async def test_returns_empty_for_fewer_than_two_papers():
+    with patch("src.agents.contradiction._llm") as mock_cls:
+        result = await contradiction_node({"all_papers": _papers(1)})
     assert result["contradictions"] == []
     mock_cls.assert_not_called()
 
 
-def test_parses_valid_contradiction_response():
+@pytest.mark.asyncio
+async def test_parses_valid_contradiction_response():
     content = json.dumps({"contradictions": [_VALID_ITEM]})
-    with patch("src.agents.contradiction.ChatOpenAI") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response(content)
-        result = contradiction_node({"all_papers": _papers(2)})
+    with patch("src.agents.contradiction._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        result = await contradiction_node({"all_papers": _papers(2)})
     assert len(result["contradictions"]) == 1
     c = result["contradictions"][0]
     assert c["claim_a"] == "Approach X is superior"
@@ -68,43 +71,198 @@ def test_parses_valid_contradiction_response():
     assert c["topic"] == "methodology"
 
 
-def test_empty_contradictions_response_is_valid():
+@pytest.mark.asyncio
+async def test_empty_contradictions_response_is_valid():
     content = json.dumps({"contradictions": []})
-    with patch("src.agents.contradiction.ChatOpenAI") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response(content)
-        result = contradiction_node({"all_papers": _papers(3)})
+    with patch("src.agents.contradiction._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        result = await contradiction_node({"all_papers": _papers(3)})
     assert result["contradictions"] == []
     assert not result.get("errors")
 
 
-def test_handles_json_parse_failure_gracefully():
-    with patch("src.agents.contradiction.ChatOpenAI") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response("not valid json {{")
-        result = contradiction_node({"all_papers": _papers(2)})
+@pytest.mark.asyncio
+async def test_handles_json_parse_failure_gracefully():
+    with patch("src.agents.contradiction._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(
+            return_value=_mock_response("not valid json {{")
+        )
+        result = await contradiction_node({"all_papers": _papers(2)})
     assert result["contradictions"] == []
     assert len(result.get("errors", [])) == 1
     assert "contradiction_detector" in result["errors"][0]
 
 
-def test_severity_values_are_constrained():
+@pytest.mark.asyncio
+async def test_severity_values_are_constrained():
     bad_item = {**_VALID_ITEM, "severity": "critical"}  # invalid value
     content = json.dumps({"contradictions": [bad_item]})
-    with patch("src.agents.contradiction.ChatOpenAI") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response(content)
-        result = contradiction_node({"all_papers": _papers(2)})
+    with patch("src.agents.contradiction._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        result = await contradiction_node({"all_papers": _papers(2)})
     assert result["contradictions"][0]["severity"] in {"high", "medium", "low"}
 
 
-def test_caps_paper_input_at_eight():
+@pytest.mark.asyncio
+async def test_paper_input_is_capped_by_token_budget():
     content = json.dumps({"contradictions": []})
-    with patch("src.agents.contradiction.ChatOpenAI") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response(content)
-        contradiction_node({"all_papers": _papers(20)})
+    papers = _papers(8)  # one cluster
+    for p in papers:
+        p["abstract"] = "We study transformers. " * 40
+    with (
+        patch("src.agents.contradiction._PROMPT_TOKENS", 300),
+        patch("src.agents.contradiction._llm") as mock_cls,
+    ):
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        await contradiction_node({"all_papers": papers})
 
-    # Extract the HumanMessage content from the invoke call
-    messages = mock_cls.return_value.invoke.call_args[0][0]
+    # Extract the HumanMessage content from the ainvoke call
+    messages = mock_cls.return_value.ainvoke.call_args[0][0]
     prompt_text = messages[1].content  # index 1 = HumanMessage
 
-    # Papers 0-7 may appear; papers 8-19 must NOT
-    for i in range(8, 20):
-        assert f"Paper {i}" not in prompt_text
+    # Leading papers fill the budget in order; abstracts end on a whole sentence
+    assert "Paper 0" in prompt_text
+    assert "Paper 7" not in prompt_text
+    assert "transformers. We" in prompt_text
+    assert "…" not in prompt_text
+
+
+@pytest.mark.asyncio
+async def test_short_budget_compares_fewer_papers():
+    content = json.dumps({"contradictions": []})
+    state = {"all_papers": _papers(20), "deadline": time.time() + 6}
+    with patch("src.agents.contradiction._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        result = await contradiction_node(state)
+
+    prompt_text = mock_cls.return_value.ainvoke.call_args[0][0][1].content
+    assert "Paper 3" in prompt_text
+    assert "Paper 4" not in prompt_text
+    assert result["errors"][0].startswith("contradiction_detector: degraded")
+
+
+def _topic_vectors(n, topics=3):
+    """Paper i belongs to topic i % topics."""
+    return [[1.0 if i % topics == t else 0.0 for t in range(topics)] for i in range(n)]
+
+
+def _claiming(papers):
+    for p in papers:
+        p["abstract"] = f"{p['title']} outperforms the baseline on every benchmark."
+    return papers
+
+
+@pytest.mark.asyncio
+async def test_large_sets_get_one_call_per_topic_cluster():
+    content = json.dumps({"contradictions": []})
+    with (
+        patch(
+            "src.agents.contradiction.embed_texts_cached",
+            AsyncMock(return_value=_topic_vectors(24)),
+        ),
+        patch("src.agents.contradiction._llm") as mock_cls,
+    ):
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        result = await contradiction_node({"all_papers": _claiming(_papers(24))})
+
+    prompts = [c[0][0][1].content for c in mock_cls.return_value.ainvoke.call_args_list]
+    assert len(prompts) == 3
+    # Each call holds one topic; papers past the eighth are compared too
+    assert "Paper 0 " in prompts[0] and "Paper 3 " in prompts[0]
+    assert "Paper 1 " not in prompts[0]
+    assert any("Paper 23 " in p for p in prompts)
+    assert not result.get("errors")
+
+
+@pytest.mark.asyncio
+async def test_clusters_without_plausible_conflicts_are_skipped():
+    papers = _claiming(_papers(16))
+    for p in papers[1::2]:  # topic 1: descriptive abstracts only
+        p["abstract"] = "A survey of datasets."
+    content = json.dumps({"contradictions": []})
+    with (
+        patch(
+            "src.agents.contradiction.embed_texts_cached",
+            AsyncMock(return_value=_topic_vectors(16, topics=2)),
+        ),
+        patch("src.agents.contradiction._llm") as mock_cls,
+    ):
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        await contradiction_node({"all_papers": papers})
+
+    assert mock_cls.return_value.ainvoke.call_count == 1
+    assert "Paper 0 " in mock_cls.return_value.ainvoke.call_args[0][0][1].content
+
+
+@pytest.mark.asyncio
+async def test_cluster_results_are_merged_and_deduplicated():
+    swapped = {
+        **_VALID_ITEM,
+        "claim_a": "approach y is superior.",
+        "claim_b": "Approach  X is SUPERIOR",
+        "severity": "low",
+    }
+    other = {**_VALID_ITEM, "claim_a": "Z helps", "claim_b": "Z hurts"}
+    responses = [
+        _mock_response(json.dumps({"contradictions": [swapped]})),
+        _mock_response(json.dumps({"contradictions": [_VALID_ITEM, other]})),
+        _mock_response("not valid json {{"),
+    ]
+    with (
+        patch(
+            "src.agents.contradiction.embed_texts_cached",
+            AsyncMock(return_value=_topic_vectors(24)),
+        ),
+        patch("src.agents.contradiction._llm") as mock_cls,
+    ):
+        mock_cls.return_value.ainvoke = AsyncMock(side_effect=responses)
+        result = await contradiction_node({"all_papers": _claiming(_papers(24))})
+
+    claims = [(c["claim_a"], c["severity"]) for c in result["contradictions"]]
+    # The same pair in either order and any casing is kept once, at its highest severity
+    assert len(claims) == 2
+    assert result["contradictions"][0]["severity"] == "high"
+    assert ("Z helps", "high") in claims
+    assert result["errors"] == [
+        "contradiction_detector: cluster 3 of 3: JSON parse failed: "
+        "Expecting value: line 1 column 1 (char 0)"
+    ]
+
+
+# Typical abstracts that report their own results without contesting anyone's
+_ROUTINE_ABSTRACTS = [
+    "We propose a sparse attention scheme. We show that it achieves "
+    "state-of-the-art results and improves accuracy by 3%.",
+    "This paper presents a benchmark for long-context retrieval. Our findings "
+    "suggest that retrieval quality increases with context length.",
+    "We introduce a pretraining objective and demonstrate significant gains on "
+    "GLUE, providing evidence that denoising helps.",
+    "We found that curriculum learning reduces training time and is effective "
+    "across model sizes.",
+]
+
+
+@pytest.mark.asyncio
+async def test_routine_findings_do_not_count_as_conflicting_claims():
+    papers = _papers(16)
+    for i, p in enumerate(papers):
+        if i % 2:  # topic 1: routine positive findings
+            p["abstract"] = _ROUTINE_ABSTRACTS[i // 2 % len(_ROUTINE_ABSTRACTS)]
+        elif i % 4:
+            p["abstract"] = "Sparse attention outperforms dense attention."
+        else:
+            p["abstract"] = "We find no significant gain from sparse attention."
+    content = json.dumps({"contradictions": []})
+    with (
+        patch(
+            "src.agents.contradiction.embed_texts_cached",
+            AsyncMock(return_value=_topic_vectors(16, topics=2)),
+        ),
+        patch("src.agents.contradiction._llm") as mock_cls,
+    ):
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        await contradiction_node({"all_papers": papers})
+
+    # Only the topic where papers contest each other is sent
+    assert mock_cls.return_value.ainvoke.call_count == 1
+    assert "**Paper 0**" in mock_cls.return_value.ainvoke.call_args[0][0][1].content
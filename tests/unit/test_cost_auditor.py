@@ -28,9 +28,10 @@ def mock_finish_query():
         yield
 
 
-def test_cost_report_populated_in_state():
+@pytest.mark.asyncio
+async def test_cost_report_populated_in_state():
     with patch("src.agents.cost_auditor.log_query"):
-        result = cost_auditor_node(_STATE)
+        result = await cost_auditor_node(_STATE)
 
     assert "cost_report" in result
     assert result["cost_report"]["query_id"] == "test-q"
@@ -38,12 +39,13 @@ def test_cost_report_populated_in_state():
     assert result["cost_report"]["total_latency_ms"] == 1500.0
 
 
-def test_supabase_failure_does_not_propagate():
+@pytest.mark.asyncio
+async def test_supabase_failure_does_not_propagate():
     with patch(
         "src.agents.cost_auditor.log_query", side_effect=Exception("Supabase down")
     ):
         # must not raise
-        result = cost_auditor_node(_STATE)
+        result = await cost_auditor_node(_STATE)
 
     assert "cost_report" in result
     assert result["cost_report"]["total_cost_usd"] == 0.05
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from src.utils.cost_tracker import CostTracker, CostLimitExceededError
@@ -76,3 +78,98 @@ def test_claude_costs_more_than_gpt_same_tokens(fresh_tracker):
     tracker.finish_query()
 
     assert claude_cost > gpt_cost
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_are_isolated(fresh_tracker):
+    tracker = fresh_tracker
+
+    async def run_query(query_id: str, n_calls: int) -> dict:
+        tracker.start_query(query_id)
+        for _ in range(n_calls):
+            tracker.track_call("router", "gpt-4o-mini", 1000, 0, 10)
+            await asyncio.sleep(0)  # interleave with the other queries
+        return tracker.finish_query()
+
+    reports = await asyncio.gather(*(run_query(f"q{i}", i + 1) for i in range(10)))
+
+    for i, report in enumerate(reports):
+        assert report["query_id"] == f"q{i}"
+        assert len(report["breakdown"]) == i + 1
+        assert abs(report["total_cost_usd"] - (i + 1) * 0.00015) < 1e-9
+
+
+@pytest.mark.asyncio
+async def test_child_tasks_record_into_parent_query(fresh_tracker):
+    tracker = fresh_tracker
+
+    async def node(name: str) -> None:
+        tracker.track_call(name, "gpt-4o-mini", 100, 50, 10)
+
+    async def run_query() -> dict:
+        tracker.start_query("parent")
+        # Graph nodes run as child tasks/threads of the request task
+        await asyncio.gather(node("synthesizer"), node("contradiction_detector"))
+        await asyncio.to_thread(tracker.track_call, "dedup", "gpt-4o-mini", 1, 1, 1)
+        return tracker.finish_query()
+
+    report = await asyncio.create_task(run_query())
+    names = {n["node_name"] for n in report["breakdown"]}
+    assert names == {"synthesizer", "contradiction_detector", "dedup"}
+    # The request task's context is gone; nothing leaks into this one
+    assert tracker._report is None
+
+
+def test_cache_stats_reported_with_hit_rate(fresh_tracker):
+    tracker = fresh_tracker
+    tracker.start_query("q-cache")
+    model = "text-embedding-3-small"
+    tracker.track_cache("embeddings", 3, 1, model=model, tokens_saved=1_000_000)
+    tracker.track_cache("embeddings", 1, 3, model=model)
+    report = tracker.finish_query()
+    stats = report["caches"]["embeddings"]
+    assert (stats["hits"], stats["misses"]) == (4, 4)
+    assert stats["hit_rate"] == 0.5
+    assert stats["tokens_saved"] == 1_000_000
+    assert abs(stats["cost_saved_usd"] - 0.02) < 1e-9
+    # Savings are not charged to the query
+    assert report["total_cost_usd"] == 0.0
+
+
+def test_prompt_cache_tokens_priced_and_reported(fresh_tracker):
+    tracker = fresh_tracker
+    tracker.start_query("q-prompt-cache")
+    # claude-sonnet-4: $3 input, $0.30 cache read, $3.75 cache write per 1M
+    write = tracker.track_call(
+        "synthesizer", "claude-sonnet-4-6", 1_000_000, 0, 10, cache_write_tokens=900_000
+    )
+    read = tracker.track_call(
+        "hypothesis_generator",
+        "claude-sonnet-4-6",
+        1_000_000,
+        0,
+        10,
+        cache_read_tokens=900_000,
+    )
+    assert abs(write - (0.3 + 3.375)) < 1e-9
+    assert abs(read - (0.3 + 0.27)) < 1e-9
+    report = tracker.finish_query()
+    assert report["breakdown"][1]["cache_read_tokens"] == 900_000
+    assert report["prompt_cache"]["synthesizer"]["hit_ratio"] == 0.0
+    assert report["prompt_cache"]["hypothesis_generator"]["hit_ratio"] == 0.9
+
+
+def test_cancelled_hedge_charged_at_estimated_prompt(fresh_tracker):
+    tracker = fresh_tracker
+    # Outside a query there is nothing to charge it to
+    assert tracker.track_cancelled_hedge("router", "gpt-4o-mini", 1000) == 0.0
+
+    tracker.start_query("q-hedge")
+    tracker.track_call("router", "gpt-4o-mini", 1000, 100, 50)
+    cost = tracker.track_cancelled_hedge("router", "gpt-4o-mini", 1_000_000)
+    assert abs(cost - 0.15) < 1e-9
+    report = tracker.finish_query()
+    hedge = report["breakdown"][1]
+    assert hedge["node_name"] == "router:cancelled_hedge"
+    assert (hedge["input_tokens"], hedge["output_tokens"]) == (1_000_000, 0)
+    assert abs(report["total_cost_usd"] - (0.00021 + 0.15)) < 1e-9
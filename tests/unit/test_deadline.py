@@ -0,0 +1,26 @@
+import time
+
+from src.graph.deadline import Tier, call_deadline, pick_tier, remaining_s
+
+_TIERS = (Tier(min_s=10, model="big"), Tier(min_s=4, model="small"))
+
+
+def test_no_deadline_means_unbounded():
+    assert remaining_s({}) is None
+    assert pick_tier({}, _TIERS).model == "big"
+    assert call_deadline({}, "openai") == 20.0
+
+
+def test_tier_follows_remaining_budget():
+    now = time.time()
+    assert pick_tier({"deadline": now + 30}, _TIERS).model == "big"
+    assert pick_tier({"deadline": now + 6}, _TIERS).model == "small"
+    assert pick_tier({"deadline": now + 1}, _TIERS) is None
+    assert pick_tier({"deadline": now - 5}, _TIERS) is None
+
+
+def test_call_deadline_is_capped_by_the_run():
+    now = time.time()
+    assert call_deadline({"deadline": now + 300}, "supabase") == 5.0
+    assert 2.5 < call_deadline({"deadline": now + 3}, "openai") <= 3.0
+    assert call_deadline({"deadline": now - 1}, "openai") == 0.1
@@ -14,8 +14,11 @@ def _paper(title, source="arxiv", citation_count=0, year=2023, abstract=None):
     }
 
 
-def _run(arxiv_papers=None):
-    state = {"arxiv_papers": arxiv_papers or []}
+def _run(arxiv_papers=None, semantic_scholar_papers=None):
+    state = {
+        "arxiv_papers": arxiv_papers or [],
+        "semantic_scholar_papers": semantic_scholar_papers or [],
+    }
     return deduplicator_node(state)["all_papers"]
 
 
@@ -39,6 +42,19 @@ def test_deduplicates_with_punctuation_differences():
     assert len(papers) == 1
 
 
+def test_merges_sources_keeping_semantic_scholar_citations():
+    papers = _run(
+        arxiv_papers=[_paper("Attention Is All You Need"), _paper("Arxiv Only")],
+        semantic_scholar_papers=[
+            _paper("Attention is all you need", "semantic_scholar", 120000)
+        ],
+    )
+    assert [p["title"] for p in papers] == [
+        "Attention is all you need",
+        "Arxiv Only",
+    ]
+
+
 def test_keeps_higher_citation_count_on_dedup():
     papers = _run(
         arxiv_papers=[
@@ -83,3 +99,46 @@ def test_sorted_by_citation_descending():
     )
     counts = [p["citation_count"] for p in papers]
     assert counts == sorted(counts, reverse=True)
+
+
+_ABSTRACT = (
+    "We propose a sparse hierarchical transformer for long document "
+    "summarization that scales attention to thousands of tokens while "
+    "matching dense baselines on arXiv and PubMed summarization benchmarks."
+)
+
+
+def test_merges_retitled_version_keeping_more_cited():
+    papers = _run(
+        arxiv_papers=[
+            _paper(
+                "Sparse Hierarchical Transformers", citation_count=3, abstract=_ABSTRACT
+            ),
+            _paper(
+                "Sparse Hierarchical Transformers for Long Documents",
+                citation_count=40,
+                abstract=_ABSTRACT + " Code is released.",
+            ),
+            _paper(
+                "Message Passing for Molecules",
+                abstract="We study message passing networks for predicting "
+                "molecular properties with a new permutation invariant readout.",
+            ),
+        ]
+    )
+    assert len(papers) == 2
+    assert papers[0]["citation_count"] == 40
+
+
+def test_same_topic_different_abstracts_kept():
+    papers = _run(
+        arxiv_papers=[
+            _paper("Sparse Hierarchical Transformers", abstract=_ABSTRACT),
+            _paper(
+                "Efficient Long Context Summarization",
+                abstract="Long context summarization is studied with a linear "
+                "attention encoder and a retrieval step over document chunks.",
+            ),
+        ]
+    )
+    assert len(papers) == 2
@@ -0,0 +1,48 @@
+import numpy as np
+
+from src.storage.embedding_cache import EmbeddingCache, cache_key, split_tokens
+
+MODEL = "text-embedding-3-small"
+
+
+def test_miss_then_hit_round_trips_float32():
+    cache = EmbeddingCache(":memory:")
+    assert cache.get_many(MODEL, ["a paper"]) == [None]
+
+    cache.put_many(MODEL, ["a paper"], [[0.1, 0.2, 0.3]], [12])
+    [(vector, tokens)] = cache.get_many(MODEL, ["a paper"])
+    assert np.allclose(vector, [0.1, 0.2, 0.3])
+    assert tokens == 12
+
+
+def test_key_depends_on_model_and_text():
+    assert cache_key(MODEL, "x") == cache_key(MODEL, "x")
+    assert cache_key(MODEL, "x") != cache_key(MODEL, "y")
+    assert cache_key(MODEL, "x") != cache_key("text-embedding-3-large", "x")
+
+
+def test_results_keep_input_order_with_mixed_hits():
+    cache = EmbeddingCache(":memory:")
+    cache.put_many(MODEL, ["b"], [[2.0]], [1])
+    results = cache.get_many(MODEL, ["a", "b", "c", "b"])
+    assert results[0] is None and results[2] is None
+    assert results[1] == ([2.0], 1) and results[3] == ([2.0], 1)
+
+
+def test_evicted_entries_are_read_back_from_sqlite(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"), max_memory_entries=2)
+    cache.put_many(MODEL, ["a", "b", "c"], [[1.0], [2.0], [3.0]], [1, 1, 1])
+    assert len(cache._memory) == 2
+    assert cache.get_many(MODEL, ["a"]) == [([1.0], 1)]
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    EmbeddingCache(path).put_many(MODEL, ["a"], [[1.5, -1.5]], [3])
+    assert EmbeddingCache(path).get_many(MODEL, ["a"]) == [([1.5, -1.5], 3)]
+
+
+def test_split_tokens_preserves_batch_total():
+    shares = split_tokens(101, ["short", "a much longer abstract text", "mid length"])
+    assert sum(shares) == 101
+    assert shares[1] > shares[0]
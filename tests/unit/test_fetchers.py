@@ -1,7 +1,14 @@
-import datetime
+import asyncio
 from unittest.mock import MagicMock, patch
 
+import httpx
+import pytest
+
+from src.agents import fetchers
 from src.agents.fetchers import arxiv_fetcher
+from src.storage.arxiv_cache import ArxivCache
+from src.utils.cost_tracker import cost_tracker
+from src.utils.politeness import PolitenessScheduler
 
 REQUIRED_PAPER_FIELDS = {
     "id",
@@ -15,18 +22,60 @@ REQUIRED_PAPER_FIELDS = {
 }
 
 
-def _mock_arxiv_result(title="Test Paper", abstract=None):
-    result = MagicMock()
-    result.entry_id = "https://arxiv.org/abs/2301.00001"
-    result.title = title
-    result.summary = abstract or (
-        "This is a sufficiently long abstract for testing purposes, definitely over fifty characters."
+@pytest.fixture(autouse=True)
+def arxiv_cache():
+    cache = ArxivCache(":memory:")
+    cost_tracker.start_query("test-fetchers-q")
+    with patch("src.agents.fetchers.default_arxiv_cache", return_value=cache), patch(
+        "src.agents.fetchers._OVERFETCH", 1
+    ), patch(
+        "src.agents.fetchers.arxiv_scheduler",
+        return_value=PolitenessScheduler(min_interval_s=0),
+    ), patch(
+        "src.agents.fetchers._S2_ENABLED", False
+    ):
+        yield cache
+    try:
+        cost_tracker.finish_query()
+    except RuntimeError:
+        pass
+
+
+_LONG_ABSTRACT = (
+    "This is a sufficiently long abstract for testing purposes, "
+    "definitely over fifty characters."
+)
+
+
+def _atom_entry(title="Test Paper", abstract=_LONG_ABSTRACT, arxiv_id="2301.00001"):
+    return f"""
+  <entry>
+    <id>http://arxiv.org/abs/{arxiv_id}v1</id>
+    <published>2023-01-01T00:00:00Z</published>
+    <title>{title}</title>
+    <summary>  {abstract}
+    </summary>
+    <author><name>Author One</name></author>
+    <arxiv:primary_category term="cs.CL"/>
+  </entry>"""
+
+
+def _atom_feed(*entries):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:arxiv="http://arxiv.org/schemas/atom">'
+        "<title>arXiv Query</title>" + "".join(entries) + "</feed>"
+    ).encode()
+
+
+def _serve(handler):
+    """Route the fetcher's arXiv HTTP client to an in-process handler."""
+    mock_clients = MagicMock()
+    mock_clients.http.return_value = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler)
     )
-    author = MagicMock()
-    author.__str__ = MagicMock(return_value="Author One")
-    result.authors = [author]
-    result.published = datetime.datetime(2023, 1, 1)
-    return result
+    return patch("src.agents.fetchers.clients", mock_clients)
 
 
 def _base_state(max_papers=4):
@@ -37,40 +86,167 @@ def _base_state(max_papers=4):
     }
 
 
-def test_normalized_paper_has_all_required_fields():
-    mock_result = _mock_arxiv_result()
-    with patch("src.agents.fetchers.arxiv.Client") as mock_client_cls:
-        mock_client = MagicMock()
-        mock_client.results.return_value = iter([mock_result])
-        mock_client_cls.return_value = mock_client
+@pytest.mark.asyncio
+async def test_normalized_paper_has_all_required_fields():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=_atom_feed(_atom_entry()))
 
-        result = arxiv_fetcher(_base_state())
+    with _serve(handler):
+        result = await arxiv_fetcher(_base_state())
 
     papers = result["arxiv_papers"]
     assert len(papers) == 1
     assert REQUIRED_PAPER_FIELDS.issubset(papers[0].keys())
     assert papers[0]["source"] == "arxiv"
+    assert papers[0]["year"] == 2023
+    assert papers[0]["abstract"] == _LONG_ABSTRACT
+    # Exactly the page size needed, not the client library's default
+    assert requests[0].url.params["max_results"] == "4"
 
 
-def test_short_abstract_filtered_out():
-    short_result = _mock_arxiv_result(abstract="Too short.")
-    long_result = _mock_arxiv_result(abstract="A" * 60)
-
-    with patch("src.agents.fetchers.arxiv.Client") as mock_client_cls:
-        mock_client = MagicMock()
-        mock_client.results.return_value = iter([short_result, long_result])
-        mock_client_cls.return_value = mock_client
-
-        result = arxiv_fetcher(_base_state())
+@pytest.mark.asyncio
+async def test_short_abstract_filtered_out():
+    feed = _atom_feed(
+        _atom_entry(abstract="Too short.", arxiv_id="1"),
+        _atom_entry(abstract="A" * 60, arxiv_id="2"),
+    )
+    with _serve(lambda request: httpx.Response(200, content=feed)):
+        result = await arxiv_fetcher(_base_state())
 
     assert len(result["arxiv_papers"]) == 1
 
 
-def test_network_error_returns_empty_with_error_entry():
-    with patch("src.agents.fetchers.arxiv.Client") as mock_client_cls:
-        mock_client_cls.side_effect = ConnectionError("network down")
-        result = arxiv_fetcher(_base_state())
+@pytest.mark.asyncio
+async def test_network_error_returns_empty_with_error_entry():
+    def handler(request):
+        raise httpx.ConnectError("network down")
+
+    with _serve(handler):
+        result = await arxiv_fetcher(_base_state())
 
     assert result["arxiv_papers"] == []
     assert len(result.get("errors", [])) == 1
     assert "arxiv_fetcher" in result["errors"][0]
+
+
+@pytest.mark.asyncio
+async def test_overfetches_candidates_for_reranking(monkeypatch):
+    monkeypatch.setattr(fetchers, "_OVERFETCH", 3)
+    with patch("src.agents.fetchers._search_arxiv", return_value=[]) as search:
+        await arxiv_fetcher(_base_state(max_papers=4))
+    assert search.call_args.args[1] == 12
+
+
+def _paper(title):
+    return {"id": title, "title": title, "abstract": "A" * 60, "source": "arxiv"}
+
+
+@pytest.mark.asyncio
+async def test_repeat_query_skips_network(arxiv_cache):
+    with patch("src.agents.fetchers._search_arxiv", return_value=[_paper("P")]) as s:
+        first = await arxiv_fetcher(_base_state())
+        second = await arxiv_fetcher({**_base_state(), "query": "  Test   QUERY "})
+
+    assert s.call_count == 1
+    assert second["arxiv_papers"] == first["arxiv_papers"]
+    assert arxiv_cache.entry_stats("test query", 4)["hits"] == 1
+    stats = cost_tracker.finish_query()["caches"]["arxiv"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_citation_counts_are_cached_with_the_papers(arxiv_cache):
+    async def counts(papers, deadline_s=None):
+        return [{**p, "citation_count": 7} for p in papers]
+
+    with patch("src.agents.fetchers._search_arxiv", return_value=[_paper("P")]), patch(
+        "src.agents.fetchers.with_citation_counts", side_effect=counts
+    ) as c:
+        await arxiv_fetcher(_base_state())
+        second = await arxiv_fetcher(_base_state())
+
+    # The cache hit makes no Semantic Scholar call, yet still carries the counts
+    assert c.call_count == 1
+    assert second["arxiv_papers"][0]["citation_count"] == 7
+
+
+@pytest.mark.asyncio
+async def test_fetches_and_cache_hits_work_outside_a_query(arxiv_cache):
+    # A bare graph run, a job or a script has no cost report to record into
+    cost_tracker.finish_query()
+    with patch("src.agents.fetchers._search_arxiv", return_value=[_paper("P")]):
+        fetched = await arxiv_fetcher(_base_state())
+        cached = await arxiv_fetcher(_base_state())
+
+    for result in (fetched, cached):
+        assert [p["title"] for p in result["arxiv_papers"]] == ["P"]
+        assert not result.get("errors")
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_while_refreshing(arxiv_cache, monkeypatch):
+    arxiv_cache.put("test query", 4, [_paper("old")])
+    monkeypatch.setattr(fetchers, "_CACHE_TTL_S", 0.0)
+
+    with patch("src.agents.fetchers._search_arxiv", return_value=[_paper("new")]) as s:
+        result = await arxiv_fetcher(_base_state())
+        assert [p["title"] for p in result["arxiv_papers"]] == ["old"]
+        await asyncio.gather(*fetchers._background)
+
+    assert s.call_count == 1
+    assert [p["title"] for p in arxiv_cache.get("test query", 4)[0]] == ["new"]
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_refetched_and_kept_as_fallback(arxiv_cache, monkeypatch):
+    arxiv_cache.put("test query", 4, [_paper("old")])
+    monkeypatch.setattr(fetchers, "_CACHE_TTL_S", 0.0)
+    monkeypatch.setattr(fetchers, "_CACHE_STALE_S", 0.0)
+
+    with patch(
+        "src.agents.fetchers._search_arxiv", side_effect=ConnectionError("down")
+    ):
+        result = await arxiv_fetcher(_base_state())
+
+    assert [p["title"] for p in result["arxiv_papers"]] == ["old"]
+    assert "expired cache" in result["errors"][0]
+
+
+def test_sub_queries_add_original_wording_and_keyword_pairs():
+    state = {
+        "query": "graph learning GNN molecules",
+        "original_query": "graph learning",
+        "keywords": ["GNN", "molecules", "Graph Learning"],
+    }
+    assert fetchers.sub_queries(state, 1) == ["graph learning GNN molecules"]
+    assert fetchers.sub_queries(state, 4) == [
+        "graph learning GNN molecules",
+        "graph learning",
+        'all:"GNN" AND all:"molecules"',
+        'all:"GNN" AND all:"Graph Learning"',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_merges_sub_query_results(monkeypatch):
+    monkeypatch.setattr(fetchers, "_FANOUT", 3)
+    results = {
+        "q kw": [_paper("A"), _paper("B")],
+        "q": [_paper("B"), _paper("C")],
+    }
+
+    def search(query, limit):
+        if query not in results:
+            raise ConnectionError("rate limited")
+        return results[query]
+
+    state = {**_base_state(), "query": "q kw", "original_query": "q"}
+    state["keywords"] = ["kw", "other"]
+    with patch("src.agents.fetchers._search_arxiv", side_effect=search):
+        result = await arxiv_fetcher(state)
+
+    assert [p["title"] for p in result["arxiv_papers"]] == ["A", "B", "C"]
+    assert result["errors"] == ["arxiv_fetcher: rate limited"]
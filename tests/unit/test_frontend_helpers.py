@@ -4,6 +4,7 @@ from frontend.helpers import (
     format_confidence,
     format_cost,
     identify_expensive_nodes,
+    parse_sse,
     severity_badge,
 )
 
@@ -63,3 +64,23 @@ def test_format_confidence_rounds_correctly():
     assert format_confidence(0.856) == "86%"
     assert format_confidence(0.5) == "50%"
     assert format_confidence(1.0) == "100%"
+
+
+def test_parse_sse_yields_event_and_data_pairs():
+    lines = [
+        "event: papers",
+        'data: {"papers": [1, 2]}',
+        "",
+        "event: synthesis_token",
+        'data: {"text": "Hello"}',
+        "",
+    ]
+    assert list(parse_sse(lines)) == [
+        ("papers", {"papers": [1, 2]}),
+        ("synthesis_token", {"text": "Hello"}),
+    ]
+
+
+def test_parse_sse_handles_missing_trailing_blank_line():
+    lines = ["event: done", 'data: {"query_id": "abc"}']
+    assert list(parse_sse(lines)) == [("done", {"query_id": "abc"})]
@@ -3,20 +3,27 @@ from src.graph.pipeline import build_graph, graph
 EXPECTED_NODES = {
     "router",
     "arxiv_fetcher",
+    "semantic_scholar_fetcher",
     "deduplicator",
+    "reranker",
     "synthesizer",
     "contradiction_detector",
     "hypothesis_generator",
+    "pinecone_indexer",
     "cost_auditor",
 }
 
 
-def test_graph_has_exactly_seven_nodes():
+def _edges():
+    return {(e.source, e.target) for e in graph.get_graph().edges}
+
+
+def test_graph_has_exactly_ten_nodes():
     drawable = graph.get_graph()
     user_nodes = {n for n in drawable.nodes if not n.startswith("__")}
     assert (
-        len(user_nodes) == 7
-    ), f"Expected 7 nodes, got {len(user_nodes)}: {user_nodes}"
+        len(user_nodes) == 10
+    ), f"Expected 10 nodes, got {len(user_nodes)}: {user_nodes}"
 
 
 def test_all_node_names_correct():
@@ -30,3 +37,26 @@ def test_all_node_names_correct():
 def test_graph_compiles_without_error():
     g = build_graph()
     assert g is not None
+
+
+def test_sources_fetched_in_parallel_and_joined_at_deduplicator():
+    edges = _edges()
+    for source in ("arxiv_fetcher", "semantic_scholar_fetcher"):
+        assert ("router", source) in edges
+        assert (source, "deduplicator") in edges
+
+
+def test_synthesis_contradictions_and_indexing_fan_out_from_reranker():
+    edges = _edges()
+    assert ("deduplicator", "reranker") in edges
+    for target in ("synthesizer", "contradiction_detector", "pinecone_indexer"):
+        assert ("reranker", target) in edges
+    assert ("synthesizer", "contradiction_detector") not in edges
+
+
+def test_hypothesis_generator_joins_synthesis_and_contradictions():
+    edges = _edges()
+    assert ("synthesizer", "hypothesis_generator") in edges
+    assert ("contradiction_detector", "hypothesis_generator") in edges
+    assert ("pinecone_indexer", "hypothesis_generator") not in edges
+    assert ("pinecone_indexer", "cost_auditor") in edges
@@ -1,5 +1,6 @@
 import json
-from unittest.mock import MagicMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -43,25 +44,30 @@ def _state(synthesis="Research synthesis text.", contradictions=None):
 # ── tests ───────────────────────────────────────────────────────────────────
 
 
-def test_generates_three_hypotheses():
-    with patch("src.agents.hypothesis.ChatAnthropic") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response(_hypotheses_json(3))
-        result = hypothesis_node(_state())
+@pytest.mark.asyncio
+async def test_generates_three_hypotheses():
+    with patch("src.agents.hypothesis._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(
+            return_value=_mock_response(_hypotheses_json(3))
+        )
+        result = await hypothesis_node(_state())
     assert len(result["hypotheses"]) == 3
 
 
-def test_confidence_is_float_in_range():
-    with patch("src.agents.hypothesis.ChatAnthropic") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response(
-            _hypotheses_json(3, confidence=0.75)
+@pytest.mark.asyncio
+async def test_confidence_is_float_in_range():
+    with patch("src.agents.hypothesis._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(
+            return_value=_mock_response(_hypotheses_json(3, confidence=0.75))
         )
-        result = hypothesis_node(_state())
+        result = await hypothesis_node(_state())
     for h in result["hypotheses"]:
         assert isinstance(h["confidence"], float)
         assert 0.0 <= h["confidence"] <= 1.0
 
 
-def test_contradictions_appear_in_prompt():
+@pytest.mark.asyncio
+async def test_contradictions_appear_in_prompt():
     contradictions = [
         {
             "claim_a": "X outperforms Y on benchmarks",
@@ -72,25 +78,31 @@ def test_contradictions_appear_in_prompt():
             "paper_b_title": "Paper B",
         }
     ]
-    with patch("src.agents.hypothesis.ChatAnthropic") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response(_hypotheses_json())
-        hypothesis_node(_state(contradictions=contradictions))
+    with patch("src.agents.hypothesis._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(
+            return_value=_mock_response(_hypotheses_json())
+        )
+        await hypothesis_node(_state(contradictions=contradictions))
 
-    messages = mock_cls.return_value.invoke.call_args[0][0]
+    messages = mock_cls.return_value.ainvoke.call_args[0][0]
     prompt_text = messages[1].content  # HumanMessage
     assert "X outperforms Y on benchmarks" in prompt_text
 
 
-def test_handles_parse_failure_gracefully():
-    with patch("src.agents.hypothesis.ChatAnthropic") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response("}{bad json")
-        result = hypothesis_node(_state())
+@pytest.mark.asyncio
+async def test_handles_parse_failure_gracefully():
+    with patch("src.agents.hypothesis._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(
+            return_value=_mock_response("}{bad json")
+        )
+        result = await hypothesis_node(_state())
     assert result["hypotheses"] == []
     assert len(result.get("errors", [])) == 1
     assert "hypothesis_generator" in result["errors"][0]
 
 
-def test_novelty_values_are_constrained():
+@pytest.mark.asyncio
+async def test_novelty_values_are_constrained():
     content = json.dumps(
         {
             "hypotheses": [
@@ -105,7 +117,53 @@ def test_novelty_values_are_constrained():
             ]
         }
     )
-    with patch("src.agents.hypothesis.ChatAnthropic") as mock_cls:
-        mock_cls.return_value.invoke.return_value = _mock_response(content)
-        result = hypothesis_node(_state())
+    with patch("src.agents.hypothesis._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(return_value=_mock_response(content))
+        result = await hypothesis_node(_state())
     assert result["hypotheses"][0]["novelty"] in {"high", "medium", "low"}
+
+
+@pytest.mark.asyncio
+async def test_short_budget_falls_back_to_smaller_model():
+    state = {**_state(), "deadline": time.time() + 8}
+    with patch("src.agents.hypothesis._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(
+            return_value=_mock_response(_hypotheses_json(3))
+        )
+        result = await hypothesis_node(state)
+    mock_cls.assert_called_once_with("claude-haiku-4-5")
+    assert len(result["hypotheses"]) == 3
+    assert result["errors"][0].startswith(
+        "hypothesis_generator: degraded to claude-haiku-4-5"
+    )
+
+
+@pytest.mark.asyncio
+async def test_skipped_when_out_of_time():
+    state = {**_state(), "deadline": time.time() + 2}
+    with patch("src.agents.hypothesis._llm") as mock_cls:
+        result = await hypothesis_node(state)
+    mock_cls.assert_not_called()
+    assert result["hypotheses"] == []
+    assert result["errors"][0].startswith("hypothesis_generator: skipped")
+
+
+@pytest.mark.asyncio
+async def test_paper_context_is_a_cached_system_prefix():
+    from src.agents.synthesizer import paper_context
+
+    papers = [
+        {"id": "p1", "title": "Sparse Attention", "abstract": "We prune heads."},
+        {"id": "p2", "title": "Dense Attention", "abstract": "We keep them."},
+    ]
+    with patch("src.agents.hypothesis._llm") as mock_cls:
+        mock_cls.return_value.ainvoke = AsyncMock(
+            return_value=_mock_response(_hypotheses_json())
+        )
+        await hypothesis_node({**_state(), "all_papers": papers})
+
+    system = mock_cls.return_value.ainvoke.call_args[0][0][0].content
+    # Byte-identical to the synthesizer's paper block, then the node's own prompt
+    assert system[0]["text"] == paper_context(papers)
+    assert all(b["cache_control"] == {"type": "ephemeral"} for b in system)
+    assert len(system) == 2
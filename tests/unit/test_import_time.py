@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Was ~2.4s when the graph was compiled and every SDK imported at module load
+IMPORT_BUDGET_S = 1.5
+
+HEAVY_MODULES = (
+    "langchain_openai",
+    "langchain_anthropic",
+    "langgraph",
+    "openai",
+    "anthropic",
+    "pinecone",
+    "supabase",
+    "arxiv",
+    "mangum",
+)
+
+_PROBE = (
+    "import json, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import src.api.main\n"
+    "elapsed = time.perf_counter() - t0\n"
+    f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+    "print(json.dumps({'elapsed_s': elapsed, 'loaded': loaded}))\n"
+)
+
+
+def _probe() -> dict:
+    # Fresh interpreter: this test process has already imported everything
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_api_import_does_not_load_provider_sdks():
+    assert _probe()["loaded"] == []
+
+
+def test_api_import_within_budget():
+    elapsed = _probe()["elapsed_s"]
+    assert elapsed < IMPORT_BUDGET_S, f"import src.api.main took {elapsed:.2f}s"
@@ -0,0 +1,43 @@
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.agents.indexer import indexer_node
+
+_STATE = {"query_id": "idx-q", "all_papers": [{"title": "T", "abstract": "A" * 60}]}
+
+
+@pytest.mark.asyncio
+async def test_upserts_papers_under_query_namespace():
+    with patch(
+        "src.agents.indexer.embed_and_upsert", new=AsyncMock(return_value=1)
+    ) as mock_upsert:
+        result = await indexer_node(_STATE)
+
+    mock_upsert.assert_awaited_once_with(_STATE["all_papers"], "idx-q")
+    assert result == {}
+
+
+@pytest.mark.asyncio
+async def test_pinecone_failure_does_not_propagate():
+    with patch(
+        "src.agents.indexer.embed_and_upsert",
+        new=AsyncMock(side_effect=Exception("Pinecone down")),
+    ):
+        result = await indexer_node(_STATE)
+
+    assert result == {}
+
+
+@pytest.mark.asyncio
+async def test_short_budget_skips_indexing_with_an_error_entry():
+    state = {**_STATE, "deadline": time.time() + 1}
+    with patch(
+        "src.agents.indexer.embed_and_upsert", new=AsyncMock(return_value=1)
+    ) as mock_upsert:
+        result = await indexer_node(state)
+
+    mock_upsert.assert_not_awaited()
+    assert len(result["errors"]) == 1
+    assert result["errors"][0].startswith("pinecone_indexer: skipped")
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from src.storage.job_store import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+
+_REQUEST = {"query": "transformer attention mechanisms", "max_papers": 40}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite"))
+
+
+def test_enqueue_returns_queued_job(store):
+    job = store.enqueue("j1", _REQUEST)
+    assert job["status"] == QUEUED
+    assert job["request"] == _REQUEST
+    assert job["result"] is None
+
+
+def test_claim_is_fifo_and_marks_running(store):
+    store.enqueue("first", _REQUEST)
+    store.enqueue("second", _REQUEST)
+
+    job = store.claim()
+    assert job["query_id"] == "first"
+    assert job["status"] == RUNNING
+    assert job["attempts"] == 1
+    assert store.claim()["query_id"] == "second"
+    assert store.claim() is None
+
+
+def test_concurrent_claims_never_share_a_job(store):
+    for i in range(50):
+        store.enqueue(f"j{i}", _REQUEST)
+    claimed: list[str] = []
+
+    def drain():
+        while (job := store.claim()) is not None:
+            claimed.append(job["query_id"])
+
+    threads = [threading.Thread(target=drain) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(claimed) == sorted(f"j{i}" for i in range(50))
+
+
+def test_progress_finish_and_fail(store):
+    store.enqueue("ok", _REQUEST)
+    store.enqueue("bad", _REQUEST)
+    store.claim()
+    store.claim()
+
+    store.update_progress("ok", "deduplicator", {"papers": [1, 2]})
+    assert store.get("ok")["current_node"] == "deduplicator"
+    assert store.get("ok")["result"] == {"papers": [1, 2]}
+
+    store.finish("ok", {"synthesis": "S"})
+    store.fail("bad", "boom")
+    assert store.get("ok")["status"] == SUCCEEDED
+    assert store.get("bad")["status"] == FAILED
+    assert store.get("bad")["error"] == "boom"
+    assert store.counts() == {SUCCEEDED: 1, FAILED: 1}
+
+
+def test_requeue_running_recovers_interrupted_jobs(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    JobStore(path).enqueue("j1", _REQUEST)
+    JobStore(path).claim()
+
+    restarted = JobStore(path)
+    assert restarted.requeue_running() == 1
+    assert restarted.claim()["query_id"] == "j1"
@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.api.jobs import JobWorkerPool, run_job
+from src.storage.job_store import FAILED, SUCCEEDED, JobStore
+from src.utils.cost_tracker import cost_tracker
+
+_REQUEST = {"query": "transformer attention mechanisms", "max_papers": 40}
+
+
+class _FakeGraph:
+    def __init__(self, fail=False, delay=0.0):
+        self.fail = fail
+        self.delay = delay
+        self.inputs = []
+
+    async def aget_state(self, config):
+        return SimpleNamespace(values={}, next=())
+
+    async def astream(self, inputs, config, stream_mode=None):
+        self.inputs.append(inputs)
+        await asyncio.sleep(self.delay)
+        yield {"deduplicator": {"all_papers": [{"title": "P"}]}}
+        if self.fail:
+            raise RuntimeError("pipeline exploded")
+        yield {"synthesizer": {"synthesis": "S"}}
+        # Simulates cost_auditor finalising the job's report
+        yield {"cost_auditor": {"cost_report": cost_tracker.finish_query()}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite"))
+
+
+@pytest.mark.asyncio
+async def test_run_job_records_result(store):
+    store.enqueue("j1", _REQUEST)
+    await run_job(_FakeGraph(), store, store.claim())
+
+    job = store.get("j1")
+    assert job["status"] == SUCCEEDED
+    assert job["result"]["papers"] == [{"title": "P"}]
+    assert job["result"]["synthesis"] == "S"
+    assert job["result"]["cost_report"]["query_id"] == "j1"
+
+
+@pytest.mark.asyncio
+async def test_run_job_failure_keeps_partial_results(store):
+    store.enqueue("j1", _REQUEST)
+    await asyncio.create_task(run_job(_FakeGraph(fail=True), store, store.claim()))
+
+    job = store.get("j1")
+    assert job["status"] == FAILED
+    assert "pipeline exploded" in job["error"]
+    assert job["result"]["papers"] == [{"title": "P"}]
+    assert job["current_node"] == "deduplicator"
+
+
+@pytest.mark.asyncio
+async def test_pool_drains_queue_concurrently(store):
+    graph = _FakeGraph(delay=0.2)
+    pool = JobWorkerPool(lambda: graph, lambda: store, workers=4, poll_interval=0.05)
+    for i in range(8):
+        store.enqueue(f"j{i}", _REQUEST)
+
+    await pool.start()
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    while store.counts().get(SUCCEEDED, 0) < 8 and loop.time() - t0 < 5:
+        await asyncio.sleep(0.02)
+    elapsed = loop.time() - t0
+    await pool.stop()
+
+    assert store.counts() == {SUCCEEDED: 8}
+    # 8 jobs × 0.2 s on 4 workers ≈ 0.4 s, far below the 1.6 s serial time
+    assert elapsed < 1.2
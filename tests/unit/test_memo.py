@@ -0,0 +1,99 @@
+import pytest
+
+from src.graph.memo import (
+    LRUMemoBackend,
+    NodeMemo,
+    SQLiteMemoBackend,
+    memo_key,
+    memoize_node,
+)
+from src.utils.cost_tracker import cost_tracker
+
+
+def _counting_node(update: dict):
+    calls = []
+
+    async def node(state):
+        calls.append(state)
+        return update
+
+    return node, calls
+
+
+@pytest.mark.asyncio
+async def test_replays_when_read_keys_unchanged():
+    node, calls = _counting_node({"synthesis": "S"})
+    wrapped = memoize_node("synthesizer", node, NodeMemo(("papers",)), LRUMemoBackend())
+
+    assert await wrapped({"papers": [1], "other": "a"}) == {"synthesis": "S"}
+    # Keys the node does not read do not affect the key
+    assert await wrapped({"papers": [1], "other": "b"}) == {"synthesis": "S"}
+    assert len(calls) == 1
+
+    await wrapped({"papers": [2]})
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_memoized():
+    node, calls = _counting_node({"errors": ["boom"]})
+    wrapped = memoize_node("router", node, NodeMemo(("query",)), LRUMemoBackend())
+    await wrapped({"query": "q"})
+    await wrapped({"query": "q"})
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_stochastic_nodes_bypass_unless_enabled():
+    node, calls = _counting_node({"hypotheses": []})
+    memo = NodeMemo(("synthesis",), stochastic=True)
+    assert memoize_node("hypothesis_generator", node, memo, LRUMemoBackend()) is node
+
+    wrapped = memoize_node(
+        "hypothesis_generator", node, memo, LRUMemoBackend(), include_stochastic=True
+    )
+    await wrapped({"synthesis": "S"})
+    await wrapped({"synthesis": "S"})
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_hits_and_misses_reported_per_node():
+    node, _ = _counting_node({"contradictions": []})
+    wrapped = memoize_node(
+        "contradiction_detector", node, NodeMemo(("all_papers",)), LRUMemoBackend()
+    )
+    cost_tracker.start_query("memo-test")
+    await wrapped({"all_papers": []})
+    await wrapped({"all_papers": []})
+    report = cost_tracker.finish_query()
+    stats = report["caches"]["node:contradiction_detector"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_sqlite_backend_persists_and_expires(tmp_path):
+    path = str(tmp_path / "memo.sqlite")
+    SQLiteMemoBackend(path).set("k", "router", {"query": "q kw"})
+
+    reopened = SQLiteMemoBackend(path)
+    assert reopened.get("k", ttl_s=60) == {"query": "q kw"}
+    assert reopened.get("k", ttl_s=0) is None
+    assert reopened.get("missing", ttl_s=60) is None
+
+
+def test_lru_backend_evicts_oldest():
+    backend = LRUMemoBackend(max_entries=2)
+    for key in ("a", "b", "c"):
+        backend.set(key, "n", {"v": key})
+    assert backend.get("a", ttl_s=60) is None
+    assert backend.get("c", ttl_s=60) == {"v": "c"}
+
+
+def test_key_depends_on_node_and_inputs():
+    async def node(state):
+        return {}
+
+    base = memo_key("a", node, {"q": 1}, ("q",))
+    assert base == memo_key("a", node, {"q": 1, "x": 2}, ("q",))
+    assert base != memo_key("b", node, {"q": 1}, ("q",))
+    assert base != memo_key("a", node, {"q": 2}, ("q",))
@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+
+from src.utils.minhash import (
+    MinHasher,
+    cluster,
+    lsh_params,
+    near_duplicate_pairs,
+    shingle_hashes,
+)
+
+
+def _doc(rng, n=120):
+    return " ".join(f"w{rng.randrange(5000)}" for _ in range(n))
+
+
+def test_shingle_hashes_ignore_case_and_punctuation():
+    assert np.array_equal(
+        shingle_hashes("Pre-Training, of Deep Transformers!"),
+        shingle_hashes("pre training of deep transformers"),
+    )
+    assert len(shingle_hashes("")) == 1
+
+
+def test_signature_agreement_estimates_jaccard():
+    rng = random.Random(0)
+    words = _doc(rng, 200).split()
+    edited = words[:150] + _doc(rng, 50).split()
+    signatures = MinHasher(num_perm=256).signatures([" ".join(words), " ".join(edited)])
+    a = {" ".join(words[i : i + 3]) for i in range(len(words) - 2)}
+    b = {" ".join(edited[i : i + 3]) for i in range(len(edited) - 2)}
+    estimate = np.mean(signatures[0] == signatures[1])
+    assert abs(estimate - len(a & b) / len(a | b)) < 0.1
+
+
+def test_lsh_params_track_threshold():
+    bands, rows = lsh_params(0.7, 128)
+    assert bands * rows == 128
+    assert abs((1 / bands) ** (1 / rows) - 0.7) < 0.05
+    assert lsh_params(0.9, 128)[1] > rows
+
+
+def test_finds_near_duplicates_among_many():
+    rng = random.Random(1)
+    docs = [_doc(rng) for _ in range(500)]
+    variant = docs[7].split()
+    variant[10] = "changed"
+    docs.append(" ".join(variant))
+
+    signatures = MinHasher().signatures(docs)
+    pairs = near_duplicate_pairs(signatures, threshold=0.7)
+    assert pairs == [(7, 500)]
+
+    roots = cluster(len(docs), pairs)
+    assert roots[500] == roots[7] == 7
+    assert len(set(roots)) == 500
+
+
+def test_cluster_is_transitive():
+    assert cluster(5, [(0, 1), (3, 4), (1, 3)]) == [0, 0, 2, 0, 0]
@@ -1,7 +1,8 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.storage.embedding_cache import EmbeddingCache
 from src.utils.cost_tracker import cost_tracker
 
 
@@ -31,6 +32,15 @@ def active_query():
         pass
 
 
+@pytest.fixture(autouse=True)
+def embedding_cache():
+    cache = EmbeddingCache(":memory:")
+    with patch(
+        "src.storage.pinecone_store.default_embedding_cache", return_value=cache
+    ):
+        yield cache
+
+
 def _mock_embed_response(n_texts, total_tokens=500):
     mock_response = MagicMock()
     mock_response.data = [MagicMock(embedding=[0.1] * 1536) for _ in range(n_texts)]
@@ -38,20 +48,24 @@ def _mock_embed_response(n_texts, total_tokens=500):
     return mock_response
 
 
-def test_upsert_count_matches_input():
+def _mock_clients(index, n_texts):
+    mock_clients = MagicMock()
+    mock_clients.openai.return_value.embeddings.create = AsyncMock(
+        return_value=_mock_embed_response(n_texts)
+    )
+    mock_clients.pinecone_index.return_value = index
+    return mock_clients
+
+
+@pytest.mark.asyncio
+async def test_upsert_count_matches_input():
     papers = _make_papers(3)
     mock_index = MagicMock()
 
-    with patch("src.storage.pinecone_store.OpenAI") as mock_openai_cls, patch(
-        "src.storage.pinecone_store._get_index", return_value=mock_index
-    ):
-        mock_openai_cls.return_value.embeddings.create.return_value = (
-            _mock_embed_response(3)
-        )
-
+    with patch("src.storage.pinecone_store.clients", _mock_clients(mock_index, 3)):
         from src.storage.pinecone_store import embed_and_upsert
 
-        count = embed_and_upsert(papers, "qid-001")
+        count = await embed_and_upsert(papers, "qid-001")
 
     assert count == 3
     mock_index.upsert.assert_called_once()
@@ -59,20 +73,15 @@ def test_upsert_count_matches_input():
     assert len(vectors) == 3
 
 
-def test_vector_metadata_has_required_fields():
+@pytest.mark.asyncio
+async def test_vector_metadata_has_required_fields():
     papers = _make_papers(1)
     mock_index = MagicMock()
 
-    with patch("src.storage.pinecone_store.OpenAI") as mock_openai_cls, patch(
-        "src.storage.pinecone_store._get_index", return_value=mock_index
-    ):
-        mock_openai_cls.return_value.embeddings.create.return_value = (
-            _mock_embed_response(1)
-        )
-
+    with patch("src.storage.pinecone_store.clients", _mock_clients(mock_index, 1)):
         from src.storage.pinecone_store import embed_and_upsert
 
-        embed_and_upsert(papers, "qid-002")
+        await embed_and_upsert(papers, "qid-002")
 
     vectors = mock_index.upsert.call_args.kwargs["vectors"]
     metadata = vectors[0]["metadata"]
@@ -80,20 +89,86 @@ def test_vector_metadata_has_required_fields():
         assert field in metadata, f"Missing metadata field: {field}"
 
 
-def test_namespace_uses_query_id():
+@pytest.mark.asyncio
+async def test_namespace_uses_query_id():
     papers = _make_papers(2)
     mock_index = MagicMock()
     query_id = "my-namespace-123"
 
-    with patch("src.storage.pinecone_store.OpenAI") as mock_openai_cls, patch(
-        "src.storage.pinecone_store._get_index", return_value=mock_index
-    ):
-        mock_openai_cls.return_value.embeddings.create.return_value = (
-            _mock_embed_response(2)
-        )
-
+    with patch("src.storage.pinecone_store.clients", _mock_clients(mock_index, 2)):
         from src.storage.pinecone_store import embed_and_upsert
 
-        embed_and_upsert(papers, query_id)
+        await embed_and_upsert(papers, query_id)
 
     assert mock_index.upsert.call_args.kwargs["namespace"] == query_id
+
+
+@pytest.mark.asyncio
+async def test_repeat_papers_are_served_from_embedding_cache():
+    papers = _make_papers(3)
+    mock_index = MagicMock()
+    mock_clients = _mock_clients(mock_index, 3)
+
+    with patch("src.storage.pinecone_store.clients", mock_clients):
+        from src.storage.pinecone_store import embed_and_upsert
+
+        await embed_and_upsert(papers, "qid-first")
+        await embed_and_upsert(papers, "qid-second")
+
+    mock_clients.openai.return_value.embeddings.create.assert_awaited_once()
+    second_vectors = mock_index.upsert.call_args.kwargs["vectors"]
+    assert len(second_vectors) == 3
+    assert len(second_vectors[0]["values"]) == 1536
+
+    report = cost_tracker.finish_query()
+    embeds = [n for n in report["breakdown"] if n["node_name"] == "pinecone_embed"]
+    assert len(embeds) == 1
+    stats = report["caches"]["embeddings"]
+    assert (stats["hits"], stats["misses"]) == (3, 3)
+    assert stats["hit_rate"] == 0.5
+    assert stats["tokens_saved"] == 500
+
+
+@pytest.mark.asyncio
+async def test_only_cache_misses_are_embedded(embedding_cache):
+    papers = _make_papers(3)
+    texts = [f"{p['title']}. {p['abstract'][:500]}" for p in papers]
+    embedding_cache.put_many(
+        "text-embedding-3-small", texts[:2], [[0.5] * 4] * 2, [7, 7]
+    )
+    mock_clients = _mock_clients(MagicMock(), 1)
+
+    with patch("src.storage.pinecone_store.clients", mock_clients):
+        from src.storage.pinecone_store import embed_and_upsert
+
+        await embed_and_upsert(papers, "qid-partial")
+
+    create = mock_clients.openai.return_value.embeddings.create
+    assert create.call_args.kwargs["input"] == [texts[2]]
+
+
+@pytest.mark.asyncio
+async def test_index_calls_use_the_sync_client_off_the_loop():
+    # pinecone's asyncio client needs the aiohttp extra, which isn't installed;
+    # the store must work with the plain index, called from a worker thread
+    import threading
+
+    loop_thread = threading.get_ident()
+    calls = []
+
+    class _SyncIndex:
+        def upsert(self, vectors, namespace):
+            calls.append(("upsert", threading.get_ident()))
+
+        def query(self, **kwargs):
+            calls.append(("query", threading.get_ident()))
+            return MagicMock(matches=[])
+
+    with patch("src.storage.pinecone_store.clients", _mock_clients(_SyncIndex(), 1)):
+        from src.storage.pinecone_store import embed_and_upsert, query_similar
+
+        await embed_and_upsert(_make_papers(1), "qid-sync")
+        await query_similar("transformers", "qid-sync")
+
+    assert [name for name, _ in calls] == ["upsert", "query"]
+    assert all(thread != loop_thread for _, thread in calls)
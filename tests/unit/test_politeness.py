@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.politeness import PolitenessScheduler
+
+
+@pytest.mark.asyncio
+async def test_request_starts_are_spaced_by_min_interval():
+    scheduler = PolitenessScheduler(min_interval_s=0.05, max_concurrent=4)
+    starts = []
+
+    async def request():
+        async with scheduler.slot():
+            starts.append(time.monotonic())
+
+    await asyncio.gather(*(request() for _ in range(4)))
+    # Four starts need three full intervals, however they were scheduled
+    assert starts[-1] - starts[0] >= 0.14
+    assert scheduler.stats()["waited_s"] >= 0.3 - 0.01
+    assert scheduler.stats()["requests"] == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    scheduler = PolitenessScheduler(min_interval_s=0, max_concurrent=2)
+    open_now = peak = 0
+
+    async def request():
+        nonlocal open_now, peak
+        async with scheduler.slot():
+            open_now += 1
+            peak = max(peak, open_now)
+            await asyncio.sleep(0.01)
+            open_now -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert peak == 2
+
+
+def test_usable_from_successive_event_loops():
+    scheduler = PolitenessScheduler(min_interval_s=0)
+
+    async def request():
+        async with scheduler.slot():
+            pass
+
+    asyncio.run(request())
+    asyncio.run(request())
+    assert scheduler.requests == 2
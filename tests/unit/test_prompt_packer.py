@@ -0,0 +1,68 @@
+from src.utils.prompt_packer import count_tokens, pack_papers, trim_abstract
+
+_MODEL = "gpt-4o-mini"
+_ABSTRACT = (
+    "Transformers dominate sequence modelling. We propose a sparse variant. "
+    "It matches dense attention at a fraction of the cost. "
+    "Code is released."
+)
+
+
+def _header(p: dict) -> str:
+    return f"**{p['title']}** ({p.get('year', 'n.d.')})"
+
+
+def _paper(i: int, abstract: str = _ABSTRACT) -> dict:
+    return {"id": f"p{i}", "title": f"Paper {i}", "abstract": abstract, "year": 2024}
+
+
+def test_trim_keeps_whole_leading_sentences():
+    first = "Transformers dominate sequence modelling."
+    limit = count_tokens(_MODEL, first) + 3
+    text, tokens = trim_abstract(_MODEL, _ABSTRACT, limit)
+    assert text == first
+    assert tokens <= limit
+
+
+def test_trim_returns_everything_that_fits():
+    text, _ = trim_abstract(_MODEL, _ABSTRACT, 1000)
+    assert text == _ABSTRACT
+
+
+def test_trim_cuts_an_overlong_first_sentence_at_a_word():
+    sentence = "attention " * 200
+    text, tokens = trim_abstract(_MODEL, sentence, 20)
+    assert text.endswith("…")
+    assert tokens <= 20
+    assert sentence.startswith(text[:-1])
+
+
+def test_pack_fills_budget_in_given_order():
+    papers = [_paper(i) for i in range(50)]
+    packed = pack_papers(papers, _header, _MODEL, budget=400, max_abstract_tokens=60)
+    assert 1 < len(packed) < 50
+    assert [e.paper["id"] for e in packed] == [f"p{i}" for i in range(len(packed))]
+    assert sum(e.tokens for e in packed) <= 400
+
+
+def test_pack_passes_over_papers_that_no_longer_fit():
+    wordy = _paper(1)
+    wordy["title"] = "A very long title about sparse attention " * 10
+    papers = [_paper(0), wordy, _paper(2)]
+    budget = pack_papers([_paper(0)], _header, _MODEL, 1000, 60)[0].tokens + 40
+    packed = pack_papers(papers, _header, _MODEL, budget, max_abstract_tokens=60)
+    assert [e.paper["id"] for e in packed] == ["p0", "p2"]
+
+
+def test_pack_respects_max_papers():
+    papers = [_paper(i) for i in range(10)]
+    packed = pack_papers(papers, _header, _MODEL, 10_000, 60, max_papers=3)
+    assert len(packed) == 3
+
+
+def test_token_counts_are_cached():
+    count_tokens.cache_clear()
+    pack_papers([_paper(0)], _header, _MODEL, 1000, 60)
+    misses = count_tokens.cache_info().misses
+    pack_papers([_paper(0)], _header, _MODEL, 1000, 60)
+    assert count_tokens.cache_info().misses == misses
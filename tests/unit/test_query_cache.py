@@ -0,0 +1,68 @@
+import numpy as np
+
+from src.storage.query_cache import SemanticQueryCache
+
+RESPONSE = {"query_id": "orig", "synthesis": "cached answer"}
+
+
+def _vec(*head, dims=8):
+    v = np.zeros(dims, dtype=np.float32)
+    v[: len(head)] = head
+    return v.tolist()
+
+
+def test_near_duplicate_query_hits_above_threshold():
+    cache = SemanticQueryCache(":memory:", threshold=0.9)
+    cache.store("transformer attention in NLP", 10, _vec(1.0, 0.1), RESPONSE)
+
+    response, similarity = cache.lookup(_vec(1.0, 0.15), 10)
+    assert response == RESPONSE
+    assert similarity > 0.99
+
+
+def test_dissimilar_query_misses():
+    cache = SemanticQueryCache(":memory:", threshold=0.9)
+    cache.store("transformer attention in NLP", 10, _vec(1.0, 0.0), RESPONSE)
+    assert cache.lookup(_vec(0.3, 1.0), 10) is None
+
+
+def test_different_max_papers_misses():
+    cache = SemanticQueryCache(":memory:")
+    cache.store("q", 10, _vec(1.0), RESPONSE)
+    assert cache.lookup(_vec(1.0), 4) is None
+
+
+def test_nearest_entry_wins():
+    cache = SemanticQueryCache(":memory:", threshold=0.5)
+    cache.store("a", 10, _vec(1.0, 0.0), {"query_id": "a"})
+    cache.store("b", 10, _vec(0.7, 0.7), {"query_id": "b"})
+    response, _ = cache.lookup(_vec(0.6, 0.8), 10)
+    assert response["query_id"] == "b"
+
+
+def test_expired_entries_are_dropped():
+    cache = SemanticQueryCache(":memory:", ttl_s=0.0)
+    cache.store("q", 10, _vec(1.0), RESPONSE)
+    assert cache.lookup(_vec(1.0), 10) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticQueryCache(":memory:", threshold=0.99, max_entries=2)
+    cache.store("a", 10, _vec(1.0, 0.0, 0.0), {"query_id": "a"})
+    cache.store("b", 10, _vec(0.0, 1.0, 0.0), {"query_id": "b"})
+    assert cache.lookup(_vec(1.0, 0.0, 0.0), 10) is not None  # touch "a"
+
+    cache.store("c", 10, _vec(0.0, 0.0, 1.0), {"query_id": "c"})
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup(_vec(0.0, 1.0, 0.0), 10) is None
+    assert cache.lookup(_vec(1.0, 0.0, 0.0), 10)[0]["query_id"] == "a"
+
+
+def test_entries_and_hits_persist(tmp_path):
+    path = str(tmp_path / "qc.sqlite")
+    SemanticQueryCache(path).store("q", 10, _vec(1.0, 2.0), RESPONSE)
+
+    reopened = SemanticQueryCache(path)
+    assert reopened.lookup(_vec(1.0, 2.0), 10)[0] == RESPONSE
+    assert reopened.stats()["hits"] == 1
@@ -0,0 +1,171 @@
+import asyncio
+import time
+from email.utils import formatdate
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from src.utils.rate_governor import (
+    Limits,
+    RateGovernor,
+    TokenBucket,
+    estimate_tokens,
+    parse_limits,
+    retry_after_s,
+)
+
+
+def _rate_limited(headers: dict, status: int = 429) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "https://api.example/v1")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError("rate limited", request=request, response=response)
+
+
+def test_parse_limits():
+    assert parse_limits("gpt-4o-mini=5000:2000000, claude-haiku-4-5=:80000") == {
+        "gpt-4o-mini": Limits(rpm=5000, tpm=2_000_000),
+        "claude-haiku-4-5": Limits(rpm=None, tpm=80_000),
+    }
+    assert parse_limits("") == {}
+
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)  # one unit a second
+    now = time.monotonic()
+    assert bucket.wait_s(60, now) == 0
+    bucket.take(60, now)
+    assert bucket.wait_s(2, now) == pytest.approx(2, abs=0.01)
+    # Oversized requests wait for a full bucket, not forever
+    assert bucket.wait_s(1000, now) == pytest.approx(60, abs=0.01)
+
+
+def test_retry_after_headers():
+    assert retry_after_s(_rate_limited({"retry-after": "7"})) == 7.0
+    assert retry_after_s(_rate_limited({"retry-after-ms": "250"})) == 0.25
+    date = formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= retry_after_s(_rate_limited({"retry-after": date})) <= 30
+    assert retry_after_s(_rate_limited({})) == 1.0
+    assert retry_after_s(_rate_limited({}, status=503)) is None
+    assert retry_after_s(_rate_limited({}, status=500)) is None
+    assert retry_after_s(RuntimeError("boom")) is None
+
+
+def test_estimate_tokens_counts_every_text():
+    one = estimate_tokens("gpt-4o-mini", "attention is all you need " * 20)
+    assert one > 20
+    assert estimate_tokens("claude-sonnet-4-6", "a " * 100, "b " * 100) > one // 2
+
+
+@pytest.mark.asyncio
+async def test_requests_are_spaced_by_rpm():
+    governor = RateGovernor({"m": Limits(rpm=600)})  # 10 a second, burst of 600
+    governor._state("m").requests.level = 1
+    t0 = time.monotonic()
+    for _ in range(3):
+        await governor.acquire("m")
+    assert time.monotonic() - t0 >= 0.18
+    assert governor.metrics()["m"]["calls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_arrival_order():
+    governor = RateGovernor({"m": Limits(tpm=6000)})  # 100 tokens a second
+    governor._state("m").tokens.level = 0
+    order = []
+
+    async def call(name, tokens):
+        await governor.acquire("m", tokens)
+        order.append(name)
+
+    # The large request is first in line, so the small ones queue behind it
+    await asyncio.gather(call("big", 10), call("small-1", 1), call("small-2", 1))
+    assert order == ["big", "small-1", "small-2"]
+
+
+@pytest.mark.asyncio
+async def test_token_charge_is_corrected_from_usage():
+    governor = RateGovernor({"m": Limits(tpm=1000)})
+
+    class _Response:
+        usage_metadata = {"input_tokens": 30, "output_tokens": 20, "total_tokens": 50}
+
+    async def call():
+        return _Response()
+
+    await governor.call("m", call, tokens=400)
+    assert governor.metrics()["m"]["tokens_available"] == pytest.approx(950, abs=2)
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_model_and_retries():
+    governor = RateGovernor({}, max_retries=2)
+    attempts = []
+
+    async def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise _rate_limited({"retry-after-ms": "100"})
+        return "ok"
+
+    assert await governor.call("m", flaky) == "ok"
+    assert attempts[1] - attempts[0] >= 0.09
+    assert governor.metrics()["m"]["throttled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    governor = RateGovernor({}, max_retries=1)
+    attempts = []
+
+    async def always_limited():
+        attempts.append(1)
+        raise _rate_limited({"retry-after-ms": "1"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await governor.call("m", always_limited)
+    assert len(attempts) == 2
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    governor = RateGovernor({})
+    attempts = []
+
+    async def broken():
+        attempts.append(1)
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await governor.call("m", broken)
+    assert attempts == [1]
+
+
+@pytest.mark.asyncio
+async def test_queueing_for_a_drained_bucket_does_not_trip_the_breaker(monkeypatch):
+    from src.agents.router import _MODEL, router_node
+    from src.utils.resilience import Resilience
+
+    governor = RateGovernor({_MODEL: Limits(rpm=600)})  # 10 a second
+    governor._state(_MODEL).requests.level = 0
+    guard = Resilience(failure_threshold=2)
+    # Each call takes no time, but the last waits ~0.5s for its slot
+    monkeypatch.setenv("OPENAI_DEADLINE", "0.1")
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content='{"keywords": []}'))
+    with (
+        patch("src.agents.router.governor", governor),
+        patch("src.agents.router.resilience", guard),
+        patch("src.agents.router._llm", return_value=llm),
+        patch("src.agents.router.cost_tracker.track_call"),
+    ):
+        results = await asyncio.gather(
+            *(router_node({"query": f"q{i}"}) for i in range(5))
+        )
+
+    assert not any(r.get("errors") for r in results)
+    stats = guard.metrics()["openai"]
+    assert (stats["state"], stats["timeouts"]) == ("closed", 0)
+    # Latency samples cover the call alone, not the queue
+    assert stats["p95_ms"] < 50
+    assert governor.metrics()[_MODEL]["queued_s"] >= 0.4
@@ -0,0 +1,73 @@
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from src.agents.reranker import bm25_scores, mmr_order, rerank, reranker_node
+
+
+def _paper(title, abstract):
+    return {"id": title, "title": title, "abstract": abstract, "citation_count": 0}
+
+
+_PAPERS = [
+    _paper("Graph networks", "Message passing graph neural networks for molecules."),
+    _paper("Attention", "Sparse attention makes transformers scale to long text."),
+    _paper("Vision", "Convolutional networks for image classification tasks."),
+]
+
+
+def test_bm25_prefers_documents_with_rare_query_terms():
+    scores = bm25_scores(
+        "sparse attention transformers", [p["abstract"] for p in _PAPERS]
+    )
+    assert int(np.argmax(scores)) == 1
+    assert scores[0] == scores[2] == 0
+
+
+def test_bm25_handles_empty_query():
+    assert bm25_scores("", ["a b c"]).tolist() == [0.0]
+
+
+def test_rerank_blends_embedding_cosine_and_truncates():
+    # The embedding points at the vision paper, BM25 at the attention paper
+    vectors = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    ranked = rerank(
+        "sparse attention transformers",
+        _PAPERS,
+        query_vector=[0.0, 0.1, 1.0],
+        paper_vectors=vectors,
+        top_k=2,
+        embed_weight=0.7,
+        mmr_lambda=1.0,
+    )
+    assert [p["title"] for p in ranked] == ["Vision", "Attention"]
+    assert ranked[0]["relevance_score"] >= ranked[1]["relevance_score"]
+
+    bm25_only = rerank("sparse attention transformers", _PAPERS, top_k=1)
+    assert [p["title"] for p in bm25_only] == ["Attention"]
+
+
+def test_mmr_skips_redundant_papers():
+    vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+    relevance = np.array([1.0, 0.95, 0.5])
+    assert mmr_order(relevance, vectors, k=2, lam=1.0) == [0, 1]
+    assert mmr_order(relevance, vectors, k=2, lam=0.5) == [0, 2]
+
+
+@pytest.mark.asyncio
+async def test_node_falls_back_to_bm25_without_embeddings():
+    state = {"original_query": "sparse attention", "all_papers": _PAPERS}
+    with patch(
+        "src.agents.reranker.embed_texts_cached",
+        AsyncMock(side_effect=RuntimeError("no key")),
+    ):
+        result = await reranker_node({**state, "max_papers": 2})
+    assert [p["title"] for p in result["all_papers"]][0] == "Attention"
+    assert len(result["all_papers"]) == 2
+    assert "errors" not in result
+
+
+@pytest.mark.asyncio
+async def test_node_passes_through_empty_papers():
+    assert await reranker_node({"all_papers": []}) == {}
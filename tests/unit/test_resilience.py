@@ -0,0 +1,228 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.utils.cost_tracker import CostTracker
+from src.utils.resilience import CircuitOpenError, Resilience
+
+
+def _guard(**kwargs) -> Resilience:
+    kwargs.setdefault("hedged_providers", {"svc"})
+    kwargs.setdefault("hedge_min_samples", 3)
+    return Resilience(**kwargs)
+
+
+async def _ok(value="ok", delay_s=0.0):
+    await asyncio.sleep(delay_s)
+    return value
+
+
+async def _boom():
+    raise RuntimeError("boom")
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_slow_call():
+    guard = _guard()
+    with pytest.raises(asyncio.TimeoutError):
+        await guard.call("svc", lambda: _ok(delay_s=1), deadline_s=0.05)
+    assert guard.metrics()["svc"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_from_env(monkeypatch):
+    monkeypatch.setenv("SVC_DEADLINE", "0.05")
+    guard = _guard()
+    assert guard.deadline_for("svc") == 0.05
+    with pytest.raises(asyncio.TimeoutError):
+        await guard.call("svc", lambda: _ok(delay_s=1))
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_when_primary_stalls():
+    guard = _guard()
+    for _ in range(3):
+        await guard.call("svc", lambda: _ok(delay_s=0.01))
+
+    attempts = []
+
+    def attempt():
+        # First attempt hangs well past p95; the hedge answers at once
+        attempts.append(1)
+        return _ok("slow", 1) if len(attempts) == 1 else _ok("fast")
+
+    assert await guard.call("svc", attempt, deadline_s=0.5) == "fast"
+    stats = guard.metrics()["svc"]
+    assert len(attempts) == 2
+    assert (stats["hedges"], stats["hedge_wins"], stats["hedge_win_rate"]) == (
+        1,
+        1,
+        1.0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_samples_or_when_disabled():
+    guard = _guard()
+    attempts = []
+
+    def attempt():
+        attempts.append(1)
+        return _ok(delay_s=0.05)
+
+    await guard.call("svc", attempt)  # no latency history yet
+    for _ in range(3):
+        await guard.call("svc", lambda: _ok())
+    await guard.call("svc", attempt, hedge=False)
+    await guard.call("other", attempt)  # provider not in hedged set
+    assert len(attempts) == 3
+    assert guard.metrics()["svc"]["hedges"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_primary():
+    guard = _guard()
+    for _ in range(3):
+        await guard.call("svc", lambda: _ok(delay_s=0.01))
+
+    attempts = []
+
+    def attempt():
+        attempts.append(1)
+        return _ok("primary", 0.1) if len(attempts) == 1 else _boom()
+
+    assert await guard.call("svc", attempt) == "primary"
+    assert guard.metrics()["svc"]["hedge_wins"] == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_then_recovers_through_half_open():
+    guard = _guard(failure_threshold=3, reset_after_s=0.05)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            await guard.call("svc", _boom)
+    assert guard.metrics()["svc"]["state"] == "open"
+
+    called = []
+    with pytest.raises(CircuitOpenError):
+        await guard.call("svc", lambda: called.append(1) or _ok())
+    assert called == []
+    assert guard.metrics()["svc"]["rejected"] == 1
+
+    # After the reset window one trial call is let through
+    await asyncio.sleep(0.06)
+    with pytest.raises(RuntimeError):
+        await guard.call("svc", _boom)
+    assert guard.metrics()["svc"]["state"] == "open"  # trial failed
+
+    await asyncio.sleep(0.06)
+    assert await guard.call("svc", lambda: _ok()) == "ok"
+    stats = guard.metrics()["svc"]
+    assert stats["state"] == "closed"
+    assert stats["times_opened"] == 2
+
+
+@pytest.mark.asyncio
+async def test_success_resets_failure_streak():
+    guard = _guard(failure_threshold=2)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            await guard.call("svc", _boom)
+        await guard.call("svc", lambda: _ok())
+    assert guard.metrics()["svc"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_half_open_lets_a_single_trial_through():
+    guard = _guard(failure_threshold=1, reset_after_s=0.05)
+    with pytest.raises(RuntimeError):
+        await guard.call("svc", _boom)
+    await asyncio.sleep(0.06)
+
+    trial = asyncio.ensure_future(guard.call("svc", lambda: _ok(delay_s=0.05)))
+    await asyncio.sleep(0)
+    called = []
+    with pytest.raises(CircuitOpenError):
+        await guard.call("svc", lambda: called.append(1) or _ok())
+    assert called == []
+
+    assert await trial == "ok"
+    assert guard.metrics()["svc"]["state"] == "closed"
+    assert await guard.call("svc", lambda: _ok()) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_frees_the_slot():
+    guard = _guard(failure_threshold=1, reset_after_s=0.05)
+    with pytest.raises(RuntimeError):
+        await guard.call("svc", _boom)
+    await asyncio.sleep(0.06)
+
+    trial = asyncio.ensure_future(guard.call("svc", lambda: _ok(delay_s=1)))
+    await asyncio.sleep(0)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    assert guard.metrics()["svc"]["state"] == "half_open"
+    assert await guard.call("svc", lambda: _ok()) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_losing_attempts_cancelled_in_flight_are_counted():
+    guard = _guard()
+    for _ in range(3):
+        await guard.call("svc", lambda: _ok(delay_s=0.01))
+    assert guard.metrics()["svc"]["hedges_cancelled"] == 0
+
+    attempts = []
+
+    def attempt():
+        attempts.append(1)
+        return _ok("slow", 1) if len(attempts) == 1 else _ok("fast")
+
+    assert await guard.call("svc", attempt, deadline_s=0.5) == "fast"
+    assert guard.metrics()["svc"]["hedges_cancelled"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_hedges_are_charged_to_the_query():
+    guard, tracker = _guard(), CostTracker()
+    for _ in range(3):
+        await guard.call("svc", lambda: _ok(delay_s=0.01))
+
+    attempts = []
+
+    def attempt():
+        attempts.append(1)
+        return _ok("slow", 1) if len(attempts) == 1 else _ok("fast")
+
+    tracker.start_query("q-hedge")
+    result = await guard.call(
+        "svc",
+        attempt,
+        deadline_s=0.5,
+        on_hedge_cancelled=lambda: tracker.track_cancelled_hedge(
+            "router", "gpt-4o-mini", 2000
+        ),
+    )
+    report = tracker.finish_query()
+
+    assert result == "fast"
+    assert [c["node_name"] for c in report["breakdown"]] == ["router:cancelled_hedge"]
+    assert abs(report["total_cost_usd"] - 2000 * 0.15 / 1_000_000) < 1e-12
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_responses_are_not_breaker_failures():
+    request = httpx.Request("GET", "https://api.example/v1")
+    response = httpx.Response(429, headers={"retry-after": "1"}, request=request)
+
+    async def throttled():
+        raise httpx.HTTPStatusError("rate limited", request=request, response=response)
+
+    guard = _guard(failure_threshold=1)
+    with pytest.raises(httpx.HTTPStatusError):
+        await guard.call("svc", throttled)
+    stats = guard.metrics()["svc"]
+    assert (stats["state"], stats["failures"]) == ("closed", 0)
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from src.api.result_cache import (
+    ResultCache,
+    SingleFlight,
+    StreamFlight,
+    result_cache_key,
+)
+
+
+def test_key_normalises_case_and_whitespace():
+    assert result_cache_key("  Attention  in NLP ", 10) == result_cache_key(
+        "attention in nlp", 10
+    )
+    assert result_cache_key("attention in nlp", 10) != result_cache_key(
+        "attention in nlp", 4
+    )
+
+
+def test_hit_miss_and_ttl():
+    cache = ResultCache(ttl_s=60)
+    assert cache.get("k") is None
+    cache.put("k", {"query_id": "q"})
+    assert cache.get("k") == {"query_id": "q"}
+
+    expired = ResultCache(ttl_s=0)
+    expired.put("k", {"query_id": "q"})
+    assert expired.get("k") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", {})
+    cache.put("b", {})
+    cache.get("a")
+    cache.put("c", {})
+    assert cache.get("b") is None
+    assert cache.get("a") == {} and cache.get("c") == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    runs = 0
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+
+    assert results == ["result"] * 10
+    assert runs == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 9}
+
+    # Once finished, the next call runs again
+    await flight.do("k", work)
+    assert runs == 2
+
+
+@pytest.mark.asyncio
+async def test_waiters_receive_the_leaders_exception():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("pipeline failed")
+
+    results = await asyncio.gather(
+        flight.do("k", boom), flight.do("k", boom), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_run():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == "done"
+
+
+@pytest.mark.asyncio
+async def test_identical_streams_follow_one_producer():
+    flight = StreamFlight()
+    runs = 0
+
+    async def produce():
+        nonlocal runs
+        runs += 1
+        for i in range(3):
+            await asyncio.sleep(0.02)
+            yield f"frame {i}"
+
+    async def read():
+        return [frame async for frame in flight.subscribe("k", produce)]
+
+    first = asyncio.create_task(read())
+    await asyncio.sleep(0.03)  # the late subscriber has missed a frame
+    second = await read()
+
+    assert await first == second == ["frame 0", "frame 1", "frame 2"]
+    assert runs == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 1}
+
+
+@pytest.mark.asyncio
+async def test_disconnected_subscriber_does_not_stop_the_stream():
+    flight = StreamFlight()
+
+    async def produce():
+        for i in range(3):
+            await asyncio.sleep(0.02)
+            yield f"frame {i}"
+
+    async def read_one():
+        async for frame in flight.subscribe("k", produce):
+            return frame
+
+    assert await read_one() == "frame 0"
+    follower = [frame async for frame in flight.subscribe("k", produce)]
+    assert follower == ["frame 0", "frame 1", "frame 2"]
+    assert flight.stats()["executions"] == 1
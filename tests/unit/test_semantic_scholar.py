@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.agents import fetchers
+from src.agents.fetchers import (
+    arxiv_id,
+    semantic_scholar_fetcher,
+    with_citation_counts,
+)
+from src.utils.politeness import PolitenessScheduler
+
+_SEARCH_HIT = {
+    "paperId": "abc123",
+    "title": "Attention Is All You Need",
+    "abstract": "The dominant sequence transduction models are recurrent.",
+    "authors": [{"name": "Ashish Vaswani"}, {"name": "Noam Shazeer"}],
+    "year": 2017,
+    "citationCount": 120000,
+    "externalIds": {"ArXiv": "1706.03762"},
+    "url": "https://www.semanticscholar.org/paper/abc123",
+}
+_CITATIONS = {"ARXIV:1706.03762": 120000, "ARXIV:1810.04805": 90000}
+
+
+class _StubS2(BaseHTTPRequestHandler):
+    """Serves /paper/search and /paper/batch like the Graph API."""
+
+    requests: list = []
+    delay_s = 0.0
+
+    def _reply(self, payload):
+        time.sleep(self.delay_s)
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.requests.append(("GET", url.path, parse_qs(url.query), None))
+        self._reply({"total": 1, "data": [_SEARCH_HIT]})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(("POST", url.path, parse_qs(url.query), body))
+        self._reply(
+            [
+                (
+                    {
+                        "paperId": i,
+                        "externalIds": {"ArXiv": i.split(":", 1)[1]},
+                        "citationCount": _CITATIONS[i],
+                    }
+                    if i in _CITATIONS
+                    else None
+                )
+                for i in body["ids"]
+            ]
+        )
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_s2():
+    _StubS2.requests = []
+    _StubS2.delay_s = 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubS2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch.object(
+        fetchers, "_S2_API", f"http://127.0.0.1:{server.server_port}/graph/v1"
+    ), patch.object(fetchers, "_S2_ENABLED", True), patch(
+        "src.agents.fetchers.semantic_scholar_scheduler",
+        return_value=PolitenessScheduler(min_interval_s=0, max_concurrent=4),
+    ):
+        yield _StubS2
+    server.shutdown()
+    server.server_close()
+
+
+def _arxiv(entry_id):
+    return {"id": f"http://arxiv.org/abs/{entry_id}", "title": entry_id}
+
+
+def test_arxiv_id_strips_version():
+    assert arxiv_id(_arxiv("1706.03762v7")) == "1706.03762"
+    assert arxiv_id(_arxiv("hep-th/9901001v1")) == "hep-th/9901001"
+    assert arxiv_id({"id": "s2:abc"}) is None
+
+
+@pytest.mark.asyncio
+async def test_search_normalizes_papers(stub_s2):
+    state = {"query": "q kw", "original_query": "attention", "max_papers": 4}
+    result = await semantic_scholar_fetcher(state)
+
+    [paper] = result["semantic_scholar_papers"]
+    assert paper["source"] == "semantic_scholar"
+    assert paper["citation_count"] == 120000
+    assert paper["authors"] == ["Ashish Vaswani", "Noam Shazeer"]
+    method, path, params, _ = stub_s2.requests[0]
+    assert (method, path) == ("GET", "/graph/v1/paper/search")
+    assert params["query"] == ["attention"]
+    assert "errors" not in result
+
+
+@pytest.mark.asyncio
+async def test_citation_counts_fetched_in_one_batch(stub_s2):
+    papers = [
+        _arxiv("1706.03762v7"),
+        _arxiv("1810.04805v2"),
+        _arxiv("2401.99999v1"),
+    ]
+    enriched = await with_citation_counts(papers)
+
+    assert [p.get("citation_count") for p in enriched] == [120000, 90000, None]
+    assert len(stub_s2.requests) == 1
+    method, path, params, body = stub_s2.requests[0]
+    assert (method, path) == ("POST", "/graph/v1/paper/batch")
+    assert sorted(body["ids"]) == [
+        "ARXIV:1706.03762",
+        "ARXIV:1810.04805",
+        "ARXIV:2401.99999",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_slow_source_times_out_with_error(stub_s2, monkeypatch):
+    monkeypatch.setattr(fetchers, "_S2_TIMEOUT_S", 0.1)
+    stub_s2.delay_s = 0.5
+    result = await semantic_scholar_fetcher({"query": "attention"})
+    assert result["semantic_scholar_papers"] == []
+    assert result["errors"] == ["semantic_scholar_fetcher: timed out"]
+
+    # Enrichment is best-effort: papers come back unchanged
+    papers = [_arxiv("1706.03762v7")]
+    assert await with_citation_counts(papers) == papers
+
+
+@pytest.mark.asyncio
+async def test_disabled_source_returns_nothing(monkeypatch):
+    monkeypatch.setattr(fetchers, "_S2_ENABLED", False)
+    assert await semantic_scholar_fetcher({"query": "q"}) == {
+        "semantic_scholar_papers": []
+    }
+
+
+@pytest.mark.asyncio
+async def test_skipped_when_run_is_out_of_time(stub_s2):
+    result = await semantic_scholar_fetcher(
+        {"query": "attention", "deadline": time.time() + 1}
+    )
+    assert result["semantic_scholar_papers"] == []
+    assert result["errors"][0].startswith("semantic_scholar_fetcher: skipped")
+    assert stub_s2.requests == []
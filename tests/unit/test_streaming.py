@@ -0,0 +1,120 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from src.api.streaming import format_sse, stream_analysis
+from src.utils.cost_tracker import cost_tracker
+
+_PAPERS = [{"title": "Paper A"}, {"title": "Paper B"}]
+
+
+class _FakeGraph:
+    def __init__(self, chunks=None, fail=False):
+        self._chunks = chunks or []
+        self._fail = fail
+
+    async def astream(self, state, config=None, stream_mode=None):
+        for chunk in self._chunks:
+            yield chunk
+        if self._fail:
+            raise RuntimeError("graph exploded")
+
+
+def _token(text, node="synthesizer"):
+    return ("messages", (AIMessageChunk(content=text), {"langgraph_node": node}))
+
+
+def _update(node, update):
+    return ("updates", {node: update})
+
+
+def _parse(frames: list[str]) -> list[tuple[str, dict]]:
+    events = []
+    for frame in frames:
+        event_line, data_line = frame.strip().split("\n")
+        events.append(
+            (event_line.removeprefix("event: "), json.loads(data_line[len("data: ") :]))
+        )
+    return events
+
+
+async def _collect(graph) -> list[tuple[str, dict]]:
+    state = {"query_id": "stream-q", "query": "q", "errors": []}
+    return _parse([frame async for frame in stream_analysis(graph, state)])
+
+
+@pytest.fixture(autouse=True)
+def reset_tracker():
+    yield
+    if cost_tracker._report is not None:
+        cost_tracker.finish_query()
+
+
+def test_format_sse_frame():
+    assert format_sse("papers", {"n": 1}) == 'event: papers\ndata: {"n": 1}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_events_arrive_in_pipeline_order():
+    graph = _FakeGraph(
+        [
+            _update("router", {"query": "q kw"}),
+            _token("ignored", node="router"),
+            _update("reranker", {"all_papers": _PAPERS}),
+            _token("Hello "),
+            _token("world"),
+            _update("synthesizer", {"synthesis": "Hello world"}),
+            _update("contradiction_detector", {"contradictions": []}),
+            _update("pinecone_indexer", None),
+            _update("hypothesis_generator", {"hypotheses": [{"hypothesis": "H"}]}),
+            _update("cost_auditor", {"cost_report": {"total_cost_usd": 0.01}}),
+        ]
+    )
+    events = await _collect(graph)
+    names = [name for name, _ in events if name != "stage"]
+
+    assert names == [
+        "started",
+        "papers",
+        "synthesis_token",
+        "synthesis_token",
+        "synthesis",
+        "contradictions",
+        "hypotheses",
+        "cost_report",
+        "done",
+    ]
+    tokens = [d["text"] for name, d in events if name == "synthesis_token"]
+    assert "".join(tokens) == "Hello world"
+
+
+@pytest.mark.asyncio
+async def test_done_event_carries_full_response():
+    graph = _FakeGraph(
+        [
+            _update("reranker", {"all_papers": _PAPERS}),
+            _update("synthesizer", {"synthesis": "S", "errors": ["warn"]}),
+            _update("cost_auditor", {"cost_report": {"total_cost_usd": 0.02}}),
+        ]
+    )
+    events = await _collect(graph)
+    name, done = events[-1]
+
+    assert name == "done"
+    assert done["query_id"] == "stream-q"
+    assert done["papers"] == _PAPERS
+    assert done["synthesis"] == "S"
+    assert done["errors"] == ["warn"]
+    assert done["cost_report"]["total_cost_usd"] == 0.02
+
+
+@pytest.mark.asyncio
+async def test_graph_failure_emits_error_event():
+    graph = _FakeGraph([_update("router", {"query": "q"})], fail=True)
+    events = await _collect(graph)
+    name, data = events[-1]
+
+    assert name == "error"
+    assert "graph exploded" in data["detail"]
+    assert cost_tracker._report is None
@@ -0,0 +1,147 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.agents.synthesizer import synthesizer_node
+
+# ── helpers ────────────────────────────────────────────────────────────────
+
+
+def _papers(n):
+    return [
+        {
+            "id": f"p{i}",
+            "title": f"Paper {i}",
+            "abstract": f"Finding number {i}. It matters.",
+            "authors": [f"Author{i}"],
+            "year": 2024,
+        }
+        for i in range(n)
+    ]
+
+
+def _response(content: str):
+    resp = MagicMock()
+    resp.content = content
+    resp.usage_metadata = {"input_tokens": 100, "output_tokens": 50}
+    return resp
+
+
+class _FakeLLM:
+    """Records every call and answers each with a numbered summary."""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self.fail_on = fail_on
+
+    async def ainvoke(self, messages, config=None):
+        self.calls.append((messages, config))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_on and self.fail_on in messages[0].content[0]["text"]:
+                raise RuntimeError("boom")
+            return _response(f"summary {len(self.calls)} [Author0 et al., 2024]")
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def mock_cost():
+    with patch("src.agents.synthesizer.cost_tracker.track_call"):
+        yield
+
+
+@pytest.fixture
+def no_embeddings():
+    with patch(
+        "src.agents.synthesizer.embed_texts_cached",
+        AsyncMock(side_effect=RuntimeError("offline")),
+    ):
+        yield
+
+
+# ── tests ───────────────────────────────────────────────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_small_paper_sets_use_one_call():
+    llm = _FakeLLM()
+    with patch("src.agents.synthesizer._llm", return_value=llm):
+        result = await synthesizer_node({"all_papers": _papers(10)})
+    assert len(llm.calls) == 1
+    assert result["synthesis"].startswith("summary 1")
+    # The single call streams to SSE clients
+    assert llm.calls[0][1] is None
+
+
+@pytest.mark.asyncio
+async def test_large_paper_sets_are_map_reduced(no_embeddings):
+    llm = _FakeLLM()
+    with (
+        patch("src.agents.synthesizer._CHUNK_PAPERS", 10),
+        patch("src.agents.synthesizer._REDUCE_FAN_IN", 3),
+        patch("src.agents.synthesizer._llm", return_value=llm),
+    ):
+        result = await synthesizer_node(
+            {"all_papers": _papers(90), "original_query": "q"}
+        )
+
+    # 9 chunks, merged 3 at a time into 3, then one final synthesis
+    maps = [c for c in llm.calls if "topical group" in c[0][0].content[-1]["text"]]
+    merges = [c for c in llm.calls if "merging" in c[0][0].content[-1]["text"]]
+    assert (len(maps), len(merges), len(llm.calls)) == (9, 3, 13)
+    # Only the final synthesis streams; every paper went to exactly one chunk
+    assert all(c[1] == {"tags": ["nostream"]} for c in maps + merges)
+    final_messages, final_config = llm.calls[-1]
+    assert final_config is None
+    assert "[Author0 et al., 2024]" in final_messages[1].content
+    chunk_text = "".join(c[0][0].content[0]["text"] for c in maps)
+    assert all(f"**Paper {i}**" in chunk_text for i in range(90))
+    assert result["synthesis"] == "summary 13 [Author0 et al., 2024]"
+    assert not result.get("errors")
+
+
+@pytest.mark.asyncio
+async def test_map_calls_are_bounded(no_embeddings):
+    llm = _FakeLLM()
+    with (
+        patch("src.agents.synthesizer._CHUNK_PAPERS", 5),
+        patch("src.agents.synthesizer._MAP_CONCURRENCY", 3),
+        patch("src.agents.synthesizer._llm", return_value=llm),
+    ):
+        await synthesizer_node({"all_papers": _papers(60)})
+    assert llm.peak == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_chunk_is_reported_not_fatal(no_embeddings):
+    llm = _FakeLLM(fail_on="**Paper 0**")
+    with (
+        patch("src.agents.synthesizer._CHUNK_PAPERS", 10),
+        patch("src.agents.synthesizer._llm", return_value=llm),
+    ):
+        result = await synthesizer_node({"all_papers": _papers(40)})
+    assert result["synthesis"]
+    assert result["errors"] == ["synthesizer: chunk 1 of 4 failed: boom"]
+
+
+@pytest.mark.asyncio
+async def test_failed_merge_passes_summaries_up(no_embeddings):
+    llm = _FakeLLM(fail_on="merging")
+    with (
+        patch("src.agents.synthesizer._CHUNK_PAPERS", 10),
+        patch("src.agents.synthesizer._REDUCE_FAN_IN", 3),
+        patch("src.agents.synthesizer._llm", return_value=llm),
+    ):
+        result = await synthesizer_node({"all_papers": _papers(90)})
+
+    assert result["synthesis"]
+    assert result["errors"] == ["synthesizer: merge of 3 summaries failed: boom"] * 3
+    # Every chunk summary still reaches the final synthesis
+    final_prompt = llm.calls[-1][0][1].content
+    assert final_prompt.count("[Author0 et al., 2024]") == 9